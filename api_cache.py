@@ -0,0 +1,229 @@
+"""
+================================================================================
+[파일명: api_cache.py] - 응답 캐시 (nba_api / ESPN)
+================================================================================
+
+[역할]
+1. stats.nba.com / espn.com 응답을 로컬 SQLite 파일('api_cache.db')에 저장합니다.
+   - 키: 엔드포인트 이름 + 파라미터 (timeout 등 통신 옵션은 제외)
+   - 값: nba_api 원본 데이터셋(JSON) 또는 ESPN HTML 텍스트 (zlib 압축)
+
+2. 엔드포인트별 TTL:
+   - 종료된(Final/PPD) 스코어보드는 만료 없음
+   - 시즌 평균 스탯/로스터는 몇 시간, 부상 정보는 몇 분
+
+3. 용량/기간 기준 정리(evict) 및 우회(bypass):
+   - NBA_CACHE_BYPASS=1 환경변수 또는 '--no-cache' 실행 인자로 캐시 읽기를 건너뜁니다.
+     (우회 중에도 새 응답은 저장되어 다음 실행에서 재사용됩니다.)
+
+4. 캐시 미적중 시 실제 요청은 rate_limiter를 거칩니다. (호스트별 속도 제한 + 재시도 + 공용 연결 풀)
+
+5. nba_api(내부에서 pandas까지 불러옴, 약 0.6초)는 캐시 미적중으로 실제 요청할 때만 불러옵니다.
+   - 엔드포인트는 이름('ScoreboardV2')으로 넘기면 되고, fetch_raw()는 DataFrame 없이 원본 데이터셋을 줍니다.
+
+[주요 함수]
+- fetch_datasets(endpoint, **params): nba_api 엔드포인트 호출 (캐시 경유, DataFrame)
+- fetch_raw(endpoint, **params) / records(data_set): 원본 데이터셋 / 행 딕셔너리 (pandas 불필요)
+- fetch_text(url, headers, timeout): ESPN 등 일반 HTML 요청 (캐시 경유)
+- evict() / clear(): 캐시 정리
+================================================================================
+"""
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import metrics
+import rate_limiter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.path.join(BASE_DIR, "api_cache.db")
+
+# 엔드포인트별 TTL (초). None = 만료 없음
+TTL = {
+    'LeagueDashPlayerStats': 6 * 3600,
+    'CommonTeamRoster': 6 * 3600,
+    'PlayerIndex': 12 * 3600,
+    'ScoreboardV2': 120,          # 진행 중/예정 슬레이트 (종료된 슬레이트는 만료 없음)
+    'espn_injuries': 10 * 60,
+    'team_roster': 36 * 3600,     # team_memo: 입력 해시가 키라 만료는 정리용
+    'team_score': 36 * 3600,
+}
+DEFAULT_TTL = 3600
+
+MAX_CACHE_BYTES = 200 * 1024 * 1024  # 200MB 초과 시 오래된 항목부터 삭제
+MAX_AGE = 60 * 24 * 3600              # 60일 지난 항목은 만료 여부와 관계없이 삭제
+
+BYPASS = os.environ.get("NBA_CACHE_BYPASS") == "1"
+
+_lock = threading.Lock()
+_conn = None
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_PATH, check_same_thread=False, isolation_level=None)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            endpoint TEXT,
+            payload BLOB,
+            size INTEGER,
+            created_at REAL,
+            expires_at REAL,
+            accessed_at REAL
+        )
+        ''')
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        _evict(_conn)
+    return _conn
+
+def make_key(endpoint, params):
+    raw = json.dumps({'endpoint': endpoint, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def get(endpoint, params):
+    """ 유효한 캐시 값을 반환합니다. (없거나 만료/우회 시 None) """
+    if BYPASS: return None
+    key = make_key(endpoint, params)
+    now = time.time()
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute("SELECT payload, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None: return None
+        payload, expires_at = row
+        if expires_at is not None and expires_at < now: return None
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+    return json.loads(zlib.decompress(payload))
+
+def put(endpoint, params, value, ttl=DEFAULT_TTL):
+    key = make_key(endpoint, params)
+    payload = zlib.compress(json.dumps(value).encode('utf-8'))
+    now = time.time()
+    expires_at = None if ttl is None else now + ttl
+    with _lock:
+        conn = _get_conn()
+        conn.execute('''
+        INSERT OR REPLACE INTO responses (key, endpoint, payload, size, created_at, expires_at, accessed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (key, endpoint, payload, len(payload), now, expires_at, now))
+
+def cached(endpoint, params, loader, ttl=None, refresh=False):
+    """ 캐시에 있으면 그대로, 없으면 loader()를 호출해 저장 후 반환합니다.
+    ttl: 초 단위 숫자, 또는 값을 받아 TTL을 돌려주는 함수 (None = 만료 없음)
+    refresh=True 이면 캐시를 읽지 않고 새로 받아 저장합니다. (라이브 폴링) """
+    value = None if refresh else get(endpoint, params)
+    metrics.incr('api_cache_requests', endpoint=endpoint, result='miss' if value is None else 'hit')
+    if value is not None: return value
+
+    value = loader()
+    if ttl is None: ttl = TTL.get(endpoint, DEFAULT_TTL)
+    if callable(ttl): ttl = ttl(value)
+    put(endpoint, params, value, ttl)
+    return value
+
+def scoreboard_ttl(data_sets):
+    """ 모든 경기가 종료(3)되었거나 연기(PPD)된 스코어보드는 만료 없이 보관합니다. """
+    header = data_sets.get('GameHeader', {})
+    headers = header.get('headers') or []
+    rows = header.get('data') or []
+    if not rows or 'GAME_STATUS_ID' not in headers: return TTL['ScoreboardV2']
+
+    status_idx = headers.index('GAME_STATUS_ID')
+    text_idx = headers.index('GAME_STATUS_TEXT') if 'GAME_STATUS_TEXT' in headers else None
+    for row in rows:
+        status_text = str(row[text_idx]).upper() if text_idx is not None else ''
+        if row[status_idx] != 3 and "PPD" not in status_text and "POSTPONED" not in status_text:
+            return TTL['ScoreboardV2']
+    return None
+
+NBA_HOST = 'stats.nba.com'
+
+def _use_pooled_session():
+    """ nba_api가 rate_limiter의 stats.nba.com 공용 세션(연결 풀 + Retry-After 훅)을 쓰도록 설정 """
+    from nba_api.stats.library.http import NBAStatsHTTP
+    pooled = rate_limiter.get_session(NBA_HOST)
+    if NBAStatsHTTP.get_session() is not pooled: NBAStatsHTTP.set_session(pooled)
+
+def endpoint_class(endpoint):
+    """ 'ScoreboardV2' -> nba_api 엔드포인트 클래스 """
+    return getattr(importlib.import_module(f"nba_api.stats.endpoints.{endpoint.lower()}"), endpoint)
+
+def fetch_raw(endpoint, ttl=None, timeout=60, refresh=False, **params):
+    """ nba_api 엔드포인트를 캐시를 거쳐 호출하고 원본 데이터셋 {이름: {'headers', 'data'}}을 반환합니다.
+    endpoint: 엔드포인트 이름('ScoreboardV2') 또는 클래스. 이름이면 캐시 적중 시 nba_api를 불러오지 않습니다. """
+    endpoint_cls = None if isinstance(endpoint, str) else endpoint
+    if endpoint_cls is not None: endpoint = endpoint_cls.__name__
+    if ttl is None and endpoint == 'ScoreboardV2': ttl = scoreboard_ttl
+
+    def send():
+        result = (endpoint_cls or endpoint_class(endpoint))(timeout=timeout, **params)
+        status = result.nba_response._status_code
+        if status in rate_limiter.RETRY_STATUS: raise rate_limiter.RetryableError(status, url=endpoint)
+        return result
+
+    def loader():
+        _use_pooled_session()
+        with metrics.span('api_request', endpoint=endpoint):
+            result = rate_limiter.call(NBA_HOST, send)
+        if metrics.ENABLED:
+            metrics.incr('download_bytes', len(result.nba_response.get_response().encode('utf-8')), endpoint=endpoint)
+        return result.nba_response.get_data_sets()
+
+    return cached(endpoint, params, loader, ttl, refresh)
+
+def records(data_set):
+    """ 원본 데이터셋 -> 행 딕셔너리 목록 """
+    headers = data_set.get('headers') or []
+    return [dict(zip(headers, row)) for row in data_set.get('data') or []]
+
+def fetch_datasets(endpoint, ttl=None, timeout=60, refresh=False, **params):
+    """ fetch_raw()와 같고, {데이터셋 이름: DataFrame}을 반환합니다. """
+    import pandas as pd
+    data_sets = fetch_raw(endpoint, ttl, timeout, refresh, **params)
+    return {
+        name: pd.DataFrame(data['data'], columns=data['headers'])
+        for name, data in data_sets.items()
+    }
+
+def fetch_text(url, headers=None, timeout=5, endpoint='espn_injuries', ttl=None):
+    """ 일반 HTTP GET 결과 텍스트를 캐시를 거쳐 가져옵니다. (200 응답만 저장) """
+    value = get(endpoint, {'url': url})
+    metrics.incr('api_cache_requests', endpoint=endpoint, result='miss' if value is None else 'hit')
+    if value is not None: return value
+
+    with metrics.span('api_request', endpoint=endpoint):
+        res = rate_limiter.request('GET', url, headers=headers, timeout=timeout)
+    metrics.incr('download_bytes', len(res.content), endpoint=endpoint)
+    res.raise_for_status()
+    put(endpoint, {'url': url}, res.text, TTL.get(endpoint, DEFAULT_TTL) if ttl is None else ttl)
+    return res.text
+
+def _evict(conn, max_bytes=MAX_CACHE_BYTES, max_age=MAX_AGE):
+    now = time.time()
+    conn.execute("DELETE FROM responses WHERE expires_at < ? OR created_at < ?", (now, now - max_age))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    if total <= max_bytes: return
+
+    # 가장 오래 사용되지 않은 항목부터 용량 한도 아래로 내려갈 때까지 삭제
+    excess = total - max_bytes
+    freed = 0
+    stale_keys = []
+    for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC"):
+        stale_keys.append((key,))
+        freed += size
+        if freed >= excess: break
+    conn.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+
+def evict(max_bytes=MAX_CACHE_BYTES, max_age=MAX_AGE):
+    with _lock:
+        _evict(_get_conn(), max_bytes, max_age)
+
+def clear():
+    with _lock:
+        _get_conn().execute("DELETE FROM responses")
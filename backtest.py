@@ -0,0 +1,355 @@
+"""
+================================================================================
+[파일명: backtest.py] - 저장된 스냅샷으로 과거 슬레이트 재채점 (Backtest)
+================================================================================
+
+[역할]
+1. daily_stats에 저장된 날짜별 선수 스냅샷(team 컬럼 포함)으로 로스터를 복원하고,
+   uv_model.score_teams()로 홈/원정 점수를 다시 계산합니다.
+   (calculate_team_power()와 부동소수점 오차 범위에서 같은 점수, 승자는 uv_model.home_wins())
+
+2. predictions에 기록된 실제 결과(actual_winner)와 대조해 적중률을 냅니다.
+   -> 모델 상수/로직을 바꾼 뒤 슬랙에 나가기 전에 시즌 단위로 검증할 수 있습니다.
+
+3. 날짜를 묶음으로 나눠 프로세스 풀에서 병렬 처리합니다.
+   (묶음 안에서는 '날짜|팀' 키로 모든 팀을 한 번에 배치 계산)
+
+4. 파라미터 스윕 (--sweep):
+   - uv_model 상수 격자(grid)의 모든 조합으로 모든 경기를 한 번에 채점합니다.
+   - 선수 x 설정 축을 NumPy 브로드캐스팅으로 계산 (설정 수만큼 파이썬 루프를 돌지 않음)
+   - 조합별 적중률 표(accuracy surface)와 최적 설정을 출력합니다.
+   - 승자 판정은 재채점과 같이 팀별 점수를 만든 뒤 home_wins()로 비교합니다.
+
+[출력]
+- 전체 적중률 / 저장된 예측과의 일치율
+- 예상 격차(gap) 구간별 적중률 (calibration)
+- 실행 시간
+
+[사용법]
+python backtest.py [--start 2026-01-01] [--end 2026-02-12] [--workers 4]
+python backtest.py --sweep [--grid UV_SLOPE=10:30:5 --grid HOME_BONUS=0,0.15,0.3] [--out sweep.csv]
+python backtest.py --snapshots arrow        # snapshot_store.py Arrow 파일에서 로드 (훨씬 빠름)
+================================================================================
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import database
+import snapshot_store
+import uv_model
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from uv_model import home_wins, score_teams
+
+# -----------------------------------------------------------------------------
+# 1. 설정
+# -----------------------------------------------------------------------------
+GAP_BUCKETS = [0, 0.5, 1.0, 1.5, 2.0, np.inf]  # 예상 격차 구간 (calibration)
+MIN_DATES_PER_WORKER = 30                      # 이보다 적으면 프로세스를 나누지 않음
+
+# 스윕 기본 격자 (현재 값 포함, 약 2.4만 조합) -> --grid 로 항목별 덮어쓰기
+SWEEP_GRID = {
+    'UV_SLOPE': [10, 15, 20, 25, 30],
+    'UV_PIVOT': [0.08, 0.09, 0.10, 0.11, 0.12],
+    'UV_MIN': [0.1, 0.5],
+    'UV_MAX': [2.5, 3.5, 4.5],
+    'REPLACEMENT_VALUE': [0.3, 0.5, 0.7],
+    'FLOOR_MINUTES': [200, 240],
+    'HOME_BONUS': [0.0, 0.15, 0.3],
+    'USG_THRESHOLD': [0.5, 0.6, 0.7],
+    'USG_PENALTY': [0.0, 3.0, 6.0],
+}
+UV_PARAMS = ['UV_SLOPE', 'UV_PIVOT', 'UV_MIN', 'UV_MAX']  # 선수 축 계산이 필요한 상수
+SWEEP_CHUNK_ELEMENTS = 2_000_000                           # 청크당 배열 원소 수 상한 (메모리 제한)
+SNAPSHOT_COLUMNS = ['date', 'team', 'player_name', 'availability', 'pos', 'min', 'pie', 'usg_pct']
+
+# -----------------------------------------------------------------------------
+# 2. 데이터 로드
+# -----------------------------------------------------------------------------
+def load_snapshots(start=None, end=None, source='db'):
+    """ 팀이 기록된 선수 스냅샷 (저장 순서 유지 -> 합산 순서가 실시간 예측과 동일)
+    source='arrow' 이면 snapshot_store의 메모리 맵 파일에서 읽습니다. (SQLite보다 수십 배 빠름) """
+    if source == 'arrow':
+        players = snapshot_store.load(start, end, columns=SNAPSHOT_COLUMNS)
+        for col in ['date', 'team', 'player_name', 'availability', 'pos']:
+            players[col] = players[col].astype(str)  # 사전 -> 문자열 컬럼 (read_sql 결과와 같은 dtype)
+        return players
+    query = """
+        SELECT date, team, player_name, availability, pos, min, pie, usg_pct
+        FROM daily_stats
+        WHERE team IS NOT NULL AND date >= ? AND date <= ?
+        ORDER BY date ASC, rowid ASC
+    """
+    return pd.read_sql(query, database.get_connection(), params=(start or '', end or '9999-12-31'))
+
+def load_games(start=None, end=None):
+    """ 결과가 기록된(채점된) 경기만 """
+    query = """
+        SELECT date, home_team, visit_team, predicted_winner, predicted_gap, actual_winner, is_correct
+        FROM predictions
+        WHERE actual_winner IS NOT NULL AND actual_winner NOT IN ('', 'Postponed')
+          AND date >= ? AND date <= ?
+        ORDER BY date ASC, rowid ASC
+    """
+    return pd.read_sql(query, database.get_connection(), params=(start or '', end or '9999-12-31'))
+
+# -----------------------------------------------------------------------------
+# 3. 재채점
+# -----------------------------------------------------------------------------
+def replay(players, games):
+    """ players: 스냅샷 선수 (date, team, ...) / games: 채점된 경기
+    반환값: 스냅샷이 있는 경기 + h_score, v_score, replay_winner, replay_gap """
+    if players.empty or games.empty: return games.iloc[0:0].assign(h_score=[], v_score=[], replay_winner=[], replay_gap=[])
+
+    players = players.assign(slate_key=players['date'] + '|' + players['team'])
+    home_keys = games['date'] + '|' + games['home_team']
+    visit_keys = games['date'] + '|' + games['visit_team']
+
+    # 양 팀 스냅샷이 모두 있는 경기만
+    known = players['slate_key'].unique()
+    games = games[home_keys.isin(known) & visit_keys.isin(known)].copy()
+    if games.empty: return games.assign(h_score=[], v_score=[], replay_winner=[], replay_gap=[])
+    home_keys, visit_keys = home_keys[games.index], visit_keys[games.index]
+
+    scores = score_teams(players, set(home_keys), key='slate_key').scores['score']
+    games['h_score'] = scores.reindex(home_keys).to_numpy()
+    games['v_score'] = scores.reindex(visit_keys).to_numpy()
+    games['replay_winner'] = np.where(home_wins(games['h_score'], games['v_score']), games['home_team'], games['visit_team'])
+    games['replay_gap'] = (games['h_score'] - games['v_score']).abs()
+    return games
+
+def _replay_chunk(chunk):
+    """ 프로세스 풀 작업 단위 (피클 가능한 최상위 함수) """
+    players, games = chunk
+    return replay(players, games)
+
+def run_backtest(start=None, end=None, workers=None, source='db'):
+    """ 저장된 모든 날짜(또는 구간)를 재채점합니다. 반환값: (경기별 결과, 스냅샷 없는 경기 수) """
+    players = load_snapshots(start, end, source)
+    games = load_games(start, end)
+    dates = sorted(set(players['date']) & set(games['date']))
+
+    if workers is None: workers = os.cpu_count() or 1
+    n_chunks = max(1, min(workers, len(dates) // MIN_DATES_PER_WORKER))
+    date_chunks = [list(c) for c in np.array_split(np.array(dates, dtype=object), n_chunks) if len(c)]
+
+    chunks = [(players[players['date'].isin(c)], games[games['date'].isin(c)]) for c in date_chunks]
+    if len(chunks) <= 1:
+        results = [replay(players, games)]
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            results = list(executor.map(_replay_chunk, chunks))
+
+    results = pd.concat(results, ignore_index=True) if results else games.iloc[0:0]
+    return results, len(games) - len(results)
+
+# -----------------------------------------------------------------------------
+# 4. 리포트
+# -----------------------------------------------------------------------------
+def calibration(results):
+    """ 예상 격차 구간별 경기 수 / 적중률 """
+    hit = results['replay_winner'] == results['actual_winner']
+    bucket = pd.cut(results['replay_gap'], GAP_BUCKETS, right=False)
+    table = hit.groupby(bucket, observed=False).agg(['count', 'sum'])
+    table.columns = ['games', 'correct']
+    table['accuracy'] = (table['correct'] / table['games'].where(table['games'] > 0)) * 100
+    return table
+
+def print_report(results, skipped, elapsed):
+    print("\n" + "=" * 60)
+    print("📊 백테스트 결과")
+    print("=" * 60)
+    if results.empty:
+        print("❌ 재채점할 경기가 없습니다. (team이 기록된 daily_stats 스냅샷 필요)")
+        print(f"⏱️ 실행 시간: {elapsed:.2f}초")
+        return
+
+    hit = results['replay_winner'] == results['actual_winner']
+    same = results['replay_winner'] == results['predicted_winner']
+    print(f"📅 기간: {results['date'].min()} ~ {results['date'].max()} ({results['date'].nunique()}일)")
+    print(f"🏀 경기 수: {len(results)} (스냅샷 없음 {skipped}경기 제외)")
+    print(f"🎯 적중률: {hit.mean() * 100:.2f}% ({int(hit.sum())}/{len(results)})")
+    print(f"🔁 저장된 예측과 일치: {same.mean() * 100:.2f}%")
+
+    print("\n📐 예상 격차 구간별 적중률")
+    for interval, row in calibration(results).iterrows():
+        acc = f"{row['accuracy']:.1f}%" if row['games'] else "-"
+        print(f"   gap {str(interval):<12} {int(row['games']):>5}경기  {acc}")
+    print(f"\n⏱️ 실행 시간: {elapsed:.2f}초")
+
+# -----------------------------------------------------------------------------
+# 5. 파라미터 스윕
+# -----------------------------------------------------------------------------
+def prepare_sweep_inputs(players, games):
+    """ 스냅샷을 (팀 x 선수) 패딩 행렬로 바꿉니다. (빈 칸은 출전시간 0 -> 합계에 영향 없음)
+    반환값: dict (pie, minutes, total_minutes, top_2_usg, has_players, h_idx, v_idx, home_won) """
+    keys = players['date'] + '|' + players['team']
+    codes, teams = pd.factorize(keys)
+
+    roster = players[players['availability'] != 'Out']
+    r_codes = codes[(players['availability'] != 'Out').to_numpy()]
+    pie = pd.to_numeric(roster['pie']).to_numpy(dtype=float)
+    minutes = pd.to_numeric(roster['min']).to_numpy(dtype=float)
+    usg = np.nan_to_num(pd.to_numeric(roster['usg_pct']).to_numpy(dtype=float))
+
+    n_teams = len(teams)
+    sizes = np.bincount(r_codes, minlength=n_teams)
+    order = np.argsort(r_codes, kind='stable')
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    slot = np.arange(len(r_codes)) - np.repeat(starts, sizes)
+    width = max(1, int(sizes.max()) if n_teams else 1)
+
+    pie_mat = np.zeros((n_teams, width))
+    min_mat = np.zeros((n_teams, width))
+    usg_mat = np.zeros((n_teams, width))
+    pie_mat[r_codes[order], slot] = pie[order]
+    min_mat[r_codes[order], slot] = minutes[order]
+    usg_mat[r_codes[order], slot] = usg[order]
+    usg_top = -np.sort(-usg_mat, axis=1)[:, :2]
+
+    index = pd.Index(teams)
+    home_keys = games['date'] + '|' + games['home_team']
+    visit_keys = games['date'] + '|' + games['visit_team']
+    return {
+        'pie': pie_mat, 'minutes': min_mat,
+        'total_minutes': min_mat.sum(axis=1),
+        'top_2_usg': usg_top.sum(axis=1),
+        'has_players': sizes > 0,
+        'h_idx': index.get_indexer(home_keys), 'v_idx': index.get_indexer(visit_keys),
+        'home_won': (games['actual_winner'] == games['home_team']).to_numpy(),
+    }
+
+def sweep_accuracy(inputs, grid):
+    """ 격자의 모든 조합에 대해 적중률을 계산합니다.
+    축: UV 상수 조합(청크 단위) x 대체값 x 하한 출전시간 x 홈 이점 x USG 기준 x 패널티
+    반환값: DataFrame (상수 컬럼 + correct, accuracy), 행 순서는 itertools.product(grid 순서) """
+    g = {name: np.asarray(grid[name], dtype=float) for name in SWEEP_GRID}
+    uv_combos = np.array(list(product(*(g[name] for name in UV_PARAMS))), dtype=float)
+    slope, pivot, uv_lo, uv_hi = (uv_combos[:, i] for i in range(4))
+
+    has = inputs['has_players']
+    h, v = inputs['h_idx'], inputs['v_idx']
+    home_won = inputs['home_won']
+    n_games = len(h)
+
+    # 출전시간 보정 (팀 x 대체값 x 하한) - UV와 무관
+    total_min = inputs['total_minutes'][:, None]
+    floor = g['FLOOR_MINUTES'][None, :]
+    missing = np.maximum(floor - total_min, 0.0)                          # T x F
+    denom = np.maximum(total_min, floor)                                  # T x F
+    fill = g['REPLACEMENT_VALUE'][None, :, None] * missing[:, None, :]    # T x R x F
+
+    # USG 패널티 (팀 x 기준 x 배율) -> 경기별 홈-원정 차이
+    over = np.maximum(inputs['top_2_usg'][:, None] - g['USG_THRESHOLD'][None, :], 0.0)
+    penalty = np.where(has[:, None, None], over[:, :, None] * g['USG_PENALTY'][None, None, :], 0.0)
+    h_penalty = penalty[h][:, None, None, None, None, :, :]               # G x 1 x 1 x 1 x 1 x U x P
+    v_penalty = penalty[v][:, None, None, None, None, :, :]
+    home_bonus = np.where(has[h][:, None], g['HOME_BONUS'][None, :], 0.0)  # G x H
+
+    rest_shape = (len(g['REPLACEMENT_VALUE']), len(g['FLOOR_MINUTES']), len(g['HOME_BONUS']),
+                  len(g['USG_THRESHOLD']), len(g['USG_PENALTY']))
+    per_uv = n_games * int(np.prod(rest_shape))
+    chunk = max(1, SWEEP_CHUNK_ELEMENTS // max(per_uv, inputs['pie'].size, 1))
+
+    correct = np.empty((len(uv_combos),) + rest_shape, dtype=np.int64)
+    pie = inputs['pie'][:, :, None]
+    minutes = inputs['minutes']
+    for lo in range(0, len(uv_combos), chunk):
+        sl = slice(lo, lo + chunk)
+        uv = np.clip(1.0 + (pie - pivot[sl]) * slope[sl], uv_lo[sl], uv_hi[sl])   # T x W x C
+        contribution = np.einsum('twc,tw->tc', uv, minutes)                          # T x C
+
+        raw = (contribution[:, :, None, None] + fill[:, None, :, :]) / denom[:, None, None, :] * 5
+        raw = np.where(has[:, None, None, None], raw, 0.0)                           # T x C x R x F
+
+        # 팀별 최종 점수 (score_teams와 같은 순서: 원점수 + 홈 이점 - 패널티) -> home_wins()로 비교
+        h_score = raw[h][:, :, :, :, None, None, None] + home_bonus[:, None, None, None, :, None, None] - h_penalty
+        v_score = raw[v][:, :, :, :, None, None, None] - v_penalty                 # G x C x R x F x 1 x U x P
+        hit = home_wins(h_score, v_score) == home_won[:, None, None, None, None, None, None]
+        correct[sl] = hit.sum(axis=0)
+
+    combos = pd.DataFrame(list(product(*(g[name] for name in SWEEP_GRID))), columns=list(SWEEP_GRID))
+    combos['correct'] = correct.reshape(-1)
+    combos['accuracy'] = combos['correct'] / max(n_games, 1) * 100
+    return combos
+
+def parse_grid(specs):
+    """ ['UV_SLOPE=10:30:5', 'HOME_BONUS=0,0.15'] -> SWEEP_GRID 복사본에 덮어쓰기
+    'a:b:n' 은 a~b 구간 n개 (linspace), 'a,b,c' 는 값 목록 """
+    grid = {name: list(values) for name, values in SWEEP_GRID.items()}
+    for spec in specs or []:
+        name, _, values = spec.partition('=')
+        name = name.strip().upper()
+        if name not in grid: raise ValueError(f"알 수 없는 상수: {name} (가능: {', '.join(grid)})")
+        if ':' in values:
+            start, stop, num = values.split(':')
+            grid[name] = list(np.linspace(float(start), float(stop), int(num)))
+        else:
+            grid[name] = [float(x) for x in values.split(',')]
+    return grid
+
+def run_sweep(grid, start=None, end=None, source='db'):
+    """ 스냅샷이 있는 채점 경기 전체를 격자의 모든 조합으로 채점합니다. 반환값: (조합별 결과, 경기 수) """
+    players = load_snapshots(start, end, source)
+    games = load_games(start, end)
+    known = (players['date'] + '|' + players['team']).unique()
+    games = games[(games['date'] + '|' + games['home_team']).isin(known)
+                  & (games['date'] + '|' + games['visit_team']).isin(known)]
+    if games.empty: return None, 0
+    return sweep_accuracy(prepare_sweep_inputs(players, games), grid), len(games)
+
+def print_sweep_report(surface, n_games, elapsed, top=10):
+    print("\n" + "=" * 60)
+    print("🧪 파라미터 스윕 결과")
+    print("=" * 60)
+    if surface is None:
+        print("❌ 재채점할 경기가 없습니다. (team이 기록된 daily_stats 스냅샷 필요)")
+        return
+
+    current = np.ones(len(surface), dtype=bool)
+    for name in SWEEP_GRID:
+        current &= np.isclose(surface[name], getattr(uv_model, name))
+    print(f"🏀 경기 수: {n_games} / 조합 수: {len(surface):,}")
+    if current.any():
+        print(f"📌 현재 설정 적중률: {surface.loc[current, 'accuracy'].iloc[0]:.2f}%")
+
+    best = surface.sort_values('accuracy', ascending=False, kind='stable').head(top)
+    print(f"\n🏆 상위 {len(best)}개 설정")
+    print(best.to_string(index=False, float_format=lambda x: f"{x:g}"))
+    print(f"\n⏱️ 실행 시간: {elapsed:.2f}초")
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 스냅샷으로 과거 슬레이트를 재채점합니다.")
+    parser.add_argument("--start", help="시작 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--end", help="끝 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--sweep", action="store_true", help="uv_model 상수 격자 스윕")
+    parser.add_argument("--grid", action="append", help="스윕 격자 덮어쓰기 (예: UV_SLOPE=10:30:5)")
+    parser.add_argument("--out", help="스윕 결과(적중률 표) CSV 저장 경로")
+    parser.add_argument("--snapshots", choices=['db', 'arrow'], default='db',
+                        help="스냅샷 출처: db(daily_stats) / arrow(snapshot_store 파일)")
+    args = parser.parse_args()
+
+    if args.snapshots == 'arrow' and not snapshot_store.AVAILABLE:
+        parser.error("--snapshots arrow 에는 pyarrow가 필요합니다. (pip install pyarrow 또는 --snapshots db)")
+
+    if args.sweep:
+        grid = parse_grid(args.grid)
+        print(f"🧪 파라미터 스윕 시작... ({int(np.prod([len(v) for v in grid.values()])):,}개 조합)")
+        started = time.perf_counter()
+        surface, n_games = run_sweep(grid, args.start, args.end, args.snapshots)
+        print_sweep_report(surface, n_games, time.perf_counter() - started)
+        if surface is not None and args.out:
+            surface.to_csv(args.out, index=False)
+            print(f"💾 적중률 표 저장: {args.out}")
+        return
+
+    print("🔁 백테스트 시작...")
+    started = time.perf_counter()
+    results, skipped = run_backtest(args.start, args.end, args.workers, args.snapshots)
+    print_report(results, skipped, time.perf_counter() - started)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+"""
+================================================================================
+[파일명: benchmark.py] - 성능 측정 (합성 대용량 DB + 핫패스 타이밍)
+================================================================================
+
+[역할]
+1. 합성 nba_data.db 생성 (크기별):
+   - season : 1시즌 (예측 약 1.2천 건 / daily_stats 약 3만 행)
+   - decade : 10시즌 (예측 약 1.2만 건 / daily_stats 약 30만 행)
+   - large  : 100시즌 (예측 12만 건 이상 / daily_stats 300만 행 이상)
+   -> benchmark_data/ 폴더에 한 번 만들어 두고 재사용합니다.
+
+2. 핫패스 측정:
+   - 모델: calculate_team_power / select_best_lineup / score_teams(슬레이트)
+   - 부상자 이름 매칭: resolve_player_ids (처음 보는 이름 fuzzy / 저장된 매핑)
+   - 저장: save_daily_stats (슬레이트 1회분)
+   - 대시보드: 캐시 없이 전체 렌더 1회 (AppTest)
+   - 채점: check_results / refresh_results 채점 + 요약 테이블 갱신, 요약 전체 재계산
+   - 백테스트: backtest.run_backtest
+   - 스냅샷 로드: 1시즌 daily_stats(SQLite) vs snapshot_store(Arrow 메모리 맵)
+
+3. 기동 시간 (새 프로세스, cron처럼 매번 콜드 스타트):
+   - import: 엔트리 포인트별 'python -X importtime -c "import <모듈>"' 누적 import 시간
+   - exit  : 일찍 끝나는 실행 전체 시간 (DB 없음 / 예측 없음 / --help / 대기열 현황)
+     -> STARTUP_BUDGET_MS(200ms)를 넘으면 실패로 표시합니다. (무거운 import가 다시 모듈 상단으로 올라온 경우)
+
+4. 결과는 JSON(중앙값/최소/반복 수)으로 저장하고, 기준 파일(baseline)과 비교해
+   느려진 항목을 숫자로 보여줍니다. (기준 대비 REGRESSION_RATIO 배 이상이면 실패 코드 1)
+
+[사용법]
+python benchmark.py                         # season, decade 측정 -> benchmark_results.json
+python benchmark.py --sizes season decade large
+python benchmark.py --startup-only          # 기동 시간만 측정 (합성 DB 불필요, 몇 초)
+python benchmark.py --save-baseline         # 현재 결과를 benchmark_baseline.json 으로 저장
+================================================================================
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+
+# database import 전에 임시 DB로 경로를 돌려 둡니다. (실제 nba_data.db 보호)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "benchmark_data")
+os.environ["NBA_DB_PATH"] = os.path.join(DATA_DIR, "scratch.db")
+
+import database
+import check_results
+import refresh_results
+import backtest
+import player_ids
+import snapshot_store
+from uv_model import calculate_team_power, select_best_lineup, calculate_individual_uv, score_teams
+
+# -----------------------------------------------------------------------------
+# 1. 설정
+# -----------------------------------------------------------------------------
+RESULTS_PATH = os.path.join(BASE_DIR, "benchmark_results.json")
+BASELINE_PATH = os.path.join(BASE_DIR, "benchmark_baseline.json")
+GENERATOR_VERSION = 1      # 합성 데이터 형식이 바뀌면 올림 (기존 파일 재생성)
+REGRESSION_RATIO = 1.5     # 기준 대비 이 배수 이상 느려지면 회귀로 판정 (공용 CPU 잡음 고려)
+TIME_BUDGET = 1.0          # 항목당 측정 시간 (초), 최소 MIN_RUNS 회
+MIN_RUNS = 3
+STARTUP_RUNS = 7           # 기동 시간 측정 반복 수 (새 프로세스)
+STARTUP_BUDGET_MS = 200    # 조기 종료 실행 목표 시간 (인터프리터 기동 포함)
+
+# import 시간을 잴 엔트리 포인트 (cron / 수동 실행 스크립트)
+ENTRY_POINTS = ['run_nba', 'check_results', 'refresh_results', 'slack_outbox', 'backtest', 'snapshot_store']
+
+SIZES = {
+    'season': 1,
+    'decade': 10,
+    'large': 100,
+}
+DAYS_PER_SEASON = 170
+GAMES_PER_DAY = 7          # 170일 x 7경기 = 시즌당 1190경기
+PLAYERS_PER_TEAM = 13
+
+TEAM_ABBRS = sorted(set(check_results.TEAMS.values()))
+
+# -----------------------------------------------------------------------------
+# 2. 합성 데이터
+# -----------------------------------------------------------------------------
+def synthetic_team(rng, team, n=PLAYERS_PER_TEAM, season=0):
+    """ 한 팀 로스터 (run_nba 슬레이트 프레임과 같은 컬럼) """
+    return pd.DataFrame({
+        'player_id': np.arange(n),
+        'player_name': [f"{team} Player{season}-{k}" for k in range(n)],
+        'min': rng.uniform(8, 36, n).round(1),
+        'pie': rng.uniform(0.0, 0.2, n).round(3),
+        'usg_pct': rng.uniform(0.1, 0.35, n).round(3),
+        'pos': rng.choice(['G', 'F', 'C', 'G-F', 'F-C'], n),
+        'availability': rng.choice(['OK', 'Out', 'Day-To-Day'], n, p=[0.8, 0.1, 0.1]),
+    })
+
+def build_synthetic_db(path, seasons, seed=0):
+    """ 시즌 수만큼 예측/채점/선수 스냅샷을 가진 DB를 만듭니다. (가장 최근 3일은 미채점) """
+    if os.path.exists(path): os.remove(path)
+    rng = np.random.default_rng(seed)
+    use_db(path)
+
+    last_season_start = date(2025, 10, 21)
+    with database.transaction() as conn:
+        for s in range(seasons):
+            start = last_season_start.replace(year=last_season_start.year - (seasons - 1 - s))
+            prediction_rows, stat_rows = [], []
+            for d in range(DAYS_PER_SEASON):
+                ds = (start + timedelta(days=d)).isoformat()
+                teams = rng.permutation(TEAM_ABBRS)[:GAMES_PER_DAY * 2]
+                for home, visit in zip(teams[::2], teams[1::2]):
+                    pred = home if rng.random() < 0.6 else visit
+                    roll = rng.random()
+                    actual = 'Postponed' if roll < 0.02 else (home if roll < 0.6 else visit)
+                    prediction_rows.append((ds, home, visit, pred, float(rng.uniform(0, 3)), actual,
+                                            None if actual == 'Postponed' else int(pred == actual)))
+                for team in teams:
+                    n = PLAYERS_PER_TEAM
+                    stat_rows.extend(zip(
+                        [ds] * n, [f"{team} Player{s}-{k}" for k in range(n)],
+                        rng.choice(['OK', 'Out', 'Day-To-Day'], n, p=[0.8, 0.1, 0.1]).tolist(),
+                        rng.choice(['G', 'F', 'C', 'G-F', 'F-C'], n).tolist(),
+                        rng.uniform(8, 36, n).round(1).tolist(), rng.uniform(0, 0.2, n).round(3).tolist(),
+                        rng.uniform(100, 125, n).round(1).tolist(), rng.uniform(100, 125, n).round(1).tolist(),
+                        rng.uniform(0.1, 0.35, n).round(3).tolist(), rng.uniform(0.45, 0.65, n).round(3).tolist(),
+                        ['-'] * n, [team] * n,
+                    ))
+            conn.executemany('''
+            INSERT INTO predictions (date, home_team, visit_team, predicted_winner, predicted_gap, actual_winner, is_correct)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', prediction_rows)
+            conn.executemany('''
+            INSERT INTO daily_stats
+            (date, player_name, availability, pos, min, pie, off_rating, def_rating, usg_pct, ts_pct, note, team)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', stat_rows)
+
+        # 최근 3일은 채점 전 상태
+        open_from = conn.execute("SELECT date FROM (SELECT DISTINCT date FROM predictions ORDER BY date DESC LIMIT 3) ORDER BY date LIMIT 1").fetchone()[0]
+        conn.execute("UPDATE predictions SET actual_winner = NULL, is_correct = NULL WHERE date >= ?", (open_from,))
+        database.refresh_daily_accuracy(conn, [r[0] for r in conn.execute("SELECT DISTINCT date FROM predictions")])
+    database.close_connection()
+
+def use_db(path):
+    """ database 공용 연결을 다른 파일로 전환 """
+    database.close_connection()
+    database.DB_PATH = path
+    database.get_connection()
+
+def ensure_db(size):
+    path = os.path.join(DATA_DIR, f"{size}_v{GENERATOR_VERSION}.db")
+    if not os.path.exists(path):
+        print(f"🏗️ 합성 DB 생성 중: {size} ({SIZES[size]}시즌)...")
+        started = time.perf_counter()
+        build_synthetic_db(path + ".tmp", SIZES[size])  # 연결을 닫으면 WAL이 본 파일로 합쳐짐
+        os.replace(path + ".tmp", path)
+        print(f"   -> 완료 ({time.perf_counter() - started:.1f}초)")
+    use_db(path)
+    return path
+
+def ensure_snapshots(size):
+    """ 합성 DB의 daily_stats를 Arrow 스냅샷으로 한 번 변환해 두고 재사용 """
+    path = os.path.join(DATA_DIR, f"{size}_v{GENERATOR_VERSION}_snapshots")
+    if not os.path.isdir(path):
+        print(f"🏗️ Arrow 스냅샷 변환 중: {size}...")
+        snapshot_store.SNAPSHOT_DIR = path + ".tmp"
+        snapshot_store.export_from_db()
+        os.replace(path + ".tmp", path)
+    snapshot_store.SNAPSHOT_DIR = path
+
+# -----------------------------------------------------------------------------
+# 3. 측정
+# -----------------------------------------------------------------------------
+def measure(func, setup=None):
+    """ TIME_BUDGET 동안(최소 MIN_RUNS 회) 반복 실행. 반환값: {median_ms, min_ms, runs} """
+    timings = []
+    deadline = time.perf_counter() + TIME_BUDGET
+    while len(timings) < MIN_RUNS or time.perf_counter() < deadline:
+        if setup: setup()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': round(statistics.median(timings), 4), 'min_ms': round(min(timings), 4), 'runs': len(timings)}
+
+def model_benchmarks():
+    """ DB 크기와 무관한 모델 계산 """
+    rng = np.random.default_rng(1)
+    team_df = synthetic_team(rng, 'LAL')
+    roster = team_df[team_df['availability'] != 'Out'].copy()
+    roster['unit_value'] = roster['pie'].apply(calculate_individual_uv)
+    roster['contribution'] = roster['unit_value'] * roster['min']
+    slate = pd.concat([synthetic_team(rng, t).assign(team=t) for t in TEAM_ABBRS], ignore_index=True)
+    home = set(TEAM_ABBRS[::2])
+
+    return {
+        'calculate_team_power': measure(lambda: calculate_team_power(team_df, True)),
+        'select_best_lineup': measure(lambda: select_best_lineup(roster)),
+        'score_teams_slate': measure(lambda: score_teams(slate, home)),
+    }
+
+def matching_benchmarks():
+    """ 부상자 이름 -> 선수 ID (get_team_stats_df / mark_availability 경로) """
+    roster = pd.DataFrame({
+        'player_id': np.arange(15),
+        'player_name': ["LeBron James", "Luka Dončić", "Austin Reaves", "Rui Hachimura", "Deandre Ayton",
+                        "Marcus Smart", "Jaxson Hayes", "Gabe Vincent", "Jarred Vanderbilt", "Dalton Knecht",
+                        "Maxi Kleber", "Bronny James", "Jake LaRavia", "Adou Thiero", "Nick Smith Jr."],
+    })
+    injured = ["Luka Doncic", "Austin Reaves", "Nick Smith", "Jarred Vanderbilt Jr.", "Maxi Klebber"]
+
+    def cold():
+        player_ids._aliases = {}
+    def warm():
+        player_ids._aliases = None
+
+    resolve = lambda: player_ids.resolve_player_ids(injured, roster)
+    results = {'resolve_player_ids_fuzzy': measure(resolve, setup=cold)}
+    resolve()
+    results['resolve_player_ids_cached'] = measure(resolve)
+    warm()
+    return results
+
+def db_benchmarks(size):
+    """ 합성 DB 위에서 저장/대시보드/채점/백테스트 """
+    ensure_db(size)
+    conn = database.get_connection()
+    rng = np.random.default_rng(2)
+    results = {}
+
+    # 저장: 슬레이트 1회분 (30팀 x 13명)
+    slate = pd.concat([synthetic_team(rng, t).assign(team=t) for t in TEAM_ABBRS], ignore_index=True)
+    results['save_daily_stats'] = measure(lambda: database.save_daily_stats(slate, '2099-01-01', replace=True))
+    with database.transaction() as c:
+        c.execute("DELETE FROM daily_stats WHERE date = '2099-01-01'")
+
+    # 대시보드: 캐시 없이 전체 렌더
+    results['dashboard_render'] = dashboard_benchmark()
+
+    # 채점: 가장 최근 채점일 하루치 (같은 결과로 재채점 -> DB 내용은 그대로)
+    graded_date = conn.execute("SELECT MAX(date) FROM daily_accuracy WHERE graded_games > 0").fetchone()[0]
+    rows = conn.execute("SELECT rowid, home_team, visit_team, predicted_winner, actual_winner FROM predictions WHERE date = ?", (graded_date,)).fetchall()
+    actual = {}
+    for _, home, visit, _, winner in rows:
+        actual[f"{visit}vs{home}"] = winner
+        actual[f"{home}vs{visit}"] = winner
+
+    def grade_check_results():
+        updates = check_results.grade_rows(rows, actual)[0]
+        with database.transaction() as c:
+            c.executemany("UPDATE predictions SET actual_winner = ?, is_correct = ? WHERE rowid = ?", updates)
+            database.refresh_daily_accuracy(c, [graded_date])
+    results['check_results_grade_day'] = measure(grade_check_results)
+
+    api_results = {f"{visit}vs{home}": {'status_text': 'POSTPONED' if winner == 'Postponed' else 'FINAL',
+                                        'winner': None if winner == 'Postponed' else winner}
+                   for _, home, visit, _, winner in rows}
+    db_rows = [(r[0], r[1], r[2], r[3]) for r in rows]
+
+    def grade_refresh_results():
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                updates = refresh_results.grade_rows(db_rows, api_results)
+            finally:
+                sys.stdout = stdout
+        with database.transaction() as c:
+            c.executemany("UPDATE predictions SET actual_winner = ?, is_correct = ? WHERE rowid = ?", updates)
+            database.refresh_daily_accuracy(c, [graded_date])
+    results['refresh_results_grade_day'] = measure(grade_refresh_results)
+
+    all_dates = [r[0] for r in conn.execute("SELECT DISTINCT date FROM predictions")]
+    def rebuild_summary():
+        with database.transaction() as c:
+            database.refresh_daily_accuracy(c, all_dates)
+    results['refresh_daily_accuracy_full'] = measure(rebuild_summary)
+
+    results['backtest_full'] = measure(lambda: backtest.run_backtest(workers=1))
+
+    # 스냅샷 로드: 최근 1시즌 (SQLite daily_stats vs Arrow 메모리 맵)
+    season_start = database.season_of(conn.execute("SELECT MAX(date) FROM daily_stats").fetchone()[0])[:4]
+    season_range = (f"{season_start}-07-01", f"{int(season_start) + 1}-06-30")
+    results['snapshot_load_season_db'] = measure(lambda: backtest.load_snapshots(*season_range))
+    if snapshot_store.AVAILABLE:
+        ensure_snapshots(size)
+        results['snapshot_load_season_arrow'] = measure(lambda: backtest.load_snapshots(*season_range, source='arrow'))
+    return results
+
+def dashboard_benchmark():
+    """ dashboard.py 1회 실행 (st.cache_data 비운 상태) """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    def render():
+        at = AppTest.from_file(os.path.join(BASE_DIR, "dashboard.py"), default_timeout=120).run()
+        if at.exception: raise RuntimeError(at.exception[0].message)
+    return measure(render, setup=st.cache_data.clear)
+
+def run_process(args, env=None):
+    """ 새 파이썬 프로세스 1회 실행. 반환값: (경과 ms, 완료 프로세스) """
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable] + args, cwd=BASE_DIR, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})})
+    elapsed = (time.perf_counter() - started) * 1000
+    if proc.returncode: raise RuntimeError(f"{' '.join(args)} 실패: {proc.stderr.strip()[-300:]}")
+    return elapsed, proc
+
+def import_time_ms(module):
+    """ -X importtime 출력에서 모듈의 누적 import 시간 (ms) """
+    _, proc = run_process(['-X', 'importtime', '-c', f'import {module}'])
+    for line in proc.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module: return int(parts[1]) / 1000
+    raise RuntimeError(f"{module} import 시간을 찾을 수 없습니다.")
+
+def summarize(values):
+    return {'median_ms': round(statistics.median(values), 4), 'min_ms': round(min(values), 4), 'runs': len(values)}
+
+def startup_benchmarks():
+    """ 엔트리 포인트 import 시간 + 조기 종료 실행 전체 시간 (매번 새 프로세스) """
+    empty_db = os.path.join(DATA_DIR, "startup_empty.db")  # 스키마만 있는 DB (예측 없음 경로)
+    outbox = os.path.join(DATA_DIR, "startup_outbox.db")
+    exits = {
+        'python': (['-c', 'pass'], None),  # 인터프리터 기동 자체 (비교 기준)
+        'check_results_no_db': (['check_results.py'], {'NBA_DB_PATH': os.path.join(DATA_DIR, "missing.db")}),
+        'check_results_no_predictions': (['check_results.py', '--date', '1900-01-01'], {'NBA_DB_PATH': empty_db}),
+        'run_nba_help': (['run_nba.py', '--help'], None),
+        'slack_outbox_status': (['slack_outbox.py', '--status'], {'NBA_OUTBOX_PATH': outbox}),
+    }
+
+    results = {}
+    for module in ENTRY_POINTS:
+        results[f"import_{module}"] = summarize([import_time_ms(module) for _ in range(STARTUP_RUNS)])
+    for name, (args, env) in exits.items():
+        results[f"exit_{name}"] = summarize([run_process(args, env)[0] for _ in range(STARTUP_RUNS)])
+    return results
+
+def over_budget(results):
+    """ 조기 종료 실행 중 STARTUP_BUDGET_MS를 넘은 항목 """
+    return [name for name, value in results.items()
+            if name.startswith('startup/exit_') and value['min_ms'] > STARTUP_BUDGET_MS]
+
+# -----------------------------------------------------------------------------
+# 4. 결과 저장 / 기준 비교
+# -----------------------------------------------------------------------------
+def compare(results, baseline):
+    """ 기준 대비 배율 출력 (잡음이 적은 최소 시간 기준). 반환값: 회귀 항목 목록 """
+    regressions = []
+    print(f"\n{'항목':<48} {'현재 최소(ms)':>14} {'기준 최소(ms)':>14} {'배율':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<48} {current['min_ms']:>14.3f} {'-':>14} {'-':>8}")
+            continue
+        ratio = current['min_ms'] / base['min_ms'] if base['min_ms'] else float('inf')
+        flag = " ⚠️" if ratio >= REGRESSION_RATIO else ""
+        print(f"{name:<48} {current['min_ms']:>14.3f} {base['min_ms']:>14.3f} {ratio:>7.2f}x{flag}")
+        if flag: regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 DB 위에서 핫패스 성능을 측정합니다.")
+    parser.add_argument("--sizes", nargs="+", default=['season', 'decade'], choices=list(SIZES))
+    parser.add_argument("--output", default=RESULTS_PATH, help="결과 JSON 경로")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="비교할 기준 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준 파일로 저장")
+    parser.add_argument("--startup-only", action="store_true", help="기동(import / 조기 종료) 시간만 측정")
+    args = parser.parse_args()
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    print("⏱️ 벤치마크 시작...")
+    results = {}
+    print("🚀 [startup] 기동 시간 측정 중...")
+    for name, value in startup_benchmarks().items(): results[f"startup/{name}"] = value
+    if not args.startup_only:
+        for name, value in model_benchmarks().items(): results[f"model/{name}"] = value
+        for name, value in matching_benchmarks().items(): results[f"matching/{name}"] = value
+        for size in args.sizes:
+            print(f"📦 [{size}] 측정 중...")
+            for name, value in db_benchmarks(size).items(): results[f"{size}/{name}"] = value
+    database.close_connection()
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sqlite': sqlite3.sqlite_version,
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sizes': [] if args.startup_only else args.sizes,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 결과 저장: {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f).get('results', {}))
+    else:
+        compare(results, {})
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📌 기준 파일 저장: {args.baseline}")
+
+    slow_starts = over_budget(results)
+    if slow_starts:
+        print(f"\n❌ 조기 종료 실행이 {STARTUP_BUDGET_MS}ms를 넘은 항목 {len(slow_starts)}개: {', '.join(slow_starts)}")
+    if regressions:
+        print(f"\n❌ 기준 대비 {REGRESSION_RATIO}배 이상 느려진 항목 {len(regressions)}개: {', '.join(regressions)}")
+    if regressions or slow_starts:
+        sys.exit(1)
+    print("\n✅ 벤치마크 완료")
+
+if __name__ == "__main__":
+    main()
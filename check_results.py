@@ -2,22 +2,42 @@
 ================================================================================
 [파일명: check_results.py] - 취소 경기(Postponed) 완벽 대응 및 리포트 버전
 ================================================================================
+[실행 옵션]
+- (기본)     : 미국 기준 어제 경기를 한 번 채점하고 슬랙 성적표 전송
+- --watch    : 오늘 밤 경기를 계속 확인하며 종료된 경기부터 바로 채점 (대시보드 실시간 반영)
+               4쿼터/연장 경기가 있으면 짧게, 진행 중 경기가 없으면 점점 길게 기다리고,
+               모든 경기가 종료/취소되면 끝납니다. (슬랙 성적표는 기본 실행이 담당)
+               스코어보드에 아예 없는 예측 경기(날짜 변경)는 'Postponed'로 처리합니다.
+- --date     : 채점 날짜 지정 (YYYY-MM-DD)
+- --no-cache : API 응답 캐시 읽기를 건너뜀
+================================================================================
 """
-import sqlite3
-import requests
-import pandas as pd
-import config
+import argparse
 import os
+import time
+import api_cache
+import database
+import metrics
+import slack_outbox
 from datetime import datetime, timedelta
-from nba_api.stats.endpoints import scoreboardv2
+
+# pandas / nba_api는 스코어보드를 받을 때 불러옵니다. (DB 없음 / 예측 없음 같은 조기 종료는 import 비용 없이 끝남)
 
 # -----------------------------------------------------------------------------
 # 1. 설정 (웅쓰님 환경 유지)
 # -----------------------------------------------------------------------------
-BASE_DIR = "/Users/kimwoongsub/Desktop/nba_test"
-DB_PATH = os.path.join(BASE_DIR, "nba_data.db")
+# DB 경로는 database.py 공용 설정을 따릅니다. (다른 위치는 NBA_DB_PATH 환경변수로 지정)
+DB_PATH = database.DB_PATH
 DASHBOARD_URL = "https://nba-uv-prediction-dashboard-6ahdkhmixcsa3uybaz6ez6.streamlit.app/"
 
+# --watch 폴링 간격 (초)
+POLL_CLOSING = 20      # 4쿼터/연장 진행 중인 경기가 있을 때
+POLL_LIVE = 60         # 진행 중인 경기가 있을 때
+POLL_IDLE = 120        # 진행 중인 경기가 없을 때 시작 간격 (확인할 때마다 2배)
+POLL_IDLE_MAX = 900    # 대기 간격 상한
+WATCH_MAX_HOURS = 10   # 이 시간이 지나면 남은 경기가 있어도 종료 (다음 날 기본 실행이 마무리)
+WATCH_MAX_FAILURES = 30  # 스코어보드 조회가 연속으로 이만큼 실패하면 종료 (약 30분)
+
 # 팀 ID -> 약어 매핑
 TEAMS = {
     '1610612737': 'ATL', '1610612738': 'BOS', '1610612751': 'BKN', '1610612766': 'CHA',
@@ -30,57 +50,10 @@ TEAMS = {
     '1610612762': 'UTA', '1610612764': 'WAS'
 }
 
-def send_to_slack(text):
-    try:
-        token = config.SLACK_BOT_TOKEN
-        # 모드에 따른 채널 선택
-        if config.MODE == "REAL":
-            channel_id = config.SLACK_REAL_CHANNEL_ID
-        else:
-            channel_id = config.SLACK_TEST_CHANNEL_ID
-
-        url = "https://slack.com/api/chat.postMessage"
-        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-        data = {"channel": channel_id, "text": text}
-        requests.post(url, headers=headers, json=data)
-        print("✅ 슬랙 전송 완료!")
-    except Exception as e:
-        print(f"❌ 슬랙 에러: {e}")
-
-def main():
-    print("🕵️‍♂️ 경기 결과 확인 및 채점 시작...")
-    
-    if not os.path.exists(DB_PATH):
-        print(f"❌ 에러: DB 파일을 찾을 수 없습니다.\n경로: {DB_PATH}")
-        return
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # 채점 대상 날짜 (미국 기준 어제)
-    target_date_us = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-    print(f"📅 채점 대상 날짜 (US): {target_date_us}")
-    
-    # [중요] 웅쓰님 DB 컬럼명 사용 (visit_team, predicted_winner)
-    cursor.execute("SELECT rowid, home_team, visit_team, predicted_winner, actual_winner FROM predictions WHERE date = ?", (target_date_us,))
-    rows = cursor.fetchall()
-    
-    if not rows:
-        print(f"❌ {target_date_us} 날짜에 저장된 예측 데이터가 없습니다.")
-        conn.close()
-        return
-
-    # NBA 공식 데이터 가져오기
-    try:
-        board_v2 = scoreboardv2.ScoreboardV2(game_date=target_date_us)
-        header_df = board_v2.game_header.get_data_frame()
-        line_df = board_v2.line_score.get_data_frame()
-    except Exception as e:
-        print(f"❌ NBA 서버 접속 실패: {e}")
-        conn.close()
-        return
-
-    # 결과 매핑 딕셔너리
+def parse_results(header_df, line_df, final_only=False):
+    """ 스코어보드 -> {"VISITvsHOME": 승자 약어 또는 "Postponed"} (양방향 키)
+    final_only=True 이면 종료(GAME_STATUS_ID 3)된 경기만 승자로 봅니다. (진행 중 경기는 라이브 점수가 있음) """
+    import pandas as pd
     actual_results = {}
     
     # 1. 경기 취소/진행 상태 확인
@@ -102,10 +75,11 @@ def main():
                 actual_results[key2] = "Postponed"
 
     # 2. 종료된 경기 승자 확인 (점수 비교)
+    if final_only and not line_df.empty:
+        final_ids = header_df.loc[header_df['GAME_STATUS_ID'] == 3, 'GAME_ID'] if not header_df.empty else []
+        line_df = line_df[line_df['GAME_ID'].isin(final_ids)]
     if not line_df.empty:
-        game_ids = line_df['GAME_ID'].unique()
-        for gid in game_ids:
-            g_data = line_df[line_df['GAME_ID'] == gid]
+        for gid, g_data in line_df.groupby('GAME_ID', sort=False):  # 경기별 한 번에 분할
             if len(g_data) < 2: continue
             
             team_a = g_data.iloc[0]
@@ -125,10 +99,16 @@ def main():
             actual_results[f"{abbr_a}vs{abbr_b}"] = winner
             actual_results[f"{abbr_b}vs{abbr_a}"] = winner
 
+    return actual_results
+
+def grade_rows(rows, actual_results):
+    """ DB 예측 행과 실제 결과를 대조합니다.
+    반환값: (업데이트 목록 [(actual_winner, is_correct, rowid)], 메시지 줄 목록, 적중 수, 유효 경기 수) """
     # 3. 채점 및 메시지 작성
     correct_count = 0
     total_valid_games = 0  # 취소되지 않은 경기 수
     results_msg = []
+    updates = []
     
     for row in rows:
         r_id = row[0]
@@ -148,7 +128,7 @@ def main():
             results_msg.append("-" * 30)
             
             # DB 상태 업데이트 (확실하게 하기 위해)
-            cursor.execute("UPDATE predictions SET actual_winner = 'Postponed', is_correct = NULL WHERE rowid = ?", (r_id,))
+            updates.append(('Postponed', None, r_id))
             
         # [Case B] 경기 종료 (승자가 나온 경우)
         elif current_status:
@@ -156,7 +136,7 @@ def main():
             if is_correct: correct_count += 1
             total_valid_games += 1
             
-            cursor.execute("UPDATE predictions SET actual_winner = ?, is_correct = ? WHERE rowid = ?", (current_status, is_correct, r_id))
+            updates.append((current_status, is_correct, r_id))
             
             icon = "✅" if is_correct else "❌"
             results_msg.append(f"{icon} {v_team} vs {h_team}\n   (AI: {pred} / 결과: {current_status})")
@@ -166,17 +146,28 @@ def main():
         else:
             results_msg.append(f"⏳ {v_team} vs {h_team} 경기 진행 중...")
             
-    conn.commit()
-    conn.close()
-    
-    # 4. 슬랙 리포트 발송
+    return updates, results_msg, correct_count, total_valid_games
+
+def fetch_scoreboard(target_date, refresh=False):
+    """ 반환값: (GameHeader df, LineScore df) """
+    with metrics.span('schedule_fetch'):
+        board_v2 = api_cache.fetch_datasets('ScoreboardV2', refresh=refresh, game_date=target_date)
+    return board_v2['GameHeader'], board_v2['LineScore']
+
+def apply_updates(target_date, updates):
+    with metrics.span('db_write'), database.transaction() as conn:
+        conn.executemany("UPDATE predictions SET actual_winner = ?, is_correct = ? WHERE rowid = ?", updates)
+        database.refresh_daily_accuracy(conn, [target_date])
+
+def build_report(target_date, rows, results_msg, correct_count, total_valid_games):
+    """ 슬랙 성적표 문자열 """
     if total_valid_games > 0:
         acc = (correct_count / total_valid_games) * 100
-        header = f"📊 *NBA AI 예측 성적표* ({target_date_us})\n"
+        header = f"📊 *NBA AI 예측 성적표* ({target_date})\n"
         header += f"현재 적중률: *{acc:.1f}%* ({correct_count}/{total_valid_games})\n"
         header += "(취소된 경기는 통계에서 제외됨)\n"
     else:
-        header = f"📊 *NBA AI 예측 성적표* ({target_date_us})\n"
+        header = f"📊 *NBA AI 예측 성적표* ({target_date})\n"
         if len(rows) > 0 and len(results_msg) > 0:
              header += "모든 경기가 취소되었거나 진행 중입니다.\n"
         else:
@@ -188,8 +179,135 @@ def main():
     slack_text += "\n================================\n"
     slack_text += "※ 상세 데이터 및 그래프:\n"
     slack_text += f"👉 {DASHBOARD_URL}"
+    return slack_text
+
+def load_rows(target_date):
+    # [중요] 웅쓰님 DB 컬럼명 사용 (visit_team, predicted_winner)
+    conn = database.get_connection()
+    return conn.execute("SELECT rowid, home_team, visit_team, predicted_winner, actual_winner FROM predictions WHERE date = ?", (target_date,)).fetchall()
+
+def main(target_date_us=None):
+    print("🕵️‍♂️ 경기 결과 확인 및 채점 시작...")
+    
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 에러: DB 파일을 찾을 수 없습니다.\n경로: {DB_PATH}")
+        return
+
+    # 채점 대상 날짜 (미국 기준 어제)
+    if target_date_us is None: target_date_us = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    print(f"📅 채점 대상 날짜 (US): {target_date_us}")
+    
+    rows = load_rows(target_date_us)
+    
+    if not rows:
+        print(f"❌ {target_date_us} 날짜에 저장된 예측 데이터가 없습니다.")
+        return
+
+    # NBA 공식 데이터 가져오기
+    try:
+        header_df, line_df = fetch_scoreboard(target_date_us)
+    except Exception as e:
+        print(f"❌ NBA 서버 접속 실패: {e}")
+        return
+
+    # 결과 매핑 + 채점
+    actual_results = parse_results(header_df, line_df)
+    updates, results_msg, correct_count, total_valid_games = grade_rows(rows, actual_results)
+
+    apply_updates(target_date_us, updates)
+    metrics.incr('graded_games', total_valid_games)
     
-    send_to_slack(slack_text)
+    # 4. 슬랙 리포트 발송
+    slack_outbox.send(build_report(target_date_us, rows, results_msg, correct_count, total_valid_games), source='check_results')
+
+# -----------------------------------------------------------------------------
+# 2. 라이브 채점 (--watch)
+# -----------------------------------------------------------------------------
+def next_interval(header_df, idle_interval):
+    """ 다음 확인까지 대기 시간. 반환값: (대기 초, 다음 idle 간격) """
+    import pandas as pd
+    live = header_df[header_df['GAME_STATUS_ID'] == 2] if not header_df.empty else header_df
+    if not live.empty:
+        closing = 'LIVE_PERIOD' in live and (pd.to_numeric(live['LIVE_PERIOD'], errors='coerce') >= 4).any()
+        return (POLL_CLOSING if closing else POLL_LIVE), POLL_IDLE
+    return idle_interval, min(idle_interval * 2, POLL_IDLE_MAX)
+
+def mark_missing_games(actual_results, rows, header_df):
+    """ 스코어보드(경기 목록이 있는 경우)에 아예 없는 예측 경기 -> 'Postponed'
+    (날짜 변경/증발, refresh_results.grade_rows의 Case C와 동일). 빈 스코어보드는 판단하지 않음 """
+    if header_df.empty: return actual_results
+    scheduled = {f"{TEAMS.get(str(v_id), 'Unknown')}vs{TEAMS.get(str(h_id), 'Unknown')}"
+                 for h_id, v_id in zip(header_df['HOME_TEAM_ID'], header_df['VISITOR_TEAM_ID'])}
+    for row in rows:
+        key = f"{row[2]}vs{row[1]}"
+        if key not in scheduled and key not in actual_results:
+            actual_results[key] = "Postponed"
+    return actual_results
+
+def watch(target_date_us=None):
+    """ 오늘 밤 슬레이트를 폴링하며 결과가 바뀐 경기만 채점합니다. 모든 경기가 끝나면 종료 """
+    if target_date_us is None: target_date_us = (datetime.now() - timedelta(hours=14)).strftime("%Y-%m-%d")
+    print(f"👀 라이브 채점 시작 (US): {target_date_us}")
+
+    rows = load_rows(target_date_us)
+    if not rows:
+        print(f"❌ {target_date_us} 날짜에 저장된 예측 데이터가 없습니다.")
+        return
+
+    previous = {}  # 직전 확인 결과 {"VISITvsHOME": 승자 / "Postponed"}
+    idle_interval = POLL_IDLE
+    deadline = time.monotonic() + WATCH_MAX_HOURS * 3600
+    failures = 0
+    while True:
+        try:
+            header_df, line_df = fetch_scoreboard(target_date_us, refresh=True)
+        except Exception as e:
+            failures += 1
+            if failures >= WATCH_MAX_FAILURES or time.monotonic() >= deadline:
+                print(f"❌ 스코어보드 조회 실패 ({failures}회 연속): {e} -> 라이브 채점 종료 (남은 경기는 기본 실행에서 채점합니다.)")
+                return
+            print(f"⚠️ 스코어보드 조회 실패 ({failures}/{WATCH_MAX_FAILURES}): {e} -> {POLL_LIVE}초 후 재시도")
+            time.sleep(POLL_LIVE)
+            continue
+        failures = 0
+        metrics.incr('polls')
+
+        # 직전 확인과 달라진 경기만 채점
+        current = mark_missing_games(parse_results(header_df, line_df, final_only=True), rows, header_df)
+        changed_rows = [row for row in rows if current.get(f"{row[2]}vs{row[1]}") != previous.get(f"{row[2]}vs{row[1]}")]
+        if changed_rows:
+            updates, results_msg, _, graded = grade_rows(changed_rows, current)
+            if updates:
+                apply_updates(target_date_us, updates)
+                metrics.incr('graded_games', graded)
+                print(f"🕒 {datetime.now().strftime('%H:%M:%S')} 결과 반영 {len(updates)}건")
+                for line in results_msg:
+                    if not line.startswith("-"): print(f"   {line}")
+        previous = current
+
+        pending = [row for row in rows if row[4] != 'Postponed' and f"{row[2]}vs{row[1]}" not in current]
+        if not pending:
+            print("🏁 모든 경기 종료/취소 -> 라이브 채점 종료")
+            return
+        if time.monotonic() >= deadline:
+            print(f"⌛ {WATCH_MAX_HOURS}시간 경과 -> 남은 {len(pending)}경기는 기본 실행에서 채점합니다.")
+            return
+
+        interval, idle_interval = next_interval(header_df, idle_interval)
+        print(f"⏳ 남은 경기 {len(pending)}개 -> {interval}초 후 다시 확인")
+        time.sleep(interval)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="예측 결과 채점")
+    parser.add_argument("--watch", action="store_true", help="오늘 밤 경기를 라이브로 채점")
+    parser.add_argument("--date", help="채점 날짜 (YYYY-MM-DD, 미국 기준)")
+    parser.add_argument("--no-cache", action="store_true", help="API 응답 캐시 읽기를 건너뜀")
+    args = parser.parse_args()
+
+    if args.no_cache: api_cache.BYPASS = True
+    try:
+        with metrics.span('total'):
+            if args.watch: watch(args.date)
+            else: main(args.date)
+    finally:
+        metrics.flush('check_results_watch' if args.watch else 'check_results')
\ No newline at end of file
@@ -1,8 +1,8 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 import altair as alt
 import os
+import database
 from datetime import datetime
 
 # -----------------------------------------------------------------------------
@@ -10,49 +10,87 @@ from datetime import datetime
 # -----------------------------------------------------------------------------
 st.set_page_config(page_title="NBA AI 승부 예측", page_icon="🏀", layout="wide")
 
-# 실행 경로와 관계없이 DB를 찾을 수 있도록 절대 경로 설정
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "nba_data.db")
-
-def load_data():
-    conn = sqlite3.connect(DB_PATH)
-    # 누적 번호 계산을 위해 날짜순(오름차순)으로 가져옴
-    query = "SELECT * FROM predictions ORDER BY date ASC, rowid ASC"
-    df = pd.read_sql(query, conn)
-    conn.close()
+# DB 경로/연결은 database.py 공용 접근 계층을 사용 (WAL 모드 -> 채점 중에도 읽기 가능)
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_dates(db_signature):
+    """ 상세 리포트 날짜 목록 (daily_accuracy = 예측이 있는 날짜 달력, 최신순) """
+    conn = database.get_connection()
+    rows = conn.execute("SELECT date FROM daily_accuracy ORDER BY date DESC").fetchall()
+    return [datetime.strptime(r[0], "%Y-%m-%d").date() for r in rows]
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_day(date, db_signature):
+    """ 선택한 날짜의 예측만 조회 (idx_predictions_date 사용)
+    - day_no: 취소 경기를 뺀 당일 순번 (윈도우 함수)
+    - total_no: 이전 날짜까지의 누계(valid_before) + day_no """
+    conn = database.get_connection()
+    query = """
+        WITH day AS (
+            SELECT p.*, p.rowid AS row_id, COALESCE(p.actual_winner, '') != 'Postponed' AS is_valid,
+                   SUM(COALESCE(p.actual_winner, '') != 'Postponed') OVER (ORDER BY p.rowid) AS valid_seq
+            FROM predictions p WHERE p.date = ?
+        )
+        SELECT day.*,
+               CASE WHEN is_valid THEN valid_seq END AS day_no,
+               CASE WHEN is_valid THEN COALESCE(a.valid_before, 0) + valid_seq END AS total_no
+        FROM day LEFT JOIN daily_accuracy a ON a.date = day.date
+        ORDER BY day.row_id
+    """
+    df = pd.read_sql(query, conn, params=(date,)).drop(columns=['row_id', 'is_valid', 'valid_seq'])
+    for col in ('day_no', 'total_no'):
+        df[col] = df[col].astype('Int64').astype(object).where(df[col].notna(), '취소')
     return df
 
-df = load_data()
+# 6단계 색상 로직 함수
+def get_bar_color(acc):
+    if acc >= 60: return '#A020F0'      # 보라 (신계)
+    elif acc >= 55: return '#FF0000'    # 빨강 (초고수/AI)
+    elif acc >= 52.4: return '#FFA500'  # 주황 (프로/고수)
+    elif acc >= 45: return '#1E90FF'    # 파랑 (노력하는 일반인)
+    elif acc >= 35: return '#008000'    # 녹색 (지극히 정상인)
+    else: return '#808080'             # 회색 (예측 금지)
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_summary(db_signature):
+    """ 채점 시 함께 갱신되는 요약 테이블만 읽습니다. (원본 전체 집계 없음)
+    db_signature(DB 파일 변경 표식)가 바뀔 때만 다시 조회하며, 모든 세션이 공유합니다. """
+    conn = database.get_connection()
+    totals = pd.read_sql("SELECT * FROM season_totals ORDER BY season ASC", conn)
+
+    # 최근 7일 (결과가 기록된 날짜만)
+    daily_stats = pd.read_sql("""
+        SELECT date, graded_games AS total_games, correct_games FROM daily_accuracy
+        WHERE graded_games > 0 ORDER BY date DESC LIMIT 7
+    """, conn).sort_values('date', ascending=True)
+    if not daily_stats.empty:
+        daily_stats['accuracy'] = (daily_stats['correct_games'] / daily_stats['total_games']) * 100
+        daily_stats['bar_color'] = daily_stats['accuracy'].apply(get_bar_color)
+        
+        # [수정] 모바일 겹침 방지를 위해 예측 성공 숫자만 노출 (예: 6/7)
+        daily_stats['label_text'] = daily_stats.apply(
+            lambda x: f"{int(x['correct_games'])}/{int(x['total_games'])}", 
+            axis=1
+        )
+    return totals, daily_stats
+
+database.get_connection()  # 마이그레이션을 먼저 적용한 뒤 변경 표식 계산
+signature = database.db_signature()
+totals, daily_stats = load_summary(signature)
+unique_dates = load_dates(signature)
 
 # 제목
 st.title("🏀 NBA AI 승부예측(by WUV predictor)")
 
-if df.empty:
+if not unique_dates:
     st.warning("아직 데이터가 없습니다. run_nba.py를 실행해주세요.")
     st.stop()
 
-# -----------------------------------------------------------------------------
-# [로직 수정] 적중률 계산 및 넘버링 필터링
-# -----------------------------------------------------------------------------
-# 1. 취소 경기 제외 넘버링
-df['total_no'] = None
-valid_mask = df['actual_winner'] != 'Postponed'
-df.loc[valid_mask, 'total_no'] = range(1, len(df[valid_mask]) + 1)
-df['total_no'] = df['total_no'].fillna('취소')
-
-# 2. 통계용 데이터: 취소된 경기도 아니고, 실제 결과(actual_winner)가 기록된 경기만!
-stats_df = df[
-    (df['actual_winner'] != 'Postponed') & 
-    (df['actual_winner'].notna()) & 
-    (df['actual_winner'] != '')
-].copy()
-
 # -----------------------------------------------------------------------------
 # 1. [상단] 누적 예측 성적표 & 100경기 트래킹
 # -----------------------------------------------------------------------------
 st.header("📊 누적 예측 성적표")
-total_stats = len(stats_df)
-correct_total = stats_df['is_correct'].sum()
+total_stats = int(totals['graded_games'].sum())
+correct_total = totals['correct_games'].sum()
 
 col_acc, col_track = st.columns([2, 1])
 
@@ -81,34 +119,8 @@ st.markdown("---")
 # -----------------------------------------------------------------------------
 st.header("📈 일별 예측 성적표 (최근 7일)")
 
-if not stats_df.empty:
-    daily_stats = stats_df.groupby('date').agg(
-        total_games=('home_team', 'count'), 
-        correct_games=('is_correct', 'sum') 
-    ).reset_index()
-
-    daily_stats['accuracy'] = (daily_stats['correct_games'] / daily_stats['total_games']) * 100
-    
-    # 6단계 색상 로직 함수
-    def get_bar_color(acc):
-        if acc >= 60: return '#A020F0'      # 보라 (신계)
-        elif acc >= 55: return '#FF0000'    # 빨강 (초고수/AI)
-        elif acc >= 52.4: return '#FFA500'  # 주황 (프로/고수)
-        elif acc >= 45: return '#1E90FF'    # 파랑 (노력하는 일반인)
-        elif acc >= 35: return '#008000'    # 녹색 (지극히 정상인)
-        else: return '#808080'             # 회색 (예측 금지)
-
-    daily_stats['bar_color'] = daily_stats['accuracy'].apply(get_bar_color)
-    
-    # [수정] 모바일 겹침 방지를 위해 예측 성공 숫자만 노출 (예: 6/7)
-    daily_stats['label_text'] = daily_stats.apply(
-        lambda x: f"{int(x['correct_games'])}/{int(x['total_games'])}", 
-        axis=1
-    )
-
-    daily_stats_7d = daily_stats.sort_values('date', ascending=True).tail(7)
-
-    base = alt.Chart(daily_stats_7d).encode(x=alt.X('date', title='날짜(미국 현지)'))
+if not daily_stats.empty:
+    base = alt.Chart(daily_stats).encode(x=alt.X('date', title='날짜(미국 현지)'))
     bars = base.mark_bar().encode(
         y=alt.Y('accuracy', title='적중률(%)', scale=alt.Scale(domain=[0, 110])),
         color=alt.Color('bar_color', scale=None),
@@ -141,18 +153,10 @@ st.markdown("---")
 # -----------------------------------------------------------------------------
 st.header("📋 일별 상세 예측 리포트")
 
-df['date_dt'] = pd.to_datetime(df['date']).dt.date
-unique_dates = sorted(df['date_dt'].unique(), reverse=True)
-
 selected_date = st.date_input("확인하고 싶은 날짜를 선택하세요:", value=unique_dates[0])
-filtered_df = df[df['date_dt'] == selected_date].copy().reset_index(drop=True)
+filtered_df = load_day(selected_date.strftime("%Y-%m-%d"), signature)
 
 if not filtered_df.empty:
-    filtered_df['day_no'] = None
-    day_valid_mask = filtered_df['actual_winner'] != 'Postponed'
-    filtered_df.loc[day_valid_mask, 'day_no'] = range(1, len(filtered_df[day_valid_mask]) + 1)
-    filtered_df['day_no'] = filtered_df['day_no'].fillna('취소')
-
     day_stats_mask = (filtered_df['actual_winner'] != 'Postponed') & (filtered_df['actual_winner'].notna()) & (filtered_df['actual_winner'] != '')
     finished_games = filtered_df[day_stats_mask]
     finished_count = len(finished_games)
@@ -17,7 +17,14 @@
 
 [주요 함수]
 - init_db(): DB 파일과 테이블을 초기화합니다.
-- save_daily_stats(df): 데이터프레임을 받아 DB에 저장(Insert/Replace)합니다.
+- save_daily_stats(df, date, replace): 데이터프레임을 받아 DB에 저장(Insert/Replace)합니다.
+  (team 컬럼 포함 -> backtest.py가 날짜별 로스터 스냅샷으로 재사용)
+- replace_predictions(date, rows): 하루치 예측을 한 트랜잭션으로 교체합니다.
+- replace_predictions_many(slates): 여러 날짜 예측을 한 트랜잭션으로 교체합니다. (기간 모드)
+- load_player_aliases() / save_player_aliases(rows): 선수 이름 -> NBA ID 매핑 조회/저장
+- get_connection() / transaction(): 공용 연결 / 쓰기 트랜잭션
+- db_signature(): 캐시 무효화용 DB 변경 표식
+- refresh_daily_accuracy(conn, dates): 요약 테이블(daily_accuracy / season_totals) 갱신
 ================================================================================
 [변경사항]
 - 테이블에 'pos' (포지션) 컬럼 추가
@@ -27,86 +34,334 @@
 [업데이트]
 - predictions 테이블 추가: 아침에 AI가 예측한 내용을 저장해두는 공간
 ================================================================================
+[파일명: database.py] - 금고지기 V3.1 (선수 ID 인덱스)
+================================================================================
+[업데이트]
+- player_aliases 테이블 추가: ESPN 등에서 긁어온 표기 이름(정규화) -> NBA 선수 ID
+================================================================================
+[파일명: database.py] - 금고지기 V4.0 (공용 접근 계층)
+================================================================================
+[업데이트]
+- 모든 스크립트(run_nba / check_results / refresh_results / dashboard)가
+  이 모듈의 get_connection() 하나로 DB에 접근합니다. (프로세스당 연결 1개 재사용)
+- WAL 저널 모드: 대시보드 읽기가 밤사이 채점(쓰기) 작업에 막히지 않습니다.
+- PRAGMA 설정(synchronous / cache_size / mmap_size / busy_timeout)
+- PRAGMA user_version 기반 스키마 마이그레이션 + predictions(date) 인덱스
+- 쓰기는 transaction()으로 묶어서 한 번에 커밋합니다.
+- NBA_DB_PATH 환경변수로 DB 경로를 바꿀 수 있습니다.
+================================================================================
 """
 import sqlite3
-import pandas as pd
+import threading
 import os
+from contextlib import contextmanager
 from datetime import datetime
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "nba_data.db")
+DB_PATH = os.environ.get("NBA_DB_PATH", os.path.join(BASE_DIR, "nba_data.db"))
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",        # 읽기/쓰기 동시 진행
+    "PRAGMA synchronous=NORMAL",      # WAL에서는 NORMAL로도 커밋 내구성 충분
+    "PRAGMA cache_size=-16000",       # 페이지 캐시 약 16MB
+    "PRAGMA mmap_size=67108864",      # 64MB 메모리 매핑 읽기
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=10000",      # 다른 프로세스가 쓰는 중이면 최대 10초 대기
+]
+
+# -----------------------------------------------------------------------------
+# 스키마 마이그레이션 (PRAGMA user_version 순서대로 1회씩 적용)
+# -----------------------------------------------------------------------------
+MIGRATIONS = [
+    # v1: 기본 테이블 (선수 스탯 / 승부 예측 / 선수 이름 인덱스 / 동기화 상태)
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            date TEXT,
+            player_name TEXT,
+            availability TEXT,
+            pos TEXT,
+            min REAL,
+            pie REAL,
+            off_rating REAL,
+            def_rating REAL,
+            usg_pct REAL,
+            ts_pct REAL,
+            note TEXT,
+            PRIMARY KEY (date, player_name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS predictions (
+            game_id TEXT PRIMARY KEY,
+            date TEXT,
+            home_team TEXT,
+            visit_team TEXT,
+            predicted_winner TEXT,
+            predicted_gap REAL,
+            actual_winner TEXT,
+            is_correct INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS player_aliases (
+            alias TEXT PRIMARY KEY,
+            player_id INTEGER,
+            player_name TEXT,
+            match_score INTEGER,
+            updated_at TEXT
+        )
+        ''',
+        "CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)",
+    ],
+    # v2: 날짜 조회용 인덱스
+    #     (daily_stats(date, player_name)은 PRIMARY KEY 자동 인덱스가 이미 담당)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_predictions_date ON predictions(date)",
+    ],
+    # v3: 대시보드용 요약 테이블 (채점 트랜잭션 안에서 함께 갱신) + 기존 기록 백필
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_accuracy (
+            date TEXT PRIMARY KEY,
+            season TEXT,
+            total_games INTEGER,     -- 해당일 전체 예측 수 (취소 포함)
+            valid_games INTEGER,     -- 취소(Postponed) 제외 경기 수
+            graded_games INTEGER,    -- 결과가 기록된 경기 수 (통계 대상)
+            correct_games INTEGER,   -- 적중 경기 수
+            valid_before INTEGER     -- 이전 날짜까지의 valid_games 누계 (통산 넘버링 시작점)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS season_totals (
+            season TEXT PRIMARY KEY,
+            total_games INTEGER,
+            valid_games INTEGER,
+            graded_games INTEGER,
+            correct_games INTEGER
+        )
+        ''',
+        lambda conn: refresh_daily_accuracy(conn, [r[0] for r in conn.execute("SELECT DISTINCT date FROM predictions")]),
+    ],
+    # v4: 백테스트용 스냅샷 -> daily_stats에 소속 팀 기록 (기존 행은 NULL)
+    [
+        "ALTER TABLE daily_stats ADD COLUMN team TEXT",
+    ],
+]
+
+_conn = None
+_conn_lock = threading.Lock()
+_write_lock = threading.RLock()
+
+def get_connection():
+    """ 프로세스 공용 연결 (최초 호출 시 PRAGMA 설정 + 마이그레이션 적용) """
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None, timeout=10)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            migrate(conn)
+            _conn = conn
+    return _conn
+
+def close_connection():
+    global _conn
+    with _conn_lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+@contextmanager
+def transaction():
+    """ 쓰기 트랜잭션. 블록이 끝나면 커밋, 예외가 나면 전부 롤백합니다.
+    with database.transaction() as conn:
+        conn.execute(...) """
+    conn = get_connection()
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, statements in enumerate(MIGRATIONS, start=1):
+        if target <= version: continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql in statements:
+                if callable(sql): sql(conn)
+                else: conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {target}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
 
 def init_db():
     print(f"📁 DB 경로 확인: {DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # 1. 선수 스탯 테이블 (기존)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS daily_stats (
-        date TEXT,
-        player_name TEXT,
-        availability TEXT,
-        pos TEXT,          
-        min REAL,          
-        pie REAL,
-        off_rating REAL,
-        def_rating REAL,
-        usg_pct REAL,
-        ts_pct REAL,
-        note TEXT,
-        PRIMARY KEY (date, player_name)
-    )
-    ''')
-    
-    # 2. [NEW] 승부 예측 저장 테이블
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS predictions (
-        game_id TEXT PRIMARY KEY,
-        date TEXT,
-        home_team TEXT,
-        visit_team TEXT,
-        predicted_winner TEXT,
-        predicted_gap REAL,
-        actual_winner TEXT,
-        is_correct INTEGER
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
-    print("✅ DB 테이블 준비 완료 (Schema: Stats + Predictions).")
-
-def save_daily_stats(df):
-    if df.empty: return
-    conn = sqlite3.connect(DB_PATH)
-    today = datetime.now().strftime("%Y-%m-%d")
-    cursor = conn.cursor()
-    
-    for _, row in df.iterrows():
+    conn = get_connection()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    print(f"✅ DB 테이블 준비 완료 (Schema v{version}: Stats + Predictions + Aliases).")
+
+def season_of(date):
+    """ '2026-01-19' -> '2025-26' (7월 이후는 다음 시즌 시작) """
+    year, month = int(date[:4]), int(date[5:7])
+    start = year if month >= 7 else year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+def refresh_daily_accuracy(conn, dates):
+    """ 바뀐 날짜의 daily_accuracy 행과 해당 시즌 season_totals를 다시 계산합니다.
+    채점/저장과 같은 transaction() 안에서 호출해야 요약과 원본이 항상 일치합니다. """
+    dates = sorted({d for d in dates if d})
+    if not dates: return
+
+    for date in dates:
+        total, valid, graded, correct = conn.execute("""
+            SELECT COUNT(*),
+                   COALESCE(SUM(COALESCE(actual_winner, '') != 'Postponed'), 0),
+                   COALESCE(SUM(actual_winner IS NOT NULL AND actual_winner NOT IN ('', 'Postponed')), 0),
+                   COALESCE(SUM(CASE WHEN actual_winner IS NOT NULL AND actual_winner NOT IN ('', 'Postponed')
+                                     THEN is_correct ELSE 0 END), 0)
+            FROM predictions WHERE date = ?
+        """, (date,)).fetchone()
+        if total == 0:
+            conn.execute("DELETE FROM daily_accuracy WHERE date = ?", (date,))
+            continue
+        conn.execute("""
+            INSERT OR REPLACE INTO daily_accuracy
+            (date, season, total_games, valid_games, graded_games, correct_games, valid_before)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        """, (date, season_of(date), total, valid, graded, correct))
+
+    # 바뀐 날짜 이후의 통산 넘버링 시작점 재계산
+    conn.execute("""
+        UPDATE daily_accuracy SET valid_before = running.valid_before
+        FROM (
+            SELECT date, COALESCE(SUM(valid_games) OVER (ORDER BY date ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS valid_before
+            FROM daily_accuracy
+        ) AS running
+        WHERE daily_accuracy.date = running.date AND daily_accuracy.date >= ?
+    """, (dates[0],))
+
+    for season in sorted({season_of(d) for d in dates}):
+        conn.execute("DELETE FROM season_totals WHERE season = ?", (season,))
+        conn.execute("""
+            INSERT INTO season_totals (season, total_games, valid_games, graded_games, correct_games)
+            SELECT season, SUM(total_games), SUM(valid_games), SUM(graded_games), SUM(correct_games)
+            FROM daily_accuracy WHERE season = ? GROUP BY season
+        """, (season,))
+
+def db_signature():
+    """ DB 변경 여부를 싸게 판별하는 표식 (본 파일 + WAL 파일의 수정 시각/크기).
+    커밋이 일어나면 WAL 파일(또는 체크포인트 후 본 파일)이 바뀌므로 값이 달라집니다. """
+    signature = []
+    for path in (DB_PATH, DB_PATH + "-wal"):
         try:
-            cursor.execute('''
-            INSERT OR REPLACE INTO daily_stats 
-            (date, player_name, availability, pos, min, pie, off_rating, def_rating, usg_pct, ts_pct, note)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (today, row['PLAYER_NAME'], row['AVAILABILITY'], row['POS'], row['MIN'], 
-                  row['PIE'], row['OFF_RATING'], row['DEF_RATING'], row['USG_PCT'], row['TS_PCT'], row['NOTE']))
-        except: pass
-    conn.commit()
-    conn.close()
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+def get_state(key, default=None):
+    row = get_connection().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+def set_state(conn, key, value):
+    """ transaction() 안에서 호출합니다. """
+    conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+DAILY_STATS_COLUMNS = ['player_name', 'availability', 'pos', 'min', 'pie',
+                       'off_rating', 'def_rating', 'usg_pct', 'ts_pct', 'note', 'team']
+DAILY_STATS_NUMERIC = ['min', 'pie', 'off_rating', 'def_rating', 'usg_pct', 'ts_pct']
+
+def prepare_daily_stats(df, date):
+    """ 데이터프레임을 daily_stats 행 목록으로 변환합니다. (대/소문자 컬럼 모두 허용)
+    반환값: (저장할 행 목록, 거부된 행 수) """
+    import pandas as pd
+    frame = df.rename(columns=str.lower)
+    frame = frame.reindex(columns=DAILY_STATS_COLUMNS)
+    frame = frame.astype(object).where(frame.notna(), None)
+
+    numeric = frame[DAILY_STATS_NUMERIC].apply(pd.to_numeric, errors='coerce')
+    bad_numeric = (numeric.isna() & frame[DAILY_STATS_NUMERIC].notna()).any(axis=1)
+    missing_name = frame['player_name'].isna() | (frame['player_name'].astype(str).str.strip() == '')
+    valid = ~(bad_numeric | missing_name)
+
+    frame[DAILY_STATS_NUMERIC] = numeric.astype(object).where(numeric.notna(), None)
+    frame = frame[valid]
+    frame.insert(0, 'date', date)
+    return list(frame.itertuples(index=False, name=None)), int((~valid).sum())
+
+def save_daily_stats(df, date=None, replace=False):
+    """ 선수 스탯을 한 번의 트랜잭션(executemany)으로 저장합니다.
+    이름이 없거나 숫자 컬럼이 숫자가 아닌 행은 거부하고 개수를 돌려줍니다.
+    replace=True 이면 해당 날짜의 기존 스냅샷을 지우고 새로 씁니다.
+    반환값: (저장된 행 수, 거부된 행 수) """
+    if df.empty: return 0, 0
+    if date is None: date = datetime.now().strftime("%Y-%m-%d")
+    
+    rows, rejected = prepare_daily_stats(df, date)
+    with transaction() as conn:
+        if replace: conn.execute("DELETE FROM daily_stats WHERE date = ?", (date,))
+        conn.executemany('''
+        INSERT OR REPLACE INTO daily_stats 
+        (date, player_name, availability, pos, min, pie, off_rating, def_rating, usg_pct, ts_pct, note, team)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    if rejected: print(f"⚠️ daily_stats: {rejected}개 행 거부됨 (이름 누락/숫자 형식 오류)")
+    return len(rows), rejected
+
+def replace_predictions(date, rows):
+    """ 해당 날짜의 예측을 통째로 교체합니다. (DELETE + INSERT 를 한 트랜잭션으로)
+    rows: [(home_team, visit_team, predicted_winner, predicted_gap)]
+    중간에 실패하면 롤백되어 기존 슬레이트가 그대로 남습니다. """
+    return replace_predictions_many({date: rows})
+
+def replace_predictions_many(slates):
+    """ 여러 날짜의 예측을 한 트랜잭션으로 교체합니다. slates: {date: rows} (rows 형식은 replace_predictions와 동일)
+    하나라도 실패하면 전체가 롤백됩니다. 반환값: 저장된 행 수 """
+    with transaction() as conn:
+        for date, rows in slates.items():
+            conn.execute("DELETE FROM predictions WHERE date = ?", (date,))
+            conn.executemany('''
+            INSERT INTO predictions (date, home_team, visit_team, predicted_winner, predicted_gap, actual_winner, is_correct)
+            VALUES (?, ?, ?, ?, ?, NULL, NULL)
+            ''', [(date, home, visit, winner, float(gap)) for home, visit, winner, gap in rows])
+        refresh_daily_accuracy(conn, list(slates))
+    return sum(len(rows) for rows in slates.values())
 
 def save_prediction_to_db(game_id, date, home, visit, pred_winner, gap):
     """ [NEW] 아침의 예측 결과를 DB에 저장 """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     try:
-        cursor.execute('''
-        INSERT OR REPLACE INTO predictions 
-        (game_id, date, home_team, visit_team, predicted_winner, predicted_gap, actual_winner, is_correct)
-        VALUES (?, ?, ?, ?, ?, ?, NULL, NULL)
-        ''', (game_id, date, home, visit, pred_winner, gap))
-        conn.commit()
+        with transaction() as conn:
+            conn.execute('''
+            INSERT OR REPLACE INTO predictions 
+            (game_id, date, home_team, visit_team, predicted_winner, predicted_gap, actual_winner, is_correct)
+            VALUES (?, ?, ?, ?, ?, ?, NULL, NULL)
+            ''', (game_id, date, home, visit, pred_winner, gap))
     except Exception as e:
         print(f"⚠️ 예측 저장 실패: {e}")
-    finally:
-        conn.close()
\ No newline at end of file
+
+def load_player_aliases():
+    """ 저장된 선수 이름 매핑 {정규화 이름: player_id} """
+    rows = get_connection().execute("SELECT alias, player_id FROM player_aliases").fetchall()
+    return {alias: player_id for alias, player_id in rows}
+
+def save_player_aliases(rows):
+    """ rows: [(정규화 이름, player_id, NBA 표기 이름, 매칭 점수)] """
+    if not rows: return
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        with transaction() as conn:
+            conn.executemany('''
+            INSERT OR REPLACE INTO player_aliases (alias, player_id, player_name, match_score, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ''', [(alias, int(pid), name, int(score), now) for alias, pid, name, score in rows])
+    except Exception as e:
+        print(f"⚠️ 선수 이름 매핑 저장 실패: {e}")
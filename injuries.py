@@ -0,0 +1,110 @@
+"""
+================================================================================
+[파일명: injuries.py] - 리그 전체 부상자 인덱스 (ESPN)
+================================================================================
+
+[역할]
+1. ESPN 리그 전체 부상자 페이지를 실행당 1회만 받아옵니다. (api_cache 경유)
+   - 팀별 페이지 30개 요청 + 전체 DOM 파싱 30회 -> 요청 1회 + 표 파싱 1회
+
+2. 부상자 표(<div class="ResponsiveTable">)만 파싱합니다. (SoupStrainer)
+
+3. 정규화된 선수 이름 -> 상태 (Out / Doubtful / Questionable / Day-To-Day) 인덱스를
+   만들어 모든 팀이 공유합니다.
+
+[주요 함수]
+- build_injury_index(): {정규화 이름: {'name', 'status', 'team'}}
+- team_injuries(index, slug): 특정 팀의 부상자 목록
+- normalize_name(name): 악센트/구두점/Jr.·III 접미사 제거 후 소문자화
+================================================================================
+"""
+import re
+import unicodedata
+
+import api_cache
+
+INJURY_URL = "https://www.espn.com/nba/injuries"
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+STATUS_LABELS = {
+    'out': 'Out',
+    'doubtful': 'Doubtful',
+    'questionable': 'Questionable',
+    'day-to-day': 'Day-To-Day',
+}
+# 같은 선수에 상태가 둘 이상 붙으면 더 심한 쪽을 씁니다. (목록에 없는 상태는 0)
+STATUS_SEVERITY = {'Out': 4, 'Doubtful': 3, 'Questionable': 2, 'Day-To-Day': 1}
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+def normalize_name(name):
+    """ 'Luka Dončić' -> 'luka doncic', 'Jaren Jackson Jr.' -> 'jaren jackson' """
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    text = re.sub(r"[.'’`]", "", text.lower())
+    tokens = [t for t in re.split(r"[\s\-,]+", text) if t]
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+def normalize_status(text):
+    key = str(text).strip().lower()
+    return STATUS_LABELS.get(key, str(text).strip().title())
+
+def team_key(team_name):
+    """ 'Portland Trail Blazers' / 'por/portland-trail-blazers' -> 'blazers' (닉네임 기준) """
+    return re.split(r"[\s\-/]+", str(team_name).strip().lower())[-1]
+
+def _is_injury_table(css_class):
+    # 파싱 단계에서는 class 값이 문자열 그대로 들어오므로 직접 분리해서 비교
+    if not css_class: return False
+    classes = css_class.split() if isinstance(css_class, str) else css_class
+    return 'ResponsiveTable' in classes
+
+def parse_injury_tables(html):
+    """ 부상자 표만 파싱하여 [{'name', 'status', 'team'}] 목록을 반환합니다. """
+    from bs4 import BeautifulSoup, SoupStrainer  # 파싱할 때만 불러옴 (import 비용)
+    only_tables = SoupStrainer('div', class_=_is_injury_table)
+    soup = BeautifulSoup(html, 'html.parser', parse_only=only_tables)
+
+    entries = []
+    for block in soup.find_all('div', class_='ResponsiveTable'):
+        title = block.find(class_='Table__Title')
+        team = title.get_text(" ", strip=True) if title else ''
+
+        table = block.find('table')
+        if table is None: continue
+        header_cells = [th.get_text(strip=True).upper() for th in table.find_all('th')]
+        if 'NAME' not in header_cells or 'STATUS' not in header_cells: continue
+        name_idx = header_cells.index('NAME')
+        status_idx = header_cells.index('STATUS')
+
+        for tr in table.find_all('tr'):
+            cells = tr.find_all('td')
+            if len(cells) <= max(name_idx, status_idx): continue
+            name = cells[name_idx].get_text(" ", strip=True)
+            if not name: continue
+            entries.append({
+                'name': name,
+                'status': normalize_status(cells[status_idx].get_text(" ", strip=True)),
+                'team': team,
+            })
+    return entries
+
+def build_injury_index(html=None):
+    """ 리그 전체 부상자 인덱스를 만듭니다. 수집 실패 시 빈 인덱스를 반환합니다. """
+    if html is None:
+        try:
+            html = api_cache.fetch_text(INJURY_URL, headers=HEADERS, timeout=10)
+        except Exception as e:
+            print(f"      ⚠️ ESPN 부상자 페이지 수집 실패: {e}")
+            return {}
+
+    index = {}
+    for entry in parse_injury_tables(html):
+        index[normalize_name(entry['name'])] = entry
+    return index
+
+def team_injuries(index, slug):
+    """ slug(예: 'por/portland-trail-blazers')에 해당하는 팀의 부상자 목록 """
+    key = team_key(slug)
+    return [entry for entry in index.values() if team_key(entry['team']) == key]
@@ -0,0 +1,147 @@
+"""
+================================================================================
+[파일명: metrics.py] - 파이프라인 단계별 시간/카운터 기록 (Instrumentation)
+================================================================================
+
+[역할]
+1. 단계(span) 시간 측정:
+   - 일정 조회 / 팀별 수집 / 부상 스크래핑 / 점수 계산 / DB 저장 / 슬랙 전송 등
+   - with metrics.span('schedule_fetch'): ...  -> 소요 시간 + 성공 여부 기록
+
+2. 카운터:
+   - 재시도 횟수, 다운로드 바이트, API 캐시 적중/미적중 등
+   - metrics.incr('retries', host='stats.nba.com')
+
+3. 출력:
+   - JSON lines: NBA_METRICS_LOG 경로에 이벤트 1건당 1줄 (append, '-' 이면 표준출력)
+   - Prometheus textfile: NBA_METRICS_PROM 폴더 (node exporter textfile collector 폴더)
+     -> 실행 끝에 flush(job)가 '<폴더>/nba_pipeline_<job>.prom' 에 누적값을
+        원자적으로(임시 파일 -> rename) 씁니다. (작업별 파일이라 서로 덮어쓰지 않음)
+
+4. 둘 다 설정하지 않으면 꺼진 상태이며, span/incr는 즉시 반환합니다. (오버헤드 무시 가능)
+
+[주요 함수]
+- span(name, **labels) / incr(name, value, **labels) / flush(job)
+================================================================================
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+LOG_PATH = os.environ.get("NBA_METRICS_LOG")    # JSON lines 경로 ('-' = 표준출력)
+PROM_DIR = os.environ.get("NBA_METRICS_PROM")   # Prometheus textfile 폴더
+ENABLED = bool(LOG_PATH or PROM_DIR)
+PREFIX = "nba_pipeline"
+
+RUN_ID = uuid.uuid4().hex[:12]  # 같은 실행에서 나온 이벤트 묶음 표식
+
+_lock = threading.Lock()
+_spans = {}     # (name, labels) -> [count, total_seconds, failures]
+_counters = {}  # (name, labels) -> value
+_NULL_SPAN = nullcontext()
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _emit(event):
+    if not LOG_PATH: return
+    event = {'ts': round(time.time(), 3), 'run': RUN_ID, **event}
+    line = json.dumps(event, ensure_ascii=False)
+    with _lock:
+        if LOG_PATH == '-':
+            print(line, file=sys.stdout)
+        else:
+            with open(LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+@contextmanager
+def _span(name, labels):
+    started = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        key = (name, _label_key(labels))
+        with _lock:
+            stat = _spans.setdefault(key, [0, 0.0, 0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] += 0 if ok else 1
+        _emit({'type': 'span', 'name': name, 'labels': labels, 'seconds': round(seconds, 6), 'ok': ok})
+
+def span(name, **labels):
+    """ 단계 시간 측정 컨텍스트. 꺼져 있으면 아무것도 하지 않는 공용 객체를 돌려줍니다. """
+    if not ENABLED: return _NULL_SPAN
+    return _span(name, labels)
+
+def incr(name, value=1, **labels):
+    """ 카운터 증가 (재시도 / 바이트 / 캐시 적중 등) """
+    if not ENABLED: return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    _emit({'type': 'counter', 'name': name, 'labels': labels, 'value': value})
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def render_prometheus(job):
+    """ 누적 span/카운터를 Prometheus 텍스트 형식으로 변환 """
+    job_label = (('job', job),)
+    lines = [
+        f"# HELP {PREFIX}_stage_seconds_total 단계별 누적 소요 시간(초)",
+        f"# TYPE {PREFIX}_stage_seconds_total counter",
+    ]
+    with _lock:
+        spans = sorted(_spans.items())
+        counters = sorted(_counters.items())
+    for (name, labels), (count, seconds, failures) in spans:
+        lines.append(f"{PREFIX}_stage_seconds_total{_format_labels(job_label + (('stage', name),) + labels)} {seconds:.6f}")
+    lines += [f"# HELP {PREFIX}_stage_runs_total 단계 실행 횟수", f"# TYPE {PREFIX}_stage_runs_total counter"]
+    for (name, labels), (count, seconds, failures) in spans:
+        lines.append(f"{PREFIX}_stage_runs_total{_format_labels(job_label + (('stage', name),) + labels)} {count}")
+    lines += [f"# HELP {PREFIX}_stage_failures_total 예외로 끝난 단계 수", f"# TYPE {PREFIX}_stage_failures_total counter"]
+    for (name, labels), (count, seconds, failures) in spans:
+        lines.append(f"{PREFIX}_stage_failures_total{_format_labels(job_label + (('stage', name),) + labels)} {failures}")
+
+    for name in sorted({name for (name, _), _ in counters}):
+        lines += [f"# TYPE {PREFIX}_{name}_total counter"]
+        for (c_name, labels), value in counters:
+            if c_name == name:
+                lines.append(f"{PREFIX}_{name}_total{_format_labels(job_label + labels)} {value}")
+
+    lines += [f"# TYPE {PREFIX}_last_run_timestamp_seconds gauge",
+              f"{PREFIX}_last_run_timestamp_seconds{_format_labels(job_label)} {time.time():.0f}"]
+    return "\n".join(lines) + "\n"
+
+def flush(job):
+    """ 실행 끝에 호출: 요약 이벤트 기록 + Prometheus textfile 갱신 """
+    if not ENABLED: return
+    with _lock:
+        summary = {name + _format_labels(labels): round(stat[1], 6) for (name, labels), stat in _spans.items()}
+    _emit({'type': 'summary', 'job': job, 'stage_seconds': summary})
+
+    if PROM_DIR:
+        path = os.path.join(PROM_DIR, f"{PREFIX}_{job}.prom")
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # collector는 *.prom 만 읽음
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(render_prometheus(job))
+        os.replace(tmp_path, path)  # node exporter가 반쯤 쓴 파일을 읽지 않도록
+
+def reset():
+    """ 누적값 초기화 (같은 프로세스에서 여러 작업을 돌릴 때) """
+    with _lock:
+        _spans.clear()
+        _counters.clear()
@@ -0,0 +1,92 @@
+"""
+================================================================================
+[파일명: player_ids.py] - 선수 이름 -> NBA 선수 ID 해석기
+================================================================================
+
+[역할]
+1. ESPN 등에서 긁어온 표기 이름(악센트, Jr./III 접미사, 애칭 등)을 NBA 선수 ID로 바꿉니다.
+
+2. 조회 순서:
+   (1) 후보 선수들의 정규화 이름과 정확 일치 (항상 우선, 저장된 매핑보다 먼저)
+   (2) 저장된 매핑(player_aliases 테이블) -> (1)에서 이미 다른 이름이 차지한 선수는 제외
+   (3) 나머지 이름만 모아서 한 번에 fuzzy 매칭 (아직 아무도 차지하지 않은 선수 중에서)
+       -> 점수가 ALIAS_CUTOFF 이상이고 1위가 유일할 때만 DB에 저장
+          (비슷한 이름의 다른 선수를 영구 매핑으로 굳히지 않도록)
+
+   -> 같은 이름은 다음 실행부터 dict 조회 한 번으로 끝납니다.
+
+[주요 함수]
+- resolve_player_ids(names, players_df): {표기 이름: player_id}
+================================================================================
+"""
+import threading
+
+import database
+import metrics
+from injuries import normalize_name
+
+FUZZY_CUTOFF = 80  # 기존 partial_ratio 기준 유지 (이번 실행 매칭)
+ALIAS_CUTOFF = 95  # 이 점수 이상 + 1위 유일할 때만 영구 매핑으로 저장
+
+_lock = threading.Lock()
+_aliases = None
+
+def _get_aliases():
+    global _aliases
+    if _aliases is None:
+        _aliases = database.load_player_aliases()
+    return _aliases
+
+def resolve_player_ids(names, players_df):
+    """ names: 표기 이름 목록 / players_df: 후보 선수 ('player_id', 'player_name')
+    반환값: {표기 이름: player_id} (매칭 실패한 이름은 제외) """
+    if not names or players_df.empty: return {}
+
+    candidate_ids = set(players_df['player_id'])
+    by_norm = dict(zip(players_df['player_name'].map(normalize_name), players_df['player_id']))
+
+    resolved = {}
+    pending = []
+    for name in names:
+        norm = normalize_name(name)
+        if norm in by_norm: resolved[name] = by_norm[norm]
+        else: pending.append((name, norm))
+    claimed = set(resolved.values())  # 정확 일치로 확정된 선수는 다른 이름에 넘겨주지 않음
+
+    unseen = []
+    with _lock:
+        aliases = _get_aliases()
+        for name, norm in pending:
+            player_id = aliases.get(norm)
+            if player_id in candidate_ids and player_id not in claimed:
+                resolved[name] = player_id
+            else:
+                unseen.append((name, norm))
+    claimed = set(resolved.values())
+
+    if not unseen: return resolved
+
+    # 나머지 이름만 일괄 fuzzy 매칭 (아직 차지되지 않은 선수만 후보)
+    choices = {pid: name.lower() for pid, name in zip(players_df['player_id'], players_df['player_name'])
+               if pid not in claimed}
+    names_by_id = dict(zip(players_df['player_id'], players_df['player_name']))
+    new_rows = []
+    metrics.incr('fuzzy_lookups', len(unseen))
+    if not choices: return resolved
+    from thefuzz import fuzz, process  # 처음 보는 이름이 있을 때만 불러옴
+    with metrics.span('fuzzy_match'):
+        for name, norm in unseen:
+            matches = process.extract(name.lower(), choices, scorer=fuzz.partial_ratio, limit=2)
+            if not matches or matches[0][1] < FUZZY_CUTOFF: continue
+            _, score, player_id = matches[0]
+            resolved[name] = player_id
+            unique = len(matches) < 2 or matches[1][1] < score
+            if score >= ALIAS_CUTOFF and unique:
+                new_rows.append((norm, player_id, names_by_id[player_id], score))
+
+    if new_rows:
+        database.save_player_aliases(new_rows)
+        with _lock:
+            for norm, player_id, _, _ in new_rows:
+                _get_aliases()[norm] = int(player_id)
+    return resolved
@@ -0,0 +1,208 @@
+"""
+================================================================================
+[파일명: rate_limiter.py] - 공용 요청 스케줄러 (호스트별 속도 제한 + 재시도)
+================================================================================
+
+[역할]
+1. 호스트별 토큰 버킷:
+   - stats.nba.com / espn.com / slack.com 각각 초당 요청 수와 버스트를 제한합니다.
+   - 모든 스레드가 같은 버킷을 공유 -> 병렬 수집을 늘려도 호스트에 가는 속도는 일정
+
+2. 재시도:
+   - 연결 오류 / 타임아웃 / 429 / 5xx / 깨진 응답(JSON 아님)만 재시도
+   - 지수 백오프 + 지터(full jitter), 최대 MAX_ATTEMPTS 회
+   - 프로세스 전체 재시도 예산(RETRY_BUDGET)을 다 쓰면 더 이상 재시도하지 않고 바로 실패
+
+3. 429 / Retry-After:
+   - 응답에 Retry-After가 있으면 해당 호스트 버킷 전체를 그 시간 동안 멈춥니다.
+     (한 스레드가 차단당하면 다른 스레드도 같이 기다림)
+   - nba_api 세션에는 응답 훅(observe_response)을 걸어 같은 처리를 합니다.
+
+4. 연결 재사용:
+   - 호스트별 requests.Session 1개를 프로세스 전체가 공유합니다. (keep-alive + 연결 풀)
+   - 매 요청마다 TCP/TLS 연결을 새로 맺지 않으므로 30팀 슬레이트에서 핸드셰이크 수십 번 절약
+   - nba_api도 NBAStatsHTTP.set_session()으로 같은 stats.nba.com 세션을 사용합니다.
+
+[주요 함수]
+- call(host, func): func()를 속도 제한 + 재시도로 실행
+- request(method, url, **kwargs): requests 요청 (HTTP 상태 기반 재시도 포함)
+- install_hook(session): requests 세션에 Retry-After 감지 훅 설치
+- get_session(host): 호스트별 공용 세션 (연결 풀 + gzip)
+================================================================================
+"""
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import metrics
+
+# requests는 실제로 요청을 보낼 때 불러옵니다. (import 약 0.1초, 요청 없이 끝나는 실행은 건너뜀)
+
+# -----------------------------------------------------------------------------
+# 1. 설정
+# -----------------------------------------------------------------------------
+# 호스트별 (초당 요청 수, 버스트)
+HOST_LIMITS = {
+    'stats.nba.com': (1.5, 3),
+    'www.espn.com': (2.0, 2),
+    'slack.com': (1.0, 1),
+}
+DEFAULT_LIMIT = (2.0, 2)
+
+MAX_ATTEMPTS = 5                                            # 요청당 최대 시도 횟수
+BACKOFF_BASE = 1.0                                          # 첫 재시도 대기 상한 (초)
+BACKOFF_CAP = 30.0                                          # 백오프 상한 (초)
+MAX_RETRY_AFTER = 120.0                                     # 비정상적으로 긴 Retry-After 상한
+RETRY_BUDGET = int(os.environ.get("NBA_RETRY_BUDGET", 30))  # 프로세스 전체 재시도 예산
+RETRY_STATUS = {429, 500, 502, 503, 504}
+POOL_SIZE = 8                                               # 호스트별 keep-alive 연결 수 (동시 수집 스레드 수 이상)
+
+class RetryableError(Exception):
+    """ 재시도 가능한 HTTP 응답 (429 / 5xx) """
+
+    def __init__(self, status, retry_after=None, url=None):
+        super().__init__(f"HTTP {status}" + (f" ({url})" if url else ""))
+        self.status = status
+        self.retry_after = retry_after
+
+# -----------------------------------------------------------------------------
+# 2. 토큰 버킷
+# -----------------------------------------------------------------------------
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """ 토큰 1개를 얻을 때까지 대기 (차단 중이면 차단이 풀릴 때까지) """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def block_for(self, seconds):
+        """ Retry-After 동안 이 호스트로 가는 모든 요청을 멈춤 """
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+_lock = threading.Lock()
+_buckets = {}
+_sessions = {}
+_retry_budget = RETRY_BUDGET
+
+def bucket(host):
+    with _lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(*HOST_LIMITS.get(host, DEFAULT_LIMIT))
+        return _buckets[host]
+
+def _take_retry():
+    global _retry_budget
+    with _lock:
+        if _retry_budget <= 0: return False
+        _retry_budget -= 1
+        return True
+
+# -----------------------------------------------------------------------------
+# 3. 재시도
+# -----------------------------------------------------------------------------
+def parse_retry_after(value):
+    """ Retry-After 헤더 (초 또는 HTTP 날짜) -> 초. 없거나 해석 불가면 None """
+    if not value: return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+def backoff_delay(attempt, retry_after=None):
+    """ Retry-After가 있으면 그대로, 없으면 full jitter 지수 백오프 """
+    if retry_after is not None: return retry_after
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+def is_retryable(error):
+    import requests
+    return isinstance(error, (RetryableError, requests.ConnectionError, requests.Timeout, json.JSONDecodeError))
+
+def call(host, func, attempts=MAX_ATTEMPTS):
+    """ host 버킷에서 토큰을 받아 func()를 실행하고, 일시적 오류면 백오프 후 재시도합니다. """
+    for attempt in range(1, attempts + 1):
+        bucket(host).acquire()
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= attempts or not is_retryable(e): raise
+            if not _take_retry():
+                print(f"      ❌ 재시도 예산 소진 -> {host} 요청 포기: {e}")
+                raise
+            delay = backoff_delay(attempt, getattr(e, 'retry_after', None))
+            metrics.incr('retries', host=host)
+            print(f"      ⚠️ {host} 요청 실패 ({attempt}/{attempts}): {e} -> {delay:.1f}초 후 재시도")
+            time.sleep(delay)
+
+def observe_response(response, *args, **kwargs):
+    """ requests 응답 훅: 429/503 + Retry-After면 해당 호스트 버킷을 멈춥니다. """
+    if response.status_code in (429, 503):
+        host = urlparse(response.url).hostname
+        metrics.incr('throttled', host=host, status=response.status_code)
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after: bucket(host).block_for(retry_after)
+    return response
+
+def install_hook(session):
+    """ 세션의 모든 응답에 observe_response 적용 (중복 설치 방지) """
+    hooks = session.hooks.setdefault('response', [])
+    if observe_response not in hooks: hooks.append(observe_response)
+    return session
+
+# -----------------------------------------------------------------------------
+# 4. 공용 세션 (연결 풀)
+# -----------------------------------------------------------------------------
+def get_session(host):
+    """ 호스트별 공용 requests.Session (keep-alive 연결 풀 + gzip + Retry-After 훅) """
+    import requests
+    from requests.adapters import HTTPAdapter
+    with _lock:
+        if host not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['Accept-Encoding'] = 'gzip, deflate'
+            _sessions[host] = install_hook(session)
+        return _sessions[host]
+
+def request(method, url, session=None, **kwargs):
+    """ requests 요청 + 속도 제한 + 재시도 (429/5xx는 Retry-After 또는 백오프 후 재시도)
+    session을 주지 않으면 호스트별 공용 세션으로 보냅니다. """
+    host = urlparse(url).hostname
+    sender = install_hook(session) if session else get_session(host)
+
+    def send():
+        res = sender.request(method, url, **kwargs)
+        if res.status_code in RETRY_STATUS:
+            raise RetryableError(res.status_code, parse_retry_after(res.headers.get('Retry-After')), url)
+        return res
+
+    return call(host, send)
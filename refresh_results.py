@@ -2,16 +2,25 @@
 ================================================================================
 [파일명: refresh_results.py] - 과거 데이터 전수 조사 및 동기화 (Data Sync)
 ================================================================================
+[업데이트] 증분 동기화
+- 채점 안 된(actual_winner IS NULL) 예측이 남은 날짜만 조회합니다.
+- 모든 경기가 채점된 마지막 날짜를 watermark로 저장해 다음 실행에서 건너뜁니다.
+- 스코어보드는 동시에 조회하고, 업데이트는 마지막에 한 번의 트랜잭션으로 반영합니다.
+- 요청은 rate_limiter를 거쳐 stats.nba.com 속도 제한을 지키고, 일시적 오류는 백오프 후 재시도합니다.
+================================================================================
 """
-import sqlite3
-import pandas as pd
 import os
-from datetime import datetime, timedelta
-from nba_api.stats.endpoints import scoreboardv2
+import sys
+import api_cache
+import database
+import metrics
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 
 # 1. 설정
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "nba_data.db")
+DB_PATH = database.DB_PATH
+MAX_FETCH_WORKERS = 4                # 스코어보드 동시 조회 수
+WATERMARK_KEY = 'results_watermark'  # 이 날짜까지는 모든 경기 채점 완료
 
 # 팀 ID -> 약어 매핑 (필요시 추가)
 TEAMS = {
@@ -25,112 +34,141 @@ TEAMS = {
     '1610612762': 'UTA', '1610612764': 'WAS'
 }
 
+def parse_scoreboard(header_df, line_df):
+    """ API 데이터를 보기 좋게 가공 (매치업 -> 결과/상태)
+    Key: "VISITvsHOME", Value: {"status_text": "Final/PPD", "winner": "LAL"} """
+    api_results = {}
+    if header_df.empty: return api_results
+
+    for _, row in header_df.iterrows():
+        h_id = str(row['HOME_TEAM_ID'])
+        v_id = str(row['VISITOR_TEAM_ID'])
+        h_abbr = TEAMS.get(h_id, 'Unknown')
+        v_abbr = TEAMS.get(v_id, 'Unknown')
+
+        key = f"{v_abbr}vs{h_abbr}"
+        status_text = str(row.get('GAME_STATUS_TEXT', '')).upper()
+
+        # 승자 확인
+        winner = None
+        if "Final" in status_text or row['GAME_STATUS_ID'] == 3:
+            # 점수 확인
+            try:
+                pts_h = line_df[line_df['TEAM_ID'] == int(h_id)]['PTS'].values[0]
+                pts_v = line_df[line_df['TEAM_ID'] == int(v_id)]['PTS'].values[0]
+                winner = h_abbr if pts_h > pts_v else v_abbr
+            except:
+                winner = None
+
+        api_results[key] = {
+            "status_text": status_text,
+            "winner": winner
+        }
+    return api_results
+
+def fetch_results(target_date):
+    with metrics.span('results_fetch'):
+        board = api_cache.fetch_datasets('ScoreboardV2', game_date=target_date)
+    return parse_scoreboard(board['GameHeader'], board['LineScore'])
+
+def grade_rows(db_rows, api_results):
+    """ DB 예측 행과 API 결과를 대조해 (actual_winner, is_correct, rowid) 목록을 만듭니다. """
+    updates = []
+    for r_id, h_team, v_team, pred in db_rows:
+        key = f"{v_team}vs{h_team}"
+
+        # API에 해당 경기가 있는가?
+        if key in api_results:
+            api_data = api_results[key]
+            status = api_data["status_text"]
+            real_winner = api_data["winner"]
+
+            # [Case A] PPD (연기됨)
+            if "PPD" in status or "POSTPONED" in status:
+                print(f"   => 🆖 {key} : API 상태 '{status}' -> 'Postponed' 처리")
+                updates.append(('Postponed', None, r_id))
+
+            # [Case B] 정상 종료 (Final)
+            elif real_winner:
+                # 채점 로직
+                is_correct = 1 if pred == real_winner else 0
+                print(f"   => ✅ {key} : 결과 '{real_winner}' (예측 {pred}) -> 채점 완료")
+                updates.append((real_winner, is_correct, r_id))
+
+        else:
+            # [Case C] DB엔 있는데 API엔 없음 (날짜 변경/증발) -> 1월 24일 GSW 사례
+            print(f"   => 👻 {key} : API 목록에 없음 (날짜 변경됨) -> 'Postponed' 처리")
+            updates.append(('Postponed', None, r_id))
+    return updates
+
 def sync_data():
-    print("🔄 NBA 데이터 동기화 시작 (1월 19일 ~ 오늘)...")
-    
+    print("🔄 NBA 데이터 동기화 시작 (미채점 날짜만)...")
+
     if not os.path.exists(DB_PATH):
         print("❌ DB 파일이 없습니다.")
         return
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    conn = database.get_connection()
+    watermark = database.get_state(WATERMARK_KEY, '')
+    if watermark: print(f"📌 채점 완료 기준일(watermark): {watermark}")
+
+    # 1. 채점 안 된 예측이 남아 있는 날짜만 가져오기
+    today = datetime.now().strftime("%Y-%m-%d")
+    cursor = conn.execute("""
+        SELECT date, rowid, home_team, visit_team, predicted_winner FROM predictions
+        WHERE actual_winner IS NULL AND date > ? AND date <= ?
+        ORDER BY date ASC, rowid ASC
+    """, (watermark, today))
+    open_rows = {}
+    for date, *db_row in cursor.fetchall():
+        open_rows.setdefault(date, []).append(tuple(db_row))
+
+    if not open_rows:
+        print("✅ 채점할 날짜가 없습니다.")
+        return
+    print(f"📅 미채점 날짜 {len(open_rows)}일: {', '.join(open_rows)}")
 
-    # 동기화 기간 설정 (1월 19일부터 오늘까지)
-    start_date = datetime(2026, 1, 19)
-    end_date = datetime.now()
-    
-    current_date = start_date
-    total_updated = 0
+    # 2. NBA API에서 실제 결과 동시 조회
+    api_by_date = {}
+    workers = max(1, min(MAX_FETCH_WORKERS, len(open_rows)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_results, d): d for d in open_rows}
+        for future in as_completed(futures):
+            target_date = futures[future]
+            try:
+                api_by_date[target_date] = future.result()
+            except Exception as e:
+                metrics.incr('fetch_errors', stage='results_fetch')
+                print(f"❌ API 접속 실패 ({target_date}): {e}")
 
-    while current_date <= end_date:
-        target_date = current_date.strftime("%Y-%m-%d")
+    # 3. DB와 API 대조 (날짜순)
+    updates = []
+    for target_date, db_rows in open_rows.items():
+        if target_date not in api_by_date: continue
         print(f"\n📅 [확인 중] {target_date}")
-        
-        # 1. DB에서 그날의 예측 데이터 가져오기
-        cursor.execute("SELECT rowid, home_team, visit_team, predicted_winner FROM predictions WHERE date = ?", (target_date,))
-        db_rows = cursor.fetchall()
-        
-        if not db_rows:
-            print(" - 저장된 예측 데이터 없음. 패스.")
-            current_date += timedelta(days=1)
-            continue
-
-        # 2. NBA API에서 실제 결과 가져오기
-        try:
-            board = scoreboardv2.ScoreboardV2(game_date=target_date)
-            header_df = board.game_header.get_data_frame()
-            line_df = board.line_score.get_data_frame()
-        except Exception as e:
-            print(f"❌ API 접속 실패 ({target_date}): {e}")
-            current_date += timedelta(days=1)
-            continue
-
-        # API 데이터를 보기 좋게 가공 (매치업 -> 결과/상태)
-        api_results = {} # Key: "VISITvsHOME", Value: {"status": "Final/PPD", "winner": "LAL"}
-        
-        if not header_df.empty:
-            for _, row in header_df.iterrows():
-                h_id = str(row['HOME_TEAM_ID'])
-                v_id = str(row['VISITOR_TEAM_ID'])
-                h_abbr = TEAMS.get(h_id, 'Unknown')
-                v_abbr = TEAMS.get(v_id, 'Unknown')
-                
-                key = f"{v_abbr}vs{h_abbr}"
-                status_text = str(row.get('GAME_STATUS_TEXT', '')).upper()
-                
-                # 승자 확인
-                winner = None
-                if "Final" in status_text or row['GAME_STATUS_ID'] == 3:
-                    # 점수 확인
-                    try:
-                        pts_h = line_df[line_df['TEAM_ID'] == int(h_id)]['PTS'].values[0]
-                        pts_v = line_df[line_df['TEAM_ID'] == int(v_id)]['PTS'].values[0]
-                        winner = h_abbr if pts_h > pts_v else v_abbr
-                    except:
-                        winner = None
-                
-                api_results[key] = {
-                    "status_text": status_text,
-                    "winner": winner
-                }
-
-        # 3. DB와 API 대조 및 업데이트
-        for row in db_rows:
-            r_id, h_team, v_team, pred = row
-            key = f"{v_team}vs{h_team}"
-            
-            # API에 해당 경기가 있는가?
-            if key in api_results:
-                api_data = api_results[key]
-                status = api_data["status_text"]
-                real_winner = api_data["winner"]
-                
-                # [Case A] PPD (연기됨)
-                if "PPD" in status or "POSTPONED" in status:
-                    print(f"   => 🆖 {key} : API 상태 '{status}' -> 'Postponed' 처리")
-                    cursor.execute("UPDATE predictions SET actual_winner = 'Postponed', is_correct = NULL WHERE rowid = ?", (r_id,))
-                    total_updated += 1
-                
-                # [Case B] 정상 종료 (Final)
-                elif real_winner:
-                    # 채점 로직
-                    is_correct = 1 if pred == real_winner else 0
-                    print(f"   => ✅ {key} : 결과 '{real_winner}' (예측 {pred}) -> 채점 완료")
-                    cursor.execute("UPDATE predictions SET actual_winner = ?, is_correct = ? WHERE rowid = ?", (real_winner, is_correct, r_id))
-                    total_updated += 1
-            
-            else:
-                # [Case C] DB엔 있는데 API엔 없음 (날짜 변경/증발) -> 1월 24일 GSW 사례
-                print(f"   => 👻 {key} : API 목록에 없음 (날짜 변경됨) -> 'Postponed' 처리")
-                cursor.execute("UPDATE predictions SET actual_winner = 'Postponed', is_correct = NULL WHERE rowid = ?", (r_id,))
-                total_updated += 1
-
-        conn.commit()
-        current_date += timedelta(days=1)
-
-    conn.close()
-    print(f"\n✅ 동기화 완료! 총 {total_updated}개의 데이터가 최신화되었습니다.")
+        updates.extend(grade_rows(db_rows, api_by_date[target_date]))
+
+    # 4. 업데이트 + watermark 갱신을 한 트랜잭션으로 반영
+    with metrics.span('db_write'), database.transaction() as conn:
+        conn.executemany("UPDATE predictions SET actual_winner = ?, is_correct = ? WHERE rowid = ?", updates)
+        database.refresh_daily_accuracy(conn, api_by_date)
+
+        first_open = conn.execute("SELECT MIN(date) FROM predictions WHERE actual_winner IS NULL").fetchone()[0]
+        if first_open:
+            new_watermark = conn.execute("SELECT MAX(date) FROM predictions WHERE date < ?", (first_open,)).fetchone()[0]
+        else:
+            new_watermark = conn.execute("SELECT MAX(date) FROM predictions").fetchone()[0]
+        if new_watermark:
+            database.set_state(conn, WATERMARK_KEY, new_watermark)
+
+    metrics.incr('graded_rows', len(updates))
+    print(f"\n✅ 동기화 완료! 총 {len(updates)}개의 데이터가 최신화되었습니다.")
     print("👉 이제 대시보드를 새로고침 해보세요.")
 
 if __name__ == "__main__":
-    sync_data()
\ No newline at end of file
+    if "--no-cache" in sys.argv: api_cache.BYPASS = True
+    try:
+        with metrics.span('total'):
+            sync_data()
+    finally:
+        metrics.flush('refresh_results')
@@ -2,22 +2,36 @@
 ================================================================================
 [파일명: run_nba.py] - 미국 현지 시간 기준 저장 Ver (최종 수정)
 ================================================================================
+[실행 옵션]
+- --no-cache : API 응답 캐시 읽기를 건너뜀 (팀 메모도 건너뛰고 모두 다시 계산)
+- --async    : 비동기 파이프라인 (일정/부상/리그 수집을 겹치고, 양 팀이 도착한
+               매치업부터 계산). 수집 중 실패하면 기존 동기 경로로 다시 실행합니다.
+- --days N   : 기간 모드. 오늘부터 N일 치 경기를 한 번에 예측합니다.
+               (팀 데이터 수집 / 점수 계산 / DB 저장 / 슬랙 전송은 기간 전체에 한 번씩)
+================================================================================
 """
-import sqlite3
-import pandas as pd
-import requests
-import time
+import argparse
+import asyncio
 import config  # config.py 설정 불러오기
-from bs4 import BeautifulSoup
-from nba_api.stats.endpoints import leaguedashplayerstats, commonteamroster, scoreboardv2
+import api_cache
+import database
+import metrics
+import slack_outbox
+import team_memo
+from injuries import STATUS_SEVERITY, build_injury_index, team_injuries
+from player_ids import resolve_player_ids
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from thefuzz import fuzz
+
+# pandas / uv_model / nba_api(엔드포인트 이름으로 호출) / pyarrow는 쓰는 함수 안에서 불러옵니다.
+# -> 경기가 없는 날처럼 일찍 끝나는 실행은 무거운 import 비용(1초 안팎)을 내지 않습니다.
 
 # -----------------------------------------------------------------------------
 # 1. 설정 및 상수
 # -----------------------------------------------------------------------------
 SEASON = '2025-26'
-DB_PATH = "nba_data.db"
+MAX_FETCH_WORKERS = 6  # 동시 수집 스레드 수 (stats.nba.com 차단 방지용 상한)
+BULK_MODE = True       # True: 리그 전체 스탯 1회 호출 / False: 팀별 호출 (기존 방식)
 
 TEAMS = {
     'ATL': {'id': '1610612737', 'slug': 'atl/atlanta-hawks'},
@@ -57,210 +71,169 @@ ID_TO_ABBR = {v['id']: k for k, v in TEAMS.items()}
 # -----------------------------------------------------------------------------
 # 2. 로직 함수
 # -----------------------------------------------------------------------------
-def calculate_individual_uv(pie):
-    uv = 1.0 + (pie - 0.10) * 20
-    return max(0.1, min(uv, 3.5))
-
-def select_best_lineup(roster):
-    sorted_players = roster.sort_values(by='contribution', ascending=False)
-    starters = []
-    
-    guards = sorted_players[sorted_players['pos'].str.contains('G', na=False)]
-    forwards = sorted_players[sorted_players['pos'].str.contains('F', na=False)]
-    centers = sorted_players[sorted_players['pos'].str.contains('C', na=False)]
-    
-    selected_indices = set()
-    
-    def pick_player(pool, count):
-        picked = 0
-        for idx, row in pool.iterrows():
-            if picked >= count: break
-            if idx not in selected_indices:
-                starters.append(row)
-                selected_indices.add(idx)
-                picked += 1
-    
-    pick_player(centers, 1)
-    pick_player(guards, 2)
-    pick_player(forwards, 2)
-    
-    if len(starters) < 5:
-        for idx, row in sorted_players.iterrows():
-            if len(starters) >= 5: break
-            if idx not in selected_indices:
-                starters.append(row)
-                selected_indices.add(idx)
+STAT_COLUMNS = ['player_id', 'player_name', 'min', 'pie', 'usg_pct', 'pos']
 
-    return pd.DataFrame(starters)
+def filter_and_remap_stats(stats_df, pos_df, on):
+    """ GP/MIN 필터 + 컬럼 리매핑 (팀 단위/리그 전체 모두 공용) """
+    import pandas as pd
+    keep_team = 'TEAM_ID' in stats_df
+    stats_df = stats_df[ (stats_df['GP'] >= 3) & (stats_df['MIN'] >= 10) ]
+    df = pd.merge(stats_df, pos_df, on=on, how='left')
+    df = df[['PLAYER_ID', 'PLAYER_NAME', 'MIN', 'PIE', 'USG_PCT', 'POSITION'] + (['TEAM_ID'] if keep_team else [])].copy()
+    df.columns = STAT_COLUMNS + (['team_id'] if keep_team else [])
+    df['pos'] = df['pos'].fillna('F')
+    return df
 
-def calculate_team_power(df, is_home=False):
-    roster = df[df['availability'] != 'Out'].copy()
-    if roster.empty: return 0.0, "데이터 없음"
+def mark_availability(df, injured):
+    """ 팀 부상자 목록(injuries.team_injuries)으로 availability 컬럼을 채웁니다.
+    부상자 이름은 player_ids 인덱스로 NBA 선수 ID에 매핑한 뒤 ID 기준으로 조인합니다.
+    여러 이름이 같은 선수로 매핑되면 더 심한 상태(Out > Doubtful > ...)를 씁니다.
+    반환값: (df, 결장(Out) 선수 이름 목록) """
+    names = [e['name'] for e in injured]
+    ids = resolve_player_ids(names, df[['player_id', 'player_name']])
+    status_by_id = {}
+    for e in injured:
+        if e['name'] not in ids: continue
+        player_id = ids[e['name']]
+        current = status_by_id.get(player_id)
+        if current is None or STATUS_SEVERITY.get(e['status'], 0) > STATUS_SEVERITY.get(current, 0):
+            status_by_id[player_id] = e['status']
+    df['availability'] = df['player_id'].map(status_by_id).fillna('OK')
 
-    for col in ['pie', 'min', 'usg_pct']:
-        roster[col] = pd.to_numeric(roster[col])
+    out_players = [e['name'] for e in injured if e['status'] == 'Out']
+    return df, out_players
 
-    roster['unit_value'] = roster['pie'].apply(calculate_individual_uv)
-    roster['contribution'] = roster['unit_value'] * roster['min']
-    
-    total_minutes = roster['min'].sum()
-    total_contribution = roster['contribution'].sum()
-    
-    if total_minutes < 240:
-        missing = 240 - total_minutes
-        total_contribution += (0.5 * missing)
-        total_minutes = 240
-        
-    raw_score = (total_contribution / total_minutes) * 5
+def get_team_stats_df(team_abbr, injury_index=None):
+    team_info = TEAMS.get(team_abbr)
+    if not team_info: 
+        print(f"   Using Logic -> {team_abbr} ❌ 정보 없음")
+        return None, []
     
-    home_adv_str = ""
-    if is_home: 
-        raw_score += 0.15
-        home_adv_str = " + 홈이점(0.15)"
-
-    top_2_usg = roster.nlargest(2, 'usg_pct')['usg_pct'].sum()
-    penalty = 0.0
-    penalty_str = ""
-    if top_2_usg > 0.60:
-        penalty = (top_2_usg - 0.60) * 3.0
-        penalty_str = f" - 패널티({penalty:.2f})"
+    # 재시도/속도 제한은 api_cache -> rate_limiter 에서 요청 단위로 처리합니다.
+    try:
+        stats_df = api_cache.fetch_datasets(
+            'LeagueDashPlayerStats',
+            season=SEASON, team_id_nullable=team_info['id'],
+            measure_type_detailed_defense='Advanced', per_mode_detailed='PerGame'
+        )['LeagueDashPlayerStats']
         
-    final_score = raw_score - penalty
+        roster_df = api_cache.fetch_datasets(
+            'CommonTeamRoster', season=SEASON, team_id=team_info['id']
+        )['CommonTeamRoster']
+        if injury_index is None: injury_index = build_injury_index()
+        injured = team_injuries(injury_index, team_info['slug'])
 
-    starters_df = select_best_lineup(roster)
-    detail_parts = []
-    for _, row in starters_df.iterrows():
-        detail_parts.append(f"{row['player_name']}({row['unit_value']:.1f})")
-    
-    detail_str = " / ".join(detail_parts)
-    full_log = f"[{final_score:.2f}] = 베스트5[{detail_str}]{home_adv_str}{penalty_str}"
-    
-    return final_score, full_log
+        # 스탯/로스터/부상자 목록이 이전 실행과 같으면 병합 + 이름 매칭을 건너뜀
+        def build():
+            pos_df = roster_df[['PLAYER', 'POSITION']].rename(columns={'PLAYER': 'PLAYER_NAME'})
+            df = filter_and_remap_stats(stats_df.drop(columns=['TEAM_ID']), pos_df, on='PLAYER_NAME')
+            return mark_availability(df, injured)
+        df, out_players = team_memo.memo_roster(team_abbr, [stats_df, roster_df, injured], build)
+        
+        print(f"   Using Logic -> {team_abbr} 데이터 수집 ✅ 완료")
+        return df, out_players
 
-def get_team_stats_df(team_abbr):
-    print(f"   Using Logic -> {team_abbr} 데이터 수집 중...", end=" ", flush=True)
-    team_info = TEAMS.get(team_abbr)
-    if not team_info: 
-        print("❌ 정보 없음")
+    except Exception as e:
+        print(f"      ❌ {team_abbr} 최종 실패: {e}")
         return None, []
-    
-    for attempt in range(1, 4):
-        try:
-            stats = leaguedashplayerstats.LeagueDashPlayerStats(
-                season=SEASON, team_id_nullable=team_info['id'],
-                measure_type_detailed_defense='Advanced', per_mode_detailed='PerGame',
-                timeout=60 
-            )
-            stats_df = stats.get_data_frames()[0]
-            stats_df = stats_df[ (stats_df['GP'] >= 3) & (stats_df['MIN'] >= 10) ].copy()
-            
-            roster = commonteamroster.CommonTeamRoster(season=SEASON, team_id=team_info['id'], timeout=60)
-            roster_df = roster.get_data_frames()[0]
-            
-            df = pd.merge(stats_df, roster_df[['PLAYER', 'POSITION']], left_on='PLAYER_NAME', right_on='PLAYER', how='left')
-            df = df[['PLAYER_NAME', 'MIN', 'PIE', 'USG_PCT', 'POSITION']].copy()
-            df.columns = ['player_name', 'min', 'pie', 'usg_pct', 'pos']
-            df['pos'] = df['pos'].fillna('F')
-            
-            out_players = []
-            try:
-                injury_url = f"https://www.espn.com/nba/team/injuries/_/name/{team_info['slug']}"
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                res = requests.get(injury_url, headers=headers, timeout=5)
-                soup = BeautifulSoup(res.text, 'html.parser')
-                for tag in soup.find_all('span', class_='Athlete__PlayerName'):
-                    name = tag.text.strip()
-                    parent_text = tag.parent.parent.get_text(" ", strip=True).lower()
-                    if "out" in parent_text: out_players.append(name)
-            except: pass
-
-            df['availability'] = 'OK'
-            for idx, row in df.iterrows():
-                nba_name = row['player_name']
-                for out_name in out_players:
-                    if fuzz.partial_ratio(out_name.lower(), nba_name.lower()) >= 80:
-                        df.at[idx, 'availability'] = 'Out'
-                        break
-            
-            print("✅ 완료")
-            return df, out_players
-            
-        except Exception as e:
-            if attempt < 3:
-                print(f"\n      ⚠️ 통신 지연(Attempt {attempt}/3)... 3초 후 재시도", end=" ")
-                time.sleep(3)
-            else:
-                print(f"\n      ❌ 최종 실패: {e}")
-                return None, []
 
-def send_to_slack(text):
+def get_league_stats_by_team():
+    """ [벌크 모드] 리그 전체 스탯 1회 + 선수 인덱스(포지션) 1회 호출 후 팀별로 분할합니다.
+    반환값: {팀 약어: df} (실패 시 None) """
+    print("   Using Logic -> 리그 전체 데이터 일괄 수집 중...")
     try:
-        token = config.SLACK_BOT_TOKEN
-        if config.MODE == "REAL":
-            channel_id = config.SLACK_REAL_CHANNEL_ID
-            prefix = ""
-        else:
-            channel_id = config.SLACK_TEST_CHANNEL_ID
-            prefix = "🛠 [테스트] "
-
-        url = "https://slack.com/api/chat.postMessage"
-        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-        data = {"channel": channel_id, "text": prefix + text}
-        requests.post(url, headers=headers, json=data)
-        print("✅ 슬랙 전송 완료!")
+        stats_df = api_cache.fetch_datasets(
+            'LeagueDashPlayerStats',
+            season=SEASON,
+            measure_type_detailed_defense='Advanced', per_mode_detailed='PerGame'
+        )['LeagueDashPlayerStats']
+
+        index_df = api_cache.fetch_datasets('PlayerIndex', season=SEASON)['PlayerIndex']
+        pos_df = index_df[['PERSON_ID', 'POSITION']].rename(columns={'PERSON_ID': 'PLAYER_ID'})
+        pos_df['POSITION'] = pos_df['POSITION'].mask(pos_df['POSITION'] == '')
+
+        league_df = filter_and_remap_stats(stats_df, pos_df, on='PLAYER_ID')
+        league_df['team_id'] = league_df['team_id'].astype(str)
+
+        by_team = {}
+        for team_id, team_df in league_df.groupby('team_id', sort=False):
+            abbr = ID_TO_ABBR.get(team_id)
+            if abbr: by_team[abbr] = team_df[STAT_COLUMNS].reset_index(drop=True)
+        print(f"   Using Logic -> 리그 전체 {len(league_df)}명 / {len(by_team)}개 팀 ✅ 완료")
+        return by_team
+
     except Exception as e:
-        print(f"❌ 슬랙 에러: {e}")
+        print(f"      ❌ 리그 데이터 최종 실패: {e}")
+        return None
+
+def get_team_injuries(team_abbr, team_df, injury_index):
+    """ [벌크 모드] 이미 수집된 팀 스탯에 부상 정보만 붙입니다. """
+    injured = team_injuries(injury_index, TEAMS[team_abbr]['slug'])
+    return team_memo.memo_roster(team_abbr, [team_df, injured], lambda: mark_availability(team_df.copy(), injured))
+
+def fetch_team(abbr, league, injury_index):
+    """ 팀 1개 데이터: 벌크 결과(league)가 있으면 부상 정보만 붙이고, 없으면 팀별 호출 """
+    with metrics.span('team_fetch', team=abbr):
+        if league is None: return get_team_stats_df(abbr, injury_index)
+        if abbr not in league: return None, []
+        return get_team_injuries(abbr, league[abbr], injury_index)
+
+def prefetch_team_stats(team_abbrs, max_workers=MAX_FETCH_WORKERS, bulk=BULK_MODE):
+    """ 슬레이트에 등장하는 팀 데이터를 한 번씩만, 병렬로 미리 수집합니다.
+    bulk=True 이면 리그 전체 스탯을 1회 호출로 받고, 팀별로는 부상 정보만 붙입니다.
+    부상 정보는 ESPN 리그 전체 페이지에서 1회만 수집해 모든 팀이 공유합니다.
+    반환값: {팀 약어: (df, out_players)} """
+    unique_teams = sorted(set(team_abbrs))
+    results = {}
+    if not unique_teams: return results
+
+    print("   Using Logic -> ESPN 리그 부상자 인덱스 수집 중...")
+    with metrics.span('injury_scrape'):
+        injury_index = build_injury_index()
+    with metrics.span('league_fetch'):
+        league = get_league_stats_by_team() if bulk else None
+    if bulk and league is None:
+        print("      ⚠️ 벌크 수집 실패 -> 팀별 수집으로 전환")
+
+    workers = max(1, min(max_workers, len(unique_teams)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_team, abbr, league, injury_index): abbr for abbr in unique_teams}
+        for future in as_completed(futures):
+            abbr = futures[future]
+            try:
+                results[abbr] = future.result()
+            except Exception as e:
+                print(f"      ❌ {abbr} 수집 실패: {e}")
+                results[abbr] = (None, [])
+    return results
+
+def send_to_slack(text):
+    """ 슬랙 대기열에 등록만 하고 바로 반환 (전송/재시도/분할은 slack_outbox 워커가 담당) """
+    prefix = "" if config.MODE == "REAL" else "🛠 [테스트] "
+    slack_outbox.send(prefix + text, source='run_nba')
 
 # -----------------------------------------------------------------------------
 # 3. 메인 실행
 # -----------------------------------------------------------------------------
-def main():
-    print("\n" + "="*60)
-    print("🚀 [1/3] NBA AI 분석 시스템 가동 (미국 현지 날짜 기준)")
-    print("="*60 + "\n")
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS predictions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT, home_team TEXT, visit_team TEXT,
-            predicted_winner TEXT, predicted_gap REAL,
-            actual_winner TEXT, is_correct INTEGER
-        )
-    ''')
-    conn.commit()
-
-    # 한국 시간 기준 내일 경기 (미국 오늘)
-    # [수정] target_date_us(미국 날짜)를 그대로 DB에 저장합니다. (+1일 안함)
-    target_date_us = (datetime.now() - timedelta(hours=14)).strftime("%Y-%m-%d")
-    print(f"📅 분석 대상 날짜 (US Date): {target_date_us}")
-    
-    save_date = target_date_us # 미국 날짜 그대로 사용
-    
-    print(f"🔄 [DB] '{save_date}' 데이터 갱신 모드 (중복 제거)")
-    cursor.execute("DELETE FROM predictions WHERE date = ?", (save_date,))
-    conn.commit()
-
+def fetch_matchups(target_date_us):
+    """ 스코어보드 -> [(game_id, 홈 약어, 원정 약어)] (중복 GAME_ID 제거). 실패/경기 없음은 None
+    원본 데이터셋을 그대로 읽어 DataFrame(pandas)을 만들지 않습니다. """
     try:
-        board = scoreboardv2.ScoreboardV2(game_date=target_date_us, timeout=60)
-        games_df = board.game_header.get_data_frame()
+        with metrics.span('schedule_fetch'):
+            board = api_cache.fetch_raw('ScoreboardV2', game_date=target_date_us)
+        games = api_cache.records(board['GameHeader'])
     except Exception as e:
         print(f"❌ 경기 일정 조회 실패: {e}")
-        return
+        return None
 
-    if games_df.empty:
+    if not games:
         print("❌ 예정된 경기가 없습니다.")
-        return
-
-    slack_msg = f"🏀 *NBA AI 승부예측 리포트* ({save_date} US)\n"
-    slack_msg += "================================\n"
-
-    print("\n🚀 [2/3] 경기별 정밀 분석 시작...\n")
+        return None
 
+    matchups = []
     processed_games = set()
 
-    for idx, row in games_df.iterrows():
+    for row in games:
         game_id = row['GAME_ID']
         if game_id in processed_games: continue
         processed_games.add(game_id)
@@ -271,65 +244,97 @@ def main():
         v_team = ID_TO_ABBR.get(v_id, 'Unknown')
         
         if h_team == 'Unknown' or v_team == 'Unknown': continue
+        matchups.append((game_id, h_team, v_team))
+    return matchups
 
-        print(f"⚔️  MATCHUP: {v_team} (원정) vs {h_team} (홈)")
-        print("-" * 50)
-        
-        h_res, h_out = get_team_stats_df(h_team)
-        v_res, v_out = get_team_stats_df(v_team)
-        
-        if h_res is None or v_res is None:
-            print("   -> ⚠️ 데이터 부족으로 패스")
-            continue
-            
-        h_score, h_log = calculate_team_power(h_res, is_home=True)
-        v_score, v_log = calculate_team_power(v_res, is_home=False)
-        
-        print(f"   🏠 {h_team}: {h_log}")
-        if h_out: print(f"      🚑 결장: {', '.join(h_out)}")
+def report_matchup(h_team, v_team, h_entry, v_entry, batch):
+    """ 매치업 1건의 콘솔 출력 / 슬랙 문단 / DB 저장 행을 만듭니다. (동기/비동기 공용)
+    h_entry, v_entry: (df, out_players). 데이터가 없으면 슬랙 문단과 행은 None """
+    lines = [f"⚔️  MATCHUP: {v_team} (원정) vs {h_team} (홈)", "-" * 50]
+    
+    h_res, h_out = h_entry
+    v_res, v_out = v_entry
+    
+    if h_res is None or v_res is None:
+        lines.append("   -> ⚠️ 데이터 부족으로 패스")
+        return "\n".join(lines), None, None
         
-        print(f"   🚌 {v_team}: {v_log}")
-        if v_out: print(f"      🚑 결장: {', '.join(v_out)}")
+    h_score = batch.score(h_team)
+    v_score = batch.score(v_team)
+    
+    lines.append(f"   🏠 {h_team}: {batch.log(h_team)}")
+    if h_out: lines.append(f"      🚑 결장: {', '.join(h_out)}")
+    
+    lines.append(f"   🚌 {v_team}: {batch.log(v_team)}")
+    if v_out: lines.append(f"      🚑 결장: {', '.join(v_out)}")
 
-        gap = abs(h_score - v_score)
-        predicted_winner = h_team if h_score > v_score else v_team
-        
-        print(f"   🔮 예측: {predicted_winner} 승리 (격차: {gap:.2f})")
-        print("=" * 50 + "\n")
+    from uv_model import home_wins  # 점수 계산 단계에서 이미 로드됨
+    gap = abs(h_score - v_score)
+    predicted_winner = h_team if home_wins(h_score, v_score) else v_team
+    
+    lines.append(f"   🔮 예측: {predicted_winner} 승리 (격차: {gap:.2f})")
+    lines.append("=" * 50 + "\n")
 
-        # 슬랙 메시지
-        slack_msg += f"\n[✈️{v_team}] vs [🏠{h_team}]\n"
-        
-        if v_score > h_score:
-            slack_msg += f"UV: *{v_score:.2f}* > {h_score:.2f}\n"
-        else:
-            slack_msg += f"UV: {v_score:.2f} < *{h_score:.2f}*\n"
-        
-        icon = "💪" if gap >= 1.0 else "👉"
+    # 슬랙 메시지
+    slack_part = f"\n[✈️{v_team}] vs [🏠{h_team}]\n"
+    
+    if predicted_winner == v_team:
+        slack_part += f"UV: *{v_score:.2f}* > {h_score:.2f}\n"
+    else:
+        slack_part += f"UV: {v_score:.2f} < *{h_score:.2f}*\n"
+    
+    icon = "💪" if gap >= 1.0 else "👉"
+    
+    if predicted_winner == h_team:
+        slack_part += f"{icon} [🏠{h_team}] 우세 (`+{gap:.2f}`)\n"
+    else:
+        slack_part += f"{icon} [✈️{v_team}] 우세 (`+{gap:.2f}`)\n"
         
-        if predicted_winner == h_team:
-            slack_msg += f"{icon} [🏠{h_team}] 우세 (`+{gap:.2f}`)\n"
-        else:
-            slack_msg += f"{icon} [✈️{v_team}] 우세 (`+{gap:.2f}`)\n"
-            
-        if h_out or v_out:
-            slack_msg += "🚑 주요 결장:\n"
-            if h_out: slack_msg += f"   {h_team}: {', '.join(h_out)}\n"
-            if v_out: slack_msg += f"   {v_team}: {', '.join(v_out)}\n"
-            
-        slack_msg += "--------------------------------\n"
-
-        # DB 저장 (미국 날짜 그대로)
-        actual_winner = None
-        is_correct = None
+    if h_out or v_out:
+        slack_part += "🚑 주요 결장:\n"
+        if h_out: slack_part += f"   {h_team}: {', '.join(h_out)}\n"
+        if v_out: slack_part += f"   {v_team}: {', '.join(v_out)}\n"
         
-        cursor.execute('''
-            INSERT INTO predictions (date, home_team, visit_team, predicted_winner, predicted_gap, actual_winner, is_correct)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (save_date, h_team, v_team, predicted_winner, gap, actual_winner, is_correct))
-        conn.commit()
+    slack_part += "--------------------------------\n"
 
-    conn.close()
+    # DB 저장 대상 (미국 날짜 그대로, 마지막에 한 번에 저장)
+    return "\n".join(lines), slack_part, (h_team, v_team, predicted_winner, gap)
+
+def build_slate_df(team_data):
+    """ 팀별 선수 프레임 -> 슬레이트 전체 프레임 (team 컬럼 포함, 수집된 팀이 없으면 None) """
+    import pandas as pd
+    frames = [df.assign(team=abbr) for abbr, (df, _) in team_data.items() if df is not None]
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+def save_slates(slates, slate_df, snapshot_date=None):
+    """ 날짜별 예측 {date: rows}을 한 트랜잭션으로 교체하고, 선수 스냅샷을 저장합니다.
+    스냅샷은 실제로 수집한 날짜(snapshot_date, 기본값: 첫 날짜) 한 번만 저장합니다.
+    (기간 모드의 미래 날짜에 오늘 로스터를 미리 저장하면 백테스트가 그 날 데이터로 착각함) """
+    dates = list(slates)
+    if snapshot_date is None: snapshot_date = dates[0]
+    label = dates[0] if len(dates) == 1 else f"{dates[0]} ~ {dates[-1]} ({len(dates)}일)"
+    # 예측은 한 트랜잭션으로 교체 (중간 실패 시 기존 데이터 유지)
+    with metrics.span('db_write'):
+        saved = database.replace_predictions_many(slates)
+        print(f"💾 [DB] {label} 예측 {saved}건 저장 완료")
+
+        # 백테스트(backtest.py)용 로스터 스냅샷 (팀 포함, 같은 날짜 재실행 시 교체)
+        if slate_df is not None:
+            written, _ = database.save_daily_stats(slate_df, snapshot_date, replace=True)
+            print(f"💾 [DB] {snapshot_date} 선수 스냅샷 {written}건 저장 완료")
+
+    # 컬럼형 스냅샷 (Arrow, 백테스트/추이 분석용). 실패해도 예측/슬랙 전송은 계속
+    import snapshot_store  # pyarrow
+    if slate_df is not None and snapshot_store.AVAILABLE:
+        try:
+            with metrics.span('snapshot_write'):
+                snapshot_store.save(snapshot_date, slate_df)
+        except Exception as e:
+            print(f"⚠️ Arrow 스냅샷 저장 실패: {e}")
+
+def save_and_report(save_date, prediction_rows, slate_df, slack_msg):
+    """ 하루치 예측/스냅샷 저장 후 슬랙 전송 (동기/비동기 공용) """
+    save_slates({save_date: prediction_rows}, slate_df)
     
     print("🚀 [3/3] 결과 리포트 전송 중...")
     slack_msg += "※ 상세 데이터는 대시보드를 확인하세요."
@@ -337,5 +342,256 @@ def main():
     send_to_slack(slack_msg)
     print("✅ 모든 작업 완료!")
 
+def start_run():
+    """ 시작 배너 + DB 준비. 반환값: 분석 대상 미국 날짜 """
+    print("\n" + "="*60)
+    print("🚀 [1/3] NBA AI 분석 시스템 가동 (미국 현지 날짜 기준)")
+    print("="*60 + "\n")
+    
+    database.get_connection()  # 스키마/마이그레이션 준비
+    team_memo.reset()
+
+    # 한국 시간 기준 내일 경기 (미국 오늘)
+    # [수정] target_date_us(미국 날짜)를 그대로 DB에 저장합니다. (+1일 안함)
+    target_date_us = (datetime.now() - timedelta(hours=14)).strftime("%Y-%m-%d")
+    print(f"📅 분석 대상 날짜 (US Date): {target_date_us}")
+    print(f"🔄 [DB] '{target_date_us}' 데이터 갱신 모드 (중복 제거, 마지막에 일괄 교체)")
+    return target_date_us
+
+def slack_header(save_date):
+    return f"🏀 *NBA AI 승부예측 리포트* ({save_date} US)\n" + "================================\n"
+
+def main():
+    target_date_us = start_run()
+    save_date = target_date_us # 미국 날짜 그대로 사용
+
+    # 1) 슬레이트 매치업 정리
+    matchups = fetch_matchups(target_date_us)
+    if not matchups: return
+
+    slack_msg = slack_header(save_date)
+    print("\n🚀 [2/3] 경기별 정밀 분석 시작...\n")
+
+    # 2) 출전 팀 데이터 병렬 수집 (팀당 1회)
+    slate_teams = [team for _, h_team, v_team in matchups for team in (h_team, v_team)]
+    print(f"📡 {len(set(slate_teams))}개 팀 데이터 병렬 수집 중...")
+    with metrics.span('team_data'):
+        team_data = prefetch_team_stats(slate_teams)
+    print()
+
+    # 3) 슬레이트 전체 팀 점수 일괄 계산 (로그는 출력 시점에 생성)
+    home_teams = {h_team for _, h_team, _ in matchups}
+    slate_df = build_slate_df(team_data)
+    with metrics.span('scoring'):
+        batch = team_memo.score_slate(team_data, home_teams)  # 바뀐 팀만 계산
+    team_memo.print_summary()
+    print()
+
+    # 4) 매치업별 결과 정리
+    prediction_rows = []
+    for game_id, h_team, v_team in matchups:
+        text, slack_part, row = report_matchup(
+            h_team, v_team, team_data.get(h_team, (None, [])), team_data.get(v_team, (None, [])), batch
+        )
+        print(text)
+        if row is None: continue
+        slack_msg += slack_part
+        prediction_rows.append(row)
+
+    save_and_report(save_date, prediction_rows, slate_df, slack_msg)
+
+# -----------------------------------------------------------------------------
+# 4. 비동기 파이프라인 (--async)
+# -----------------------------------------------------------------------------
+async def collect_async(target_date_us, max_workers=MAX_FETCH_WORKERS, bulk=BULK_MODE):
+    """ 일정 / 부상 / 리그 스탯을 동시에 받고, 양 팀 데이터가 도착한 매치업부터 점수를 계산합니다.
+    (nba_api / requests는 동기 라이브러리라 asyncio.to_thread로 감싸서 겹칩니다.)
+    반환값: (매치업 결과 목록, 스냅샷 df) / 경기가 없으면 None """
+    limit = asyncio.Semaphore(max_workers)
+
+    async def in_thread(func, *args):
+        async with limit:
+            return await asyncio.to_thread(func, *args)
+
+    def scrape_injuries():
+        print("   Using Logic -> ESPN 리그 부상자 인덱스 수집 중...")
+        with metrics.span('injury_scrape'):
+            return build_injury_index()
+
+    def fetch_league():
+        with metrics.span('league_fetch'):
+            league = get_league_stats_by_team()
+        if league is None: print("      ⚠️ 벌크 수집 실패 -> 팀별 수집으로 전환")
+        return league
+
+    # 일정과 무관한 리그 단위 수집은 일정 조회와 동시에 시작
+    schedule_task = asyncio.create_task(in_thread(fetch_matchups, target_date_us))
+    injury_task = asyncio.create_task(in_thread(scrape_injuries))
+    league_task = asyncio.create_task(in_thread(fetch_league)) if bulk else None
+
+    matchups = await schedule_task
+    if not matchups:
+        await asyncio.gather(injury_task, *([league_task] if league_task else []), return_exceptions=True)
+        return None
+
+    print("\n🚀 [2/3] 경기별 정밀 분석 시작...\n")
+    unique_teams = sorted({team for _, h_team, v_team in matchups for team in (h_team, v_team)})
+    print(f"📡 {len(unique_teams)}개 팀 데이터 비동기 수집 중...")
+
+    async def team_task(abbr):
+        injury_index = await injury_task
+        league = await league_task if league_task else None
+        try:
+            return await in_thread(fetch_team, abbr, league, injury_index)
+        except Exception as e:
+            print(f"      ❌ {abbr} 수집 실패: {e}")
+            return None, []
+
+    team_tasks = {abbr: asyncio.create_task(team_task(abbr)) for abbr in unique_teams}
+
+    async def matchup_task(h_team, v_team):
+        h_entry, v_entry = await team_tasks[h_team], await team_tasks[v_team]
+        frames = [df.assign(team=abbr) for abbr, (df, _) in ((h_team, h_entry), (v_team, v_entry)) if df is not None]
+        batch = None
+        if len(frames) == 2:
+            # 팀 점수는 팀끼리 독립 -> 두 팀만 계산해도 슬레이트 일괄 계산과 같은 값
+            with metrics.span('scoring'):
+                batch = team_memo.score_slate({h_team: h_entry, v_team: v_entry}, {h_team})
+        return report_matchup(h_team, v_team, h_entry, v_entry, batch)
+
+    with metrics.span('team_data'):
+        matchup_tasks = [asyncio.create_task(matchup_task(h_team, v_team)) for _, h_team, v_team in matchups]
+
+        # 일정 순서대로, 끝난 매치업부터 바로 출력
+        print()
+        reports = []
+        for task in matchup_tasks:
+            text, slack_part, row = await task
+            print(text)
+            reports.append((slack_part, row))
+
+    team_data = {abbr: task.result() for abbr, task in team_tasks.items()}
+    slate_df = build_slate_df(team_data)
+    return reports, slate_df
+
+def main_async():
+    """ 비동기 파이프라인 실행. 수집/계산 단계에서 실패하면 False (-> 동기 경로로 재실행)
+    DB 저장과 슬랙 전송은 동기 경로와 같은 save_and_report()를 한 번만 호출합니다. """
+    target_date_us = start_run()
+    save_date = target_date_us
+
+    try:
+        collected = asyncio.run(collect_async(target_date_us))
+    except Exception as e:
+        print(f"⚠️ 비동기 파이프라인 실패 -> 동기 모드로 전환: {e}")
+        return False
+    if collected is None: return True
+
+    reports, slate_df = collected
+    team_memo.print_summary()
+    print()
+    slack_msg = slack_header(save_date)
+    prediction_rows = []
+    for slack_part, row in reports:
+        if row is None: continue
+        slack_msg += slack_part
+        prediction_rows.append(row)
+
+    save_and_report(save_date, prediction_rows, slate_df, slack_msg)
+    return True
+
+# -----------------------------------------------------------------------------
+# 5. 기간 모드 (--days N)
+# -----------------------------------------------------------------------------
+def score_range(slates, team_data):
+    """ 기간 전체 매치업을 한 번의 score_teams()로 계산합니다.
+    팀 데이터는 기간 내내 같으므로 (팀, 홈/원정) 조합만 계산하면 됩니다.
+    반환값: {date: SlateScores} """
+    needed = {(team, side) for matchups in slates.values()
+              for _, h_team, v_team in matchups for team, side in ((h_team, 'H'), (v_team, 'A'))}
+    present = [(team, side) for team, side in sorted(needed) if team_data.get(team, (None, []))[0] is not None]
+    frames = [team_data[team][0].assign(team=f"{team}|{side}") for team, side in present]
+    import pandas as pd
+    from uv_model import score_teams
+    batch = (score_teams(pd.concat(frames, ignore_index=True), {f"{team}|H" for team, _ in needed},
+                         teams=[f"{team}|{side}" for team, side in present]) if frames else None)
+
+    scores = {}
+    for date, matchups in slates.items():
+        entries = {}
+        for _, h_team, v_team in matchups:
+            for team, side in ((h_team, 'H'), (v_team, 'A')):
+                key = f"{team}|{side}"
+                if batch is not None and key in batch.scores.index:
+                    entries[team] = (batch.score(key), batch.log(key))
+        scores[date] = team_memo.SlateScores(entries)
+    return scores
+
+def main_range(days):
+    """ 오늘(미국 날짜)부터 days일 동안의 경기를 한 번에 예측합니다.
+    일정은 날짜별로 조회하고, 팀 데이터 수집 / 점수 계산 / DB 저장 / 슬랙 전송은 기간 전체에 한 번씩 """
+    first_date = datetime.strptime(start_run(), "%Y-%m-%d")
+    dates = [(first_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    print(f"📆 기간 모드: {dates[0]} ~ {dates[-1]} ({days}일)")
+
+    # 1) 기간 내 일정 (날짜별 조회는 병렬, 속도 제한은 rate_limiter가 담당)
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_FETCH_WORKERS, days))) as executor:
+        schedules = dict(zip(dates, executor.map(fetch_matchups, dates)))
+    slates = {date: matchups for date, matchups in schedules.items() if matchups}
+    if not slates:
+        print("❌ 기간 내 예정된 경기가 없습니다.")
+        return
+
+    print("\n🚀 [2/3] 경기별 정밀 분석 시작...\n")
+
+    # 2) 기간 전체 출전 팀 데이터 1회 수집
+    slate_teams = [team for matchups in slates.values() for _, h_team, v_team in matchups for team in (h_team, v_team)]
+    print(f"📡 {len(slates)}일 {sum(len(m) for m in slates.values())}경기 / {len(set(slate_teams))}개 팀 데이터 병렬 수집 중...")
+    with metrics.span('team_data'):
+        team_data = prefetch_team_stats(slate_teams)
+    print()
+
+    # 3) 기간 전체 점수 일괄 계산
+    with metrics.span('scoring'):
+        scores = score_range(slates, team_data)
+    slate_df = build_slate_df(team_data)
+
+    # 4) 날짜별 결과 정리
+    slack_msg = ""
+    prediction_rows = {}
+    for date, matchups in slates.items():
+        print(f"📅 {date} ({len(matchups)}경기)\n")
+        slack_msg += slack_header(date)
+        prediction_rows[date] = []
+        for game_id, h_team, v_team in matchups:
+            text, slack_part, row = report_matchup(
+                h_team, v_team, team_data.get(h_team, (None, [])), team_data.get(v_team, (None, [])), scores[date]
+            )
+            print(text)
+            if row is None: continue
+            slack_msg += slack_part
+            prediction_rows[date].append(row)
+        slack_msg += "\n"
+
+    save_slates(prediction_rows, slate_df, snapshot_date=dates[0])  # 스냅샷은 실행 당일만
+
+    print("🚀 [3/3] 결과 리포트 전송 중...")
+    send_to_slack(slack_msg + "※ 상세 데이터는 대시보드를 확인하세요.")
+    print("✅ 모든 작업 완료!")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="NBA UV 승부 예측")
+    parser.add_argument("--no-cache", action="store_true", help="API 응답 캐시 읽기를 건너뜀")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="비동기 파이프라인")
+    parser.add_argument("--days", type=int, default=1, help="오늘부터 N일 치 경기를 한 번에 예측 (기간 모드)")
+    args = parser.parse_args()
+
+    if args.no_cache: api_cache.BYPASS = True
+    try:
+        with metrics.span('total'):
+            if args.days > 1:
+                main_range(args.days)
+            elif not args.use_async or not main_async():
+                main()
+    finally:
+        metrics.flush('run_nba')
\ No newline at end of file
@@ -0,0 +1,351 @@
+"""
+================================================================================
+[파일명: slack_outbox.py] - 슬랙 전송 대기열 (SQLite outbox + 백그라운드 전송)
+================================================================================
+
+[역할]
+1. 대기열 등록 (파이프라인 쪽):
+   - 리포트를 로컬 SQLite 파일('slack_outbox.db')에 저장만 하고 바로 반환합니다.
+     -> 예측/채점 실행이 슬랙 응답을 기다리며 멈추지 않습니다.
+   - 저장 후 전송 워커를 별도 프로세스로 띄웁니다. (실행이 끝나도 워커는 계속 전송)
+
+2. 메시지 분할:
+   - 슬랙 본문 권장 길이(약 4,000자)를 넘는 리포트는 줄 단위로 나눠 저장합니다.
+   - 첫 조각은 채널에, 나머지 조각은 첫 조각의 스레드 답글로 순서대로 보냅니다.
+
+3. 전송 워커:
+   - 429(Retry-After) / 5xx / 연결 오류 / 슬랙 'ratelimited' 응답은 다음 시도 시각을 DB에 기록하고 재시도
+     (Retry-After가 있으면 그대로, 없으면 지수 백오프)
+   - 토큰 오류 / 채널 없음 등 영구 오류나 최대 시도 횟수를 넘으면 'failed'로 남깁니다. (--status로 확인)
+   - 전송 못 한 메시지는 DB에 남아 있어 다음 실행의 워커(또는 수동 실행)가 이어서 보냅니다.
+   - 여러 워커가 동시에 떠도 조각마다 선점(claim) 후 보내므로 중복 전송하지 않습니다.
+
+4. 설정 (환경변수):
+   - NBA_SLACK_API_URL : 슬랙 API 주소 (기본 https://slack.com/api, 로컬 스텁 서버 테스트용)
+   - NBA_SLACK_DELIVERY: background(기본, 별도 프로세스) / inline(현재 프로세스에서 바로 전송) / off(등록만)
+   - NBA_OUTBOX_PATH   : 대기열 DB 경로
+
+[주요 함수]
+- send(text, source): 대기열 등록 + 전송 워커 시작 (파이프라인에서 호출)
+- enqueue(text, channel, source): 조각으로 나눠 대기열에 저장
+- deliver(max_seconds): 대기 중인 메시지 전송 (워커 본체)
+- split_text(text, limit): 줄 단위 분할
+
+[사용법]
+python slack_outbox.py                 # 대기 중인 메시지 전송 (cron 등에서 수동 재시도)
+python slack_outbox.py --status        # 대기/실패 현황
+python slack_outbox.py --retry-failed  # 실패 메시지를 다시 대기열로
+================================================================================
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import config
+import metrics
+import rate_limiter
+
+# -----------------------------------------------------------------------------
+# 1. 설정
+# -----------------------------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTBOX_PATH = os.environ.get("NBA_OUTBOX_PATH", os.path.join(BASE_DIR, "slack_outbox.db"))
+LOG_PATH = os.path.join(BASE_DIR, "slack_outbox.log")  # 백그라운드 워커 출력
+API_URL = os.environ.get("NBA_SLACK_API_URL", "https://slack.com/api").rstrip('/')
+DELIVERY = os.environ.get("NBA_SLACK_DELIVERY", "background")  # background / inline / off
+
+MAX_CHARS = 3500            # 조각당 최대 글자 수 (슬랙 권장 4,000자 - 이어짐 표시 여유)
+MAX_ATTEMPTS = 8            # 조각당 최대 시도 횟수 (넘으면 failed)
+RETRY_CAP = 300.0           # 재시도 간격 상한 (초)
+WORKER_MAX_SECONDS = 900    # 워커 1회 실행 상한 (남은 메시지는 다음 워커가 이어서)
+CLAIM_TIMEOUT = 120         # 선점 후 이 시간이 지나도 결과가 없으면 (워커 종료 등) 다시 대기 상태로
+POST_TIMEOUT = 10
+IDLE_POLL = 1.0             # 보낼 수 있는 조각은 없는데 대기열이 남았을 때 확인 간격 (앞 조각을 다른 워커가 전송 중 등)
+
+# 슬랙 API 오류 중 재시도할 것 (그 외 invalid_auth / channel_not_found 등은 영구 오류)
+RETRY_ERRORS = {'ratelimited', 'internal_error', 'fatal_error', 'service_unavailable', 'request_timeout'}
+
+_lock = threading.Lock()
+_conn = None
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(OUTBOX_PATH, check_same_thread=False, isolation_level=None, timeout=10)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA busy_timeout=10000")  # 파이프라인과 워커 프로세스가 같은 파일을 씀
+        _conn.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id TEXT,
+            seq INTEGER,
+            total INTEGER,
+            channel TEXT,
+            text TEXT,
+            source TEXT,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL,
+            claimed_at REAL,
+            ts TEXT,
+            last_error TEXT,
+            created_at REAL,
+            sent_at REAL
+        )
+        ''')
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, next_attempt_at)")
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_message ON outbox(message_id, seq)")
+    return _conn
+
+def default_channel():
+    return config.SLACK_REAL_CHANNEL_ID if config.MODE == "REAL" else config.SLACK_TEST_CHANNEL_ID
+
+# -----------------------------------------------------------------------------
+# 2. 대기열 등록
+# -----------------------------------------------------------------------------
+def split_text(text, limit=MAX_CHARS):
+    """ 줄 단위로 limit 글자 이하 조각으로 나눕니다. (한 줄이 limit보다 길면 그 줄만 잘라서) """
+    chunks, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            if current: chunks.append(current); current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current.strip() or not chunks: chunks.append(current)
+    return chunks
+
+def enqueue(text, channel=None, source=None):
+    """ 메시지를 조각으로 나눠 대기열에 저장합니다. 반환값: (message_id, 조각 수) """
+    chunks = split_text(text)
+    total = len(chunks)
+    if total > 1:
+        chunks = [chunk if i == 0 else f"(이어서 {i + 1}/{total})\n{chunk}" for i, chunk in enumerate(chunks)]
+    message_id = uuid.uuid4().hex[:12]
+    now = time.time()
+    with _lock:
+        conn = _get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany('''
+        INSERT INTO outbox (message_id, seq, total, channel, text, source, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(message_id, seq, total, channel or default_channel(), chunk, source, now, now)
+              for seq, chunk in enumerate(chunks)])
+        conn.execute("COMMIT")
+    metrics.incr('slack_enqueued', total)
+    return message_id, total
+
+def start_worker():
+    """ 전송 워커를 별도 프로세스로 시작합니다. (부모 실행이 끝나도 계속 전송) """
+    with open(LOG_PATH, 'a') as log:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__)], cwd=BASE_DIR,
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True)
+
+def send(text, source=None):
+    """ 파이프라인용: 대기열 등록 후 바로 반환 (전송은 NBA_SLACK_DELIVERY 방식대로) """
+    try:
+        _, total = enqueue(text, source=source)
+    except Exception as e:
+        metrics.incr('slack_errors')
+        print(f"❌ 슬랙 대기열 등록 실패: {e}")
+        return
+    suffix = f" ({total}개 조각, 스레드로 이어서 전송)" if total > 1 else ""
+
+    if DELIVERY == 'inline':
+        sent, failed, pending = deliver()
+        print(f"{'✅' if not failed and not pending else '⚠️'} 슬랙 전송 {sent}건 / 실패 {failed}건 / 대기 {pending}건{suffix}")
+        return
+    if DELIVERY != 'background':
+        print(f"📮 슬랙 메시지 대기열 등록 완료{suffix} -> 'python slack_outbox.py' 실행 시 전송")
+        return
+    try:
+        start_worker()
+    except Exception as e:
+        print(f"⚠️ 슬랙 전송 워커 시작 실패: {e} -> 다음 실행 때 이어서 전송합니다.")
+        return
+    print(f"📮 슬랙 메시지 대기열 등록 완료{suffix} -> 백그라운드 전송")
+
+# -----------------------------------------------------------------------------
+# 3. 전송 워커
+# -----------------------------------------------------------------------------
+def _release_stale(conn, now):
+    """ 선점한 채로 멈춘 조각(워커 강제 종료 등)을 다시 대기 상태로 """
+    conn.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?",
+                 (now - CLAIM_TIMEOUT,))
+
+# 보낼 차례인 조각: 대기 중이고, 같은 메시지의 앞 조각이 모두 전송된 조각
+READY = '''o.status = 'pending'
+  AND NOT EXISTS (SELECT 1 FROM outbox p WHERE p.message_id = o.message_id AND p.seq < o.seq AND p.status != 'sent')'''
+
+def _claim_next(now):
+    """ 보낼 차례인 조각 중 시도 시각이 된 1개를 선점합니다. """
+    with _lock:
+        conn = _get_conn()
+        while True:
+            row = conn.execute(f'''
+            SELECT o.id, o.message_id, o.seq, o.channel, o.text, o.attempts,
+                   (SELECT p.ts FROM outbox p WHERE p.message_id = o.message_id AND p.seq = 0)
+            FROM outbox o
+            WHERE {READY} AND o.next_attempt_at <= ?
+            ORDER BY o.id LIMIT 1
+            ''', (now,)).fetchone()
+            if row is None: return None
+            claimed = conn.execute("UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ? AND status = 'pending'",
+                                   (now, row[0])).rowcount
+            if claimed: return row  # 다른 워커가 먼저 가져갔으면 다음 조각 조회
+
+def _next_due(now):
+    """ 다음 확인까지 기다릴 초 (대기 중인 조각이 없으면 None)
+    보낼 차례인 조각의 다음 시도 시각만 봅니다. 뒤 조각은 시각이 됐어도 앞 조각(재시도 대기)을 기다려야 함.
+    보낼 차례인 조각이 없으면 (앞 조각을 다른 워커가 전송 중) IDLE_POLL 뒤 다시 확인 """
+    with _lock:
+        conn = _get_conn()
+        _release_stale(conn, now)
+        due = conn.execute(f"SELECT MIN(o.next_attempt_at) FROM outbox o WHERE {READY}").fetchone()[0]
+        if due is None:
+            waiting = conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+            return IDLE_POLL if waiting else None
+    return max(due - now, 0.0)
+
+def _post(channel, text, thread_ts=None):
+    """ chat.postMessage 1회 전송. 반환값: ('sent', ts) / ('retry', 대기 초) / ('failed', None) + 오류 메시지 """
+    import requests
+    url = f"{API_URL}/chat.postMessage"
+    host = urlparse(url).hostname
+    payload = {"channel": channel, "text": text}
+    if thread_ts: payload["thread_ts"] = thread_ts
+    headers = {"Authorization": f"Bearer {config.SLACK_BOT_TOKEN}", "Content-Type": "application/json; charset=utf-8"}
+
+    rate_limiter.bucket(host).acquire()
+    try:
+        with metrics.span('slack_post'):
+            res = rate_limiter.get_session(host).post(url, headers=headers, json=payload, timeout=POST_TIMEOUT)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        return 'retry', None, str(e)
+
+    retry_after = rate_limiter.parse_retry_after(res.headers.get('Retry-After'))
+    if res.status_code in rate_limiter.RETRY_STATUS:
+        return 'retry', retry_after, f"HTTP {res.status_code}"
+    try:
+        body = res.json()
+    except ValueError:
+        return ('retry' if res.status_code >= 500 else 'failed'), None, f"HTTP {res.status_code} (JSON 아님)"
+    if body.get('ok'):
+        return 'sent', body.get('ts'), None
+    error = body.get('error') or f"HTTP {res.status_code}"
+    return ('retry' if error in RETRY_ERRORS else 'failed'), retry_after, error
+
+def _finish(row_id, message_id, seq, attempts, outcome, value, error, now):
+    with _lock:
+        conn = _get_conn()
+        if outcome == 'sent':
+            conn.execute("UPDATE outbox SET status = 'sent', ts = ?, attempts = ?, sent_at = ?, last_error = NULL WHERE id = ?",
+                         (value, attempts, now, row_id))
+        elif outcome == 'retry' and attempts < MAX_ATTEMPTS:
+            delay = min(value if value is not None else rate_limiter.backoff_delay(attempts), RETRY_CAP)
+            conn.execute("UPDATE outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                         (attempts, now + delay, error, row_id))
+            return delay
+        else:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                         (attempts, error, row_id))
+            # 앞 조각이 실패하면 뒤 조각(스레드 답글)은 보낼 수 없음
+            conn.execute("UPDATE outbox SET status = 'failed', last_error = ? WHERE message_id = ? AND seq > ? AND status = 'pending'",
+                         (f"앞 조각 전송 실패 ({error})", message_id, seq))
+            conn.execute("COMMIT")
+    return None
+
+def deliver(max_seconds=WORKER_MAX_SECONDS):
+    """ 대기 중인 조각을 순서대로 전송합니다. 다음 시도 시각이 남았으면 기다렸다가 보냅니다.
+    max_seconds 안에 못 보낸 조각은 대기열에 남습니다. 반환값: (전송, 실패, 남은 대기) 조각 수 """
+    deadline = time.monotonic() + max_seconds
+    sent = failed = 0
+    with _lock:
+        _release_stale(_get_conn(), time.time())
+
+    while True:
+        now = time.time()
+        row = _claim_next(now)
+        if row is None:
+            wait = _next_due(now)
+            if wait is None or time.monotonic() + wait > deadline: break
+            time.sleep(wait)
+            continue
+
+        row_id, message_id, seq, channel, text, attempts, thread_ts = row
+        outcome, value, error = _post(channel, text, thread_ts if seq > 0 else None)
+        retry_in = _finish(row_id, message_id, seq, attempts + 1, outcome, value, error, time.time())
+        if outcome == 'sent':
+            sent += 1
+            metrics.incr('slack_sent')
+        elif retry_in is not None:
+            metrics.incr('slack_retries')
+            print(f"      ⚠️ 슬랙 전송 실패 ({attempts + 1}/{MAX_ATTEMPTS}): {error} -> {retry_in:.1f}초 후 재시도")
+        else:
+            failed += 1
+            metrics.incr('slack_errors')
+            print(f"❌ 슬랙 전송 실패 (메시지 {message_id} {seq + 1}번째 조각): {error}")
+
+    with _lock:
+        pending = _get_conn().execute("SELECT COUNT(*) FROM outbox WHERE status IN ('pending', 'sending')").fetchone()[0]
+    return sent, failed, pending
+
+# -----------------------------------------------------------------------------
+# 4. 현황 / 실행
+# -----------------------------------------------------------------------------
+def status_counts():
+    with _lock:
+        return dict(_get_conn().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+def retry_failed():
+    """ 실패한 조각을 다시 대기열로 (시도 횟수 초기화). 반환값: 되돌린 조각 수 """
+    with _lock:
+        return _get_conn().execute('''
+        UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ?, last_error = NULL
+        WHERE status = 'failed'
+        ''', (time.time(),)).rowcount
+
+def print_status():
+    counts = status_counts()
+    print(f"📮 슬랙 대기열: 대기 {counts.get('pending', 0)} / 전송 중 {counts.get('sending', 0)} / "
+          f"완료 {counts.get('sent', 0)} / 실패 {counts.get('failed', 0)} (조각 기준)")
+    with _lock:
+        rows = _get_conn().execute('''
+        SELECT message_id, seq, total, source, attempts, last_error, datetime(created_at, 'unixepoch', 'localtime')
+        FROM outbox WHERE status IN ('pending', 'failed') AND last_error IS NOT NULL
+        ORDER BY id DESC LIMIT 20
+        ''').fetchall()
+    for message_id, seq, total, source, attempts, error, created in rows:
+        print(f"   - {created} [{source or '-'}] {message_id} {seq + 1}/{total} (시도 {attempts}회): {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="슬랙 전송 대기열")
+    parser.add_argument("--status", action="store_true", help="대기/실패 현황 출력")
+    parser.add_argument("--retry-failed", action="store_true", help="실패한 메시지를 다시 대기열로")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+        return
+    if args.retry_failed:
+        print(f"🔁 실패 조각 {retry_failed()}개를 다시 대기열에 넣었습니다.")
+
+    print(f"📤 {time.strftime('%Y-%m-%d %H:%M:%S')} 슬랙 전송 워커 시작")
+    try:
+        sent, failed, pending = deliver()
+        print(f"✅ 전송 {sent}건 / 실패 {failed}건 / 남은 대기 {pending}건")
+    finally:
+        metrics.flush('slack_outbox')
+
+if __name__ == "__main__":
+    main()
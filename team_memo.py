@@ -0,0 +1,157 @@
+"""
+================================================================================
+[파일명: team_memo.py] - 팀 단위 결과 재사용 (입력 해시 메모이제이션)
+================================================================================
+
+[역할]
+1. 경기 당일 여러 번 실행할 때(오전 / 부상 소식 후 / 경기 직전) 바뀌지 않은 팀은
+   병합 / 부상자 이름 매칭(fuzzy) / 점수 계산을 다시 하지 않습니다.
+
+2. 두 단계로 저장합니다. (api_cache.db에 함께 저장, 키 = 입력 내용 해시)
+   - team_roster: 팀 스탯 행 + 포지션/로스터 행 + 부상자 목록 -> 출전 상태가 붙은 선수 프레임 + 결장 명단
+   - team_score : 선수 프레임 + 홈 여부 + 모델 상수 -> 점수 + 로그 문자열
+   -> 입력이 한 글자라도 바뀌면 해시가 달라져 새로 계산합니다. (만료 대기 없음)
+   -> uv_model 상수를 바꾸면 점수 해시도 바뀌어 자동으로 다시 계산됩니다.
+
+3. 실행마다 어떤 팀이 바뀌었는지(다시 계산했는지) 기록하고 출력합니다.
+   - '--no-cache' 실행 시에는 api_cache와 함께 메모도 건너뛰고 모두 다시 계산합니다.
+
+[주요 함수]
+- fingerprint(*parts): DataFrame / 리스트 / 값 묶음의 내용 해시
+- memo_roster(abbr, parts, build): 선수 프레임 메모 (build()는 미적중 시에만 호출)
+- score_slate(team_data, home_teams): 바뀐 팀만 score_teams()로 계산 (SlateScores)
+- print_summary(): 이번 실행에서 바뀐 팀 / 재사용한 팀 출력
+================================================================================
+"""
+import hashlib
+import json
+import threading
+import api_cache
+
+# -----------------------------------------------------------------------------
+# 1. 설정
+# -----------------------------------------------------------------------------
+MEMO_VERSION = 1  # 선수 프레임/점수 계산 로직이 바뀌면 올림 (기존 메모 무효화)
+MODEL_CONSTANTS = ['UV_SLOPE', 'UV_PIVOT', 'UV_MIN', 'UV_MAX', 'REPLACEMENT_VALUE',
+                   'FLOOR_MINUTES', 'HOME_BONUS', 'USG_THRESHOLD', 'USG_PENALTY']
+
+_lock = threading.Lock()
+_changed = {}  # 단계 -> 이번 실행에서 다시 계산한 팀
+_reused = {}   # 단계 -> 이번 실행에서 메모를 쓴 팀
+
+def fingerprint(*parts):
+    """ 내용 해시 (DataFrame은 컬럼 이름 + 행 값, 나머지는 정렬된 JSON) """
+    import pandas as pd
+    digest = hashlib.sha1(str(MEMO_VERSION).encode())
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(json.dumps([str(c) for c in part.columns]).encode())
+            digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+def _record(stage, abbr, changed):
+    with _lock:
+        (_changed if changed else _reused).setdefault(stage, set()).add(abbr)
+
+def _memo(stage, abbr, key, build):
+    """ api_cache에 stage 이름으로 저장. 미적중이면 build() 결과를 저장하고 변경으로 기록 """
+    built = []
+    def loader():
+        built.append(True)
+        return build()
+    value = api_cache.cached(stage, {'team': abbr, 'key': key}, loader)
+    _record(stage, abbr, bool(built))
+    return value
+
+# -----------------------------------------------------------------------------
+# 2. 선수 프레임 (병합 + 부상자 매칭)
+# -----------------------------------------------------------------------------
+def _frame_to_json(df):
+    return {'columns': list(df.columns), 'data': df.to_numpy().tolist()}
+
+def _frame_from_json(value):
+    import pandas as pd
+    return pd.DataFrame(value['data'], columns=value['columns']).infer_objects()
+
+def memo_roster(abbr, parts, build):
+    """ parts: 팀 입력 (스탯 행, 포지션/로스터 행, 부상자 목록 ...)
+    build(): (df, out_players) 를 만드는 함수 (입력이 바뀌었을 때만 호출)
+    반환값: (df, out_players) """
+    def build_json():
+        df, out_players = build()
+        return {'frame': _frame_to_json(df), 'out': out_players}
+
+    value = _memo('team_roster', abbr, fingerprint(*parts), build_json)
+    return _frame_from_json(value['frame']), value['out']
+
+# -----------------------------------------------------------------------------
+# 3. 점수
+# -----------------------------------------------------------------------------
+class SlateScores:
+    """ 팀별 (점수, 로그). BatchScores와 같은 score()/log() 인터페이스 """
+
+    def __init__(self, entries):
+        self.entries = entries  # 팀 약어 -> (score, log)
+
+    def score(self, team):
+        return self.entries[team][0]
+
+    def log(self, team):
+        return self.entries[team][1]
+
+def model_constants():
+    import uv_model
+    return {name: getattr(uv_model, name) for name in MODEL_CONSTANTS}
+
+def score_slate(team_data, home_teams):
+    """ team_data: {팀 약어: (df, out_players)} / home_teams: 홈 팀 약어 목록
+    메모에 없는 팀만 모아 score_teams()로 한 번에 계산합니다. (팀 점수는 팀끼리 독립)
+    반환값: SlateScores (df가 None인 팀은 제외) """
+    import pandas as pd
+    import uv_model
+    home_teams = set(home_teams)
+    constants = model_constants()
+    keys = {abbr: fingerprint(df, abbr in home_teams, constants)
+            for abbr, (df, _) in team_data.items() if df is not None}
+
+    entries = {}
+    for abbr, key in keys.items():
+        value = api_cache.get('team_score', {'team': abbr, 'key': key})
+        if value is not None:
+            entries[abbr] = tuple(value)
+            _record('team_score', abbr, False)
+
+    changed = [abbr for abbr in keys if abbr not in entries]
+    if changed:
+        players = pd.concat([team_data[abbr][0].assign(team=abbr) for abbr in changed], ignore_index=True)
+        batch = uv_model.score_teams(players, home_teams & set(changed), teams=changed)
+        for abbr in changed:
+            entries[abbr] = (batch.score(abbr), batch.log(abbr))
+            api_cache.put('team_score', {'team': abbr, 'key': keys[abbr]}, list(entries[abbr]),
+                          api_cache.TTL['team_score'])
+            _record('team_score', abbr, True)
+    return SlateScores(entries)
+
+# -----------------------------------------------------------------------------
+# 4. 리포트
+# -----------------------------------------------------------------------------
+def reset():
+    with _lock:
+        _changed.clear()
+        _reused.clear()
+
+def changed_teams():
+    """ 이번 실행에서 선수 프레임 또는 점수를 다시 계산한 팀 """
+    with _lock:
+        return sorted(set().union(*_changed.values()))
+
+def print_summary():
+    with _lock:
+        changed = sorted(set().union(*_changed.values()))
+        reused = sorted(set().union(*_reused.values()) - set(changed))
+    if not changed and not reused: return
+    print(f"🧠 [메모] 변경된 팀 {len(changed)}개: {', '.join(changed) if changed else '없음'}")
+    if reused: print(f"   -> 변경 없음(이전 결과 재사용) {len(reused)}개: {', '.join(reused)}")
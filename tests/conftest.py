@@ -0,0 +1,31 @@
+"""
+테스트 공용 설정
+- 저장소 루트를 import 경로에 추가합니다.
+- config.py(슬랙 토큰 등 비공개 설정)는 저장소에 없으므로, 없으면 테스트용 값으로 대신합니다.
+- 모든 테스트는 임시 폴더의 DB / 대기열 파일을 씁니다. (실제 nba_data.db 보호)
+"""
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    sys.modules['config'] = types.SimpleNamespace(
+        SLACK_BOT_TOKEN="xoxb-test", MODE="TEST", SLACK_REAL_CHANNEL_ID="C-REAL", SLACK_TEST_CHANNEL_ID="C-TEST")
+
+import pytest
+
+import database
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """ database 공용 연결을 임시 DB로 전환 (테스트가 끝나면 닫음) """
+    database.close_connection()
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / "nba_data.db"))
+    database.get_connection()
+    yield database
+    database.close_connection()
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+import backtest
+import uv_model
+
+TEAMS = ['ATL', 'BOS', 'CHI', 'DAL', 'DEN', 'GSW', 'LAL', 'MIA']
+
+def synthetic_season(rng, n_dates=20):
+    players, games = [], []
+    for day in range(n_dates):
+        date = f"2026-01-{day + 1:02d}"
+        for team in TEAMS:
+            size = int(rng.integers(6, 14))
+            players.append(pd.DataFrame({
+                'date': date, 'team': team, 'player_name': [f"{team}{i}" for i in range(size)],
+                'availability': rng.choice(['OK', 'OK', 'OK', 'Out'], size),
+                'pos': rng.choice(['G', 'F', 'C'], size),
+                'min': rng.uniform(5, 38, size).round(1),
+                'pie': rng.normal(0.09, 0.04, size),
+                'usg_pct': rng.uniform(0.1, 0.35, size),
+            }))
+        order = rng.permutation(TEAMS)
+        for home, visit in zip(order[0::2], order[1::2]):
+            games.append({'date': date, 'home_team': home, 'visit_team': visit,
+                          'predicted_winner': home, 'actual_winner': rng.choice([home, visit])})
+    return pd.concat(players, ignore_index=True), pd.DataFrame(games)
+
+def test_sweep_at_current_constants_matches_replay():
+    players, games = synthetic_season(np.random.default_rng(11))
+    replayed = backtest.replay(players, games)
+    replay_correct = int((replayed['replay_winner'] == replayed['actual_winner']).sum())
+
+    grid = {name: [getattr(uv_model, name)] for name in backtest.SWEEP_GRID}
+    surface = backtest.sweep_accuracy(backtest.prepare_sweep_inputs(players, games), grid)
+    assert len(surface) == 1
+    assert int(surface['correct'].iloc[0]) == replay_correct
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+import check_results
+
+DATE = "2026-10-20"
+ABBR_TO_ID = {abbr: int(team_id) for team_id, abbr in check_results.TEAMS.items()}
+
+def scoreboard(games):
+    """ games: [(game_id, home, visit, status_id, status_text, home_pts, visit_pts)] """
+    header = pd.DataFrame([{
+        'GAME_ID': gid, 'HOME_TEAM_ID': ABBR_TO_ID[home], 'VISITOR_TEAM_ID': ABBR_TO_ID[visit],
+        'GAME_STATUS_ID': status, 'GAME_STATUS_TEXT': text, 'LIVE_PERIOD': 4 if status == 3 else 0,
+    } for gid, home, visit, status, text, _, _ in games])
+    lines = pd.DataFrame([{'GAME_ID': gid, 'TEAM_ID': ABBR_TO_ID[team], 'PTS': pts}
+                          for gid, home, visit, _, _, h_pts, v_pts in games
+                          for team, pts in ((home, h_pts), (visit, v_pts))])
+    return header, lines
+
+@pytest.fixture
+def slate(temp_db, monkeypatch):
+    temp_db.replace_predictions(DATE, [('LAL', 'BOS', 'LAL', 1.2), ('GSW', 'DEN', 'DEN', 0.4)])
+    sleeps = []
+    monkeypatch.setattr(check_results.time, 'sleep', sleeps.append)
+    return sleeps
+
+def serve(monkeypatch, polls):
+    """ 확인할 때마다 다음 스코어보드를 돌려줌. 준비한 것보다 더 확인하면 실패 (watch가 끝나지 않음) """
+    def fetch(date, refresh=False):
+        return next(polls, None) or pytest.fail("watch가 종료되지 않고 계속 확인함")
+    monkeypatch.setattr(check_results, 'fetch_scoreboard', fetch)
+
+def graded():
+    rows = check_results.load_rows(DATE)
+    return {(home, visit): actual for _, home, visit, _, actual in rows}
+
+def test_watch_marks_game_missing_from_scoreboard_postponed(slate, monkeypatch):
+    # GSW-DEN 경기가 다른 날짜로 옮겨져 스코어보드에서 사라짐
+    polls = iter([
+        scoreboard([('G1', 'LAL', 'BOS', 2, 'Q3', 80, 70)]),
+        scoreboard([('G1', 'LAL', 'BOS', 3, 'Final', 110, 100)]),
+    ])
+    serve(monkeypatch, polls)
+    check_results.watch(DATE)
+
+    assert graded() == {('LAL', 'BOS'): 'LAL', ('GSW', 'DEN'): 'Postponed'}
+    assert slate == [check_results.POLL_LIVE]  # 두 번째 확인에서 바로 종료
+
+def test_watch_waits_when_scoreboard_is_empty(slate, monkeypatch):
+    # 빈 스코어보드는 '경기 없음'으로 단정하지 않음 (다음 확인에서 결과 반영)
+    polls = iter([
+        scoreboard([]),
+        scoreboard([('G1', 'LAL', 'BOS', 3, 'Final', 99, 101), ('G2', 'GSW', 'DEN', 3, 'Final', 120, 100)]),
+    ])
+    serve(monkeypatch, polls)
+    check_results.watch(DATE)
+
+    assert graded() == {('LAL', 'BOS'): 'BOS', ('GSW', 'DEN'): 'GSW'}
+    assert slate == [check_results.POLL_IDLE]
+
+def fail_always(monkeypatch):
+    calls = []
+    def fetch(date, refresh=False):
+        calls.append(date)
+        if len(calls) > 1000: pytest.fail("watch가 종료되지 않고 계속 확인함")
+        raise ConnectionError("stats.nba.com timeout")
+    monkeypatch.setattr(check_results, 'fetch_scoreboard', fetch)
+    return calls
+
+def test_watch_stops_after_repeated_fetch_failures(slate, monkeypatch):
+    calls = fail_always(monkeypatch)
+    check_results.watch(DATE)
+
+    assert len(calls) == check_results.WATCH_MAX_FAILURES
+    assert graded() == {('LAL', 'BOS'): None, ('GSW', 'DEN'): None}
+
+def test_watch_deadline_applies_while_fetch_fails(slate, monkeypatch):
+    monkeypatch.setattr(check_results, 'WATCH_MAX_HOURS', 0)
+    calls = fail_always(monkeypatch)
+    check_results.watch(DATE)
+
+    assert len(calls) == 1
+    assert slate == []
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+import player_ids
+import run_nba
+
+ROSTER = pd.DataFrame({
+    'player_id': [1, 2, 3, 4],
+    'player_name': ["Jalen Williams", "Kenrich Williams", "Chet Holmgren", "Maxi Kleber"],
+})
+
+@pytest.fixture(autouse=True)
+def fresh_aliases(temp_db, monkeypatch):
+    monkeypatch.setattr(player_ids, '_aliases', None)
+
+def saved_aliases():
+    return player_ids.database.load_player_aliases()
+
+def test_exact_match_is_not_overwritten_by_fuzzy_match():
+    # Jaylin은 로스터에 없음 -> partial_ratio로 Jalen에 붙으면 안 됨 (Jalen은 정확 일치로 이미 확정)
+    injured = [{'name': "Jalen Williams", 'status': 'Out'}, {'name': "Jaylin Williams", 'status': 'Day-To-Day'}]
+    df, out_players = run_nba.mark_availability(ROSTER.copy(), injured)
+
+    status = dict(zip(df['player_name'], df['availability']))
+    assert status["Jalen Williams"] == 'Out'
+    assert status["Kenrich Williams"] == 'OK'
+    assert out_players == ["Jalen Williams"]
+    assert 'jaylin williams' not in saved_aliases()
+
+def test_exact_match_beats_saved_alias():
+    # 예전 실행에서 잘못 저장된 매핑: 'jaylin williams' -> Jalen
+    player_ids.database.save_player_aliases([('jaylin williams', 1, "Jalen Williams", 86)])
+    roster = pd.concat([ROSTER, pd.DataFrame({'player_id': [5], 'player_name': ["Jaylin Williams"]})], ignore_index=True)
+
+    df, _ = run_nba.mark_availability(roster, [{'name': "Jaylin Williams", 'status': 'Out'}])
+    status = dict(zip(df['player_name'], df['availability']))
+    assert status["Jaylin Williams"] == 'Out'
+    assert status["Jalen Williams"] == 'OK'
+
+def test_alias_is_not_used_for_player_claimed_by_exact_match():
+    player_ids.database.save_player_aliases([('jaylin williams', 1, "Jalen Williams", 86)])
+    ids = player_ids.resolve_player_ids(["Jalen Williams", "Jaylin Williams"], ROSTER)
+    assert ids["Jalen Williams"] == 1
+    assert ids.get("Jaylin Williams") != 1
+
+def test_weak_fuzzy_match_is_used_but_not_saved():
+    ids = player_ids.resolve_player_ids(["Maxi Klebber"], ROSTER)  # partial_ratio 91
+    assert ids == {"Maxi Klebber": 4}
+    assert 'maxi klebber' not in saved_aliases()
+
+def test_ambiguous_fuzzy_match_is_not_saved():
+    roster = pd.DataFrame({'player_id': [10, 11], 'player_name': ["LeBron James", "Bronny James"]})
+    ids = player_ids.resolve_player_ids(["James"], roster)  # 두 선수 모두 100점
+    assert ids["James"] in (10, 11)
+    assert 'james' not in saved_aliases()
+
+def test_strong_unique_fuzzy_match_is_saved():
+    roster = pd.DataFrame({'player_id': [20, 21], 'player_name': ["Shai Gilgeous-Alexander", "Chet Holmgren"]})
+    ids = player_ids.resolve_player_ids(["Shai Gilgeous Alexander (SGA)"], roster)
+    assert ids == {"Shai Gilgeous Alexander (SGA)": 20}
+    assert saved_aliases().get('shai gilgeous alexander (sga)') == 20
+
+def test_most_severe_status_wins_when_names_share_a_player():
+    injured = [{'name': "Chet Holmgren", 'status': 'Out'}, {'name': "C. Holmgren", 'status': 'Questionable'}]
+    df, _ = run_nba.mark_availability(ROSTER.copy(), injured)
+    assert dict(zip(df['player_name'], df['availability']))["Chet Holmgren"] == 'Out'
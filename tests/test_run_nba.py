@@ -0,0 +1,25 @@
+import pandas as pd
+
+import run_nba
+import snapshot_store
+
+def test_range_mode_saves_snapshot_only_for_run_date(temp_db, monkeypatch):
+    snapshots = []
+    monkeypatch.setattr(snapshot_store, 'save', lambda date, df: snapshots.append(date))
+    slate_df = pd.DataFrame({
+        'player_name': ["Jalen Williams", "Jayson Tatum"], 'availability': ['OK', 'OK'], 'pos': ['G-F', 'F'],
+        'min': [33.0, 36.0], 'pie': [0.12, 0.15], 'off_rating': [115.0, 118.0], 'def_rating': [108.0, 110.0],
+        'usg_pct': [0.26, 0.30], 'ts_pct': [0.60, 0.59], 'note': ['', ''], 'team': ['OKC', 'BOS'],
+    })
+    slates = {
+        '2026-10-20': [('OKC', 'BOS', 'OKC', 0.8)],
+        '2026-10-22': [('BOS', 'OKC', 'BOS', 0.3)],
+    }
+    run_nba.save_slates(slates, slate_df, snapshot_date='2026-10-20')
+
+    conn = temp_db.get_connection()
+    predicted = conn.execute("SELECT DISTINCT date FROM predictions ORDER BY date").fetchall()
+    snapshot_dates = conn.execute("SELECT DISTINCT date FROM daily_stats").fetchall()
+    assert [d for (d,) in predicted] == ['2026-10-20', '2026-10-22']
+    assert [d for (d,) in snapshot_dates] == ['2026-10-20']
+    if snapshot_store.AVAILABLE: assert snapshots == ['2026-10-20']
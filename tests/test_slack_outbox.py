@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import rate_limiter
+import slack_outbox
+
+LONG_TEXT = "".join(f"{i:03d} " + "x" * 80 + "\n" for i in range(100))  # 8,500자 -> 3조각
+
+class StubSlack:
+    """ chat.postMessage 스텁 서버. replies에 넣은 응답을 차례로 돌려주고, 비면 정상 응답 """
+
+    def __init__(self):
+        self.posts = []     # (받은 시각, 요청 본문)
+        self.replies = []   # (HTTP 상태, 헤더, 본문)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.posts.append((time.monotonic(), body))
+                status, headers, reply = stub.replies.pop(0) if stub.replies else (200, {}, {'ok': True, 'ts': f"{len(stub.posts)}.0001"})
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                for name, value in {**headers, 'Content-Type': 'application/json', 'Content-Length': str(len(data))}.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args): pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    @property
+    def bodies(self):
+        return [body for _, body in self.posts]
+
+@pytest.fixture
+def slack(tmp_path, monkeypatch):
+    stub = StubSlack()
+    monkeypatch.setattr(slack_outbox, 'OUTBOX_PATH', str(tmp_path / "slack_outbox.db"))
+    monkeypatch.setattr(slack_outbox, '_conn', None)
+    monkeypatch.setattr(slack_outbox, 'API_URL', stub.url)
+    monkeypatch.setattr(slack_outbox, 'DELIVERY', 'off')
+    monkeypatch.setitem(rate_limiter.HOST_LIMITS, '127.0.0.1', (1000.0, 1000))
+    monkeypatch.setattr(rate_limiter, '_buckets', {})
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+    if slack_outbox._conn is not None: slack_outbox._conn.close()
+
+def statuses():
+    return slack_outbox._get_conn().execute("SELECT seq, status, last_error FROM outbox ORDER BY id").fetchall()
+
+def test_split_text_keeps_lines_and_limit():
+    chunks = slack_outbox.split_text(LONG_TEXT, limit=3500)
+    assert len(chunks) == 3
+    assert all(len(chunk) <= 3500 and chunk.endswith("\n") for chunk in chunks)
+    assert "".join(chunks) == LONG_TEXT
+
+    # 한 줄이 limit보다 길면 그 줄만 잘라서 (남은 부분은 다음 줄과 합침)
+    assert slack_outbox.split_text("a\n" + "b" * 25 + "\nc", limit=10) == ["a\n", "b" * 10, "b" * 10, "b" * 5 + "\nc"]
+    assert slack_outbox.split_text("") == [""]
+
+def test_chunks_are_threaded_and_reassemble(slack):
+    message_id, total = slack_outbox.enqueue(LONG_TEXT, channel="C1", source='test')
+    assert slack_outbox.deliver(max_seconds=5) == (total, 0, 0)
+
+    first, *replies = slack.bodies
+    assert len(replies) == total - 1
+    assert 'thread_ts' not in first
+    assert all(body['thread_ts'] == "1.0001" and body['channel'] == "C1" for body in replies)
+    assert [body['text'].split("\n", 1)[0] for body in replies] == [f"(이어서 {i}/{total})" for i in range(2, total + 1)]
+    assert first['text'] + "".join(body['text'].split("\n", 1)[1] for body in replies) == LONG_TEXT
+
+def test_rate_limited_chunk_waits_for_retry_after(slack):
+    slack.replies.append((429, {'Retry-After': '1'}, {'ok': False, 'error': 'ratelimited'}))
+    slack_outbox.enqueue("hello", channel="C1")
+    assert slack_outbox.deliver(max_seconds=5) == (1, 0, 0)
+
+    (first_at, first), (retry_at, retry) = slack.posts
+    assert first == retry
+    assert retry_at - first_at >= 0.9
+    assert slack_outbox._get_conn().execute("SELECT attempts FROM outbox").fetchone()[0] == 2
+
+def test_permanent_failure_cascades_to_later_chunks(slack):
+    slack.replies.append((200, {}, {'ok': False, 'error': 'channel_not_found'}))
+    _, total = slack_outbox.enqueue(LONG_TEXT, channel="C-GONE")
+    assert slack_outbox.deliver(max_seconds=5) == (0, 1, 0)
+
+    assert len(slack.posts) == 1  # 뒤 조각은 보내지 않음
+    assert statuses() == [(0, 'failed', 'channel_not_found')] + \
+        [(seq, 'failed', "앞 조각 전송 실패 (channel_not_found)") for seq in range(1, total)]
+
+    # 수동 재시도 (--retry-failed)
+    assert slack_outbox.retry_failed() == total
+    assert slack_outbox.deliver(max_seconds=5) == (total, 0, 0)
+    assert slack_outbox.status_counts() == {'sent': total}
+
+def test_chunk_claimed_by_dead_worker_is_reclaimed(slack):
+    slack_outbox.enqueue(LONG_TEXT, channel="C1")
+
+    # 앞 조각이 전송되기 전에는 뒤 조각을 선점할 수 없음
+    row = slack_outbox._claim_next(time.time())
+    assert row[2] == 0
+    assert slack_outbox._claim_next(time.time()) is None
+
+    # 워커가 선점한 채로 죽고 CLAIM_TIMEOUT이 지남 -> 다음 워커가 다시 가져가서 전송
+    slack_outbox._get_conn().execute("UPDATE outbox SET claimed_at = ? WHERE id = ?",
+                                     (time.time() - slack_outbox.CLAIM_TIMEOUT - 1, row[0]))
+    sent, failed, pending = slack_outbox.deliver(max_seconds=5)
+    assert (sent, failed, pending) == (3, 0, 0)
+    assert slack_outbox.status_counts() == {'sent': 3}
+
+def test_recent_claim_is_not_reclaimed(slack):
+    slack_outbox.enqueue("hello", channel="C1")
+    assert slack_outbox._claim_next(time.time()) is not None  # 다른 워커가 전송 중
+
+    assert slack_outbox.deliver(max_seconds=1) == (0, 0, 1)
+    assert slack.posts == []
+
+def test_later_chunks_wait_for_rate_limited_first_chunk(slack, monkeypatch):
+    # 첫 조각이 429로 재시도 대기 중이면 뒤 조각은 시각이 됐어도 보낼 수 없음 -> 바쁜 대기 없이 기다려야 함
+    slack.replies.append((429, {'Retry-After': '1'}, {'ok': False, 'error': 'ratelimited'}))
+    claims = []
+    claim_next = slack_outbox._claim_next
+    monkeypatch.setattr(slack_outbox, '_claim_next', lambda now: claims.append(now) or claim_next(now))
+
+    _, total = slack_outbox.enqueue(LONG_TEXT, channel="C1")
+    assert slack_outbox.deliver(max_seconds=5) == (total, 0, 0)
+
+    assert len(slack.posts) == total + 1
+    assert len(claims) <= total + 4  # 전송마다 1번 + 대기 후 몇 번 (바쁜 대기면 수천 번)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import api_cache
+import run_nba
+import team_memo
+import uv_model
+
+SCORE_TOLERANCE = 1e-9  # 배치 / 단일 팀 점수 비교 허용 오차 (합산 순서 차이)
+
+COLUMNS = ['player_name', 'pos', 'min', 'pie', 'usg_pct', 'availability']
+
+def random_roster(rng, size):
+    return pd.DataFrame({
+        'player_name': [f"P{i}" for i in range(size)],
+        'pos': rng.choice(['G', 'F', 'C', 'G-F', 'F-C'], size),
+        'min': rng.uniform(0, 38, size).round(1),
+        'pie': rng.normal(0.09, 0.05, size),
+        'usg_pct': rng.uniform(0.05, 0.40, size),
+        'availability': rng.choice(['OK', 'OK', 'OK', 'Out', 'Questionable'], size),
+    })
+
+def empty_roster():
+    return pd.DataFrame({col: pd.Series(dtype=float if col in ('min', 'pie', 'usg_pct') else object) for col in COLUMNS})
+
+@pytest.fixture
+def temp_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_cache, 'CACHE_PATH', str(tmp_path / "api_cache.db"))
+    monkeypatch.setattr(api_cache, '_conn', None)
+    yield
+    if api_cache._conn is not None: api_cache._conn.close()
+
+def test_batch_scores_match_single_team_scores_within_tolerance():
+    rng = np.random.default_rng(7)
+    teams = {f"T{i:02d}": random_roster(rng, int(rng.integers(1, 18))) for i in range(60)}
+    home = {team for i, team in enumerate(teams) if i % 2 == 0}
+    players = pd.concat([df.assign(team=team) for team, df in teams.items()], ignore_index=True)
+
+    batch = uv_model.score_teams(players, home)
+    for team, df in teams.items():
+        expected, _ = uv_model.calculate_team_power(df, team in home)
+        assert np.isclose(batch.score(team), expected, rtol=0, atol=SCORE_TOLERANCE)
+
+    # 초접전(허용 오차 이내)이 아니면 두 경로의 승자가 같음
+    names = list(teams)
+    for h_team, v_team in zip(names[0::2], names[1::2]):
+        h_single = uv_model.calculate_team_power(teams[h_team], True)[0]
+        v_single = uv_model.calculate_team_power(teams[v_team], False)[0]
+        if abs(h_single - v_single) <= SCORE_TOLERANCE: continue
+        assert uv_model.home_wins(batch.score(h_team), batch.score(v_team)) == uv_model.home_wins(h_single, v_single)
+
+def test_team_without_rows_scores_zero():
+    rng = np.random.default_rng(1)
+    players = random_roster(rng, 10).assign(team='LAL')
+    batch = uv_model.score_teams(players, {'LAL', 'BOS'}, teams=['LAL', 'BOS'])
+
+    assert batch.score('BOS') == 0.0
+    assert batch.log('BOS') == "데이터 없음"
+    assert batch.scores.loc['BOS', 'is_home']
+    assert batch.score('LAL') == pytest.approx(uv_model.calculate_team_power(players, True)[0])
+
+def test_team_with_everyone_out_scores_zero():
+    players = random_roster(np.random.default_rng(2), 8).assign(availability='Out', team='BOS')
+    batch = uv_model.score_teams(players, teams=['BOS'])
+    assert (batch.score('BOS'), batch.log('BOS')) == uv_model.calculate_team_power(players)
+
+def test_score_slate_handles_empty_team_frame(temp_cache):
+    rng = np.random.default_rng(3)
+    team_data = {'LAL': (random_roster(rng, 12), []), 'BOS': (empty_roster(), [])}
+    scores = team_memo.score_slate(team_data, {'LAL'})
+
+    assert scores.score('BOS') == 0.0
+    assert scores.log('BOS') == "데이터 없음"
+    assert scores.score('LAL') == pytest.approx(uv_model.calculate_team_power(team_data['LAL'][0], True)[0])
+
+def test_score_range_handles_empty_team_frame():
+    rng = np.random.default_rng(4)
+    team_data = {'LAL': (random_roster(rng, 12), []), 'BOS': (empty_roster(), [])}
+    slates = {'2026-10-20': [('G1', 'LAL', 'BOS')], '2026-10-21': [('G2', 'BOS', 'LAL')]}
+    scores = run_nba.score_range(slates, team_data)
+
+    assert scores['2026-10-20'].score('BOS') == 0.0
+    assert scores['2026-10-21'].log('BOS') == "데이터 없음"
+    assert scores['2026-10-21'].score('LAL') == pytest.approx(uv_model.calculate_team_power(team_data['LAL'][0])[0])
+
+def test_exact_tie_goes_to_visitor():
+    assert not uv_model.home_wins(1.0, 1.0)
+    assert uv_model.home_wins(1.0 + 1e-12, 1.0)
+    assert list(uv_model.home_wins(np.array([2.0, 1.0, 0.5]), np.array([1.0, 1.0, 1.0]))) == [True, False, False]
@@ -0,0 +1,219 @@
+"""
+================================================================================
+[파일명: uv_model.py] - UV 점수 모델 (단일 팀 / 배치)
+================================================================================
+
+[역할]
+1. 선수 개인 UV(Unit Value)와 팀 파워 점수를 계산합니다. (run_nba.py에서 분리)
+
+2. 배치 엔진 score_teams():
+   - 슬레이트 전체 선수를 팀 키가 붙은 긴 프레임 하나로 받아
+     NumPy 연산 + 그룹 합계로 모든 팀 점수를 한 번에 계산합니다.
+   - calculate_team_power()와 점수가 부동소수점 오차 범위에서 같습니다. (비트 단위 일치는 아님)
+     합산 순서가 달라 마지막 자리가 다를 수 있으므로, 두 경로의 점수 차가 그 정도인
+     초접전 경기(1e-12 수준)는 경로에 따라 승자가 갈릴 수 있습니다.
+   - 선수가 없는 팀(빈 프레임 / 전원 결장)은 0점 + "데이터 없음" (calculate_team_power와 동일)
+   - 사람이 읽는 로그(베스트5 문자열)는 출력할 때만 만들어집니다.
+
+[주요 함수]
+- calculate_team_power(df, is_home): 한 팀 점수 (기존 방식)
+- score_teams(players, home_keys, key='team', teams=None): 전체 팀 점수 (BatchScores)
+- home_wins(h_score, v_score): 홈 승리 판정 (기존과 같은 '>' 비교, 동점은 원정 승)
+================================================================================
+"""
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# 1. 모델 상수
+# -----------------------------------------------------------------------------
+UV_SLOPE = 20            # 개인 UV 기울기
+UV_PIVOT = 0.10          # PIE 기준점 (UV 1.0)
+UV_MIN = 0.1             # 개인 UV 하한
+UV_MAX = 3.5             # 개인 UV 상한
+REPLACEMENT_VALUE = 0.5  # 빈 출전시간을 채우는 대체 선수 UV
+FLOOR_MINUTES = 240      # 팀 총 출전시간 (48분 x 5명)
+HOME_BONUS = 0.15        # 홈 이점
+USG_THRESHOLD = 0.60     # 상위 2명 USG% 합 패널티 기준
+USG_PENALTY = 3.0        # 패널티 배율
+
+# -----------------------------------------------------------------------------
+# 2. 단일 팀 계산
+# -----------------------------------------------------------------------------
+def calculate_individual_uv(pie):
+    uv = 1.0 + (pie - UV_PIVOT) * UV_SLOPE
+    return max(UV_MIN, min(uv, UV_MAX))
+
+def select_best_lineup(roster):
+    sorted_players = roster.sort_values(by='contribution', ascending=False)
+    starters = []
+    
+    guards = sorted_players[sorted_players['pos'].str.contains('G', na=False)]
+    forwards = sorted_players[sorted_players['pos'].str.contains('F', na=False)]
+    centers = sorted_players[sorted_players['pos'].str.contains('C', na=False)]
+    
+    selected_indices = set()
+    
+    def pick_player(pool, count):
+        picked = 0
+        for idx, row in pool.iterrows():
+            if picked >= count: break
+            if idx not in selected_indices:
+                starters.append(row)
+                selected_indices.add(idx)
+                picked += 1
+    
+    pick_player(centers, 1)
+    pick_player(guards, 2)
+    pick_player(forwards, 2)
+    
+    if len(starters) < 5:
+        for idx, row in sorted_players.iterrows():
+            if len(starters) >= 5: break
+            if idx not in selected_indices:
+                starters.append(row)
+                selected_indices.add(idx)
+
+    return pd.DataFrame(starters)
+
+def calculate_team_power(df, is_home=False):
+    roster = df[df['availability'] != 'Out'].copy()
+    if roster.empty: return 0.0, "데이터 없음"
+
+    for col in ['pie', 'min', 'usg_pct']:
+        roster[col] = pd.to_numeric(roster[col])
+
+    roster['unit_value'] = roster['pie'].apply(calculate_individual_uv)
+    roster['contribution'] = roster['unit_value'] * roster['min']
+    
+    total_minutes = roster['min'].sum()
+    total_contribution = roster['contribution'].sum()
+    
+    if total_minutes < FLOOR_MINUTES:
+        missing = FLOOR_MINUTES - total_minutes
+        total_contribution += (REPLACEMENT_VALUE * missing)
+        total_minutes = FLOOR_MINUTES
+        
+    raw_score = (total_contribution / total_minutes) * 5
+    
+    home_adv_str = ""
+    if is_home: 
+        raw_score += HOME_BONUS
+        home_adv_str = f" + 홈이점({HOME_BONUS})"
+
+    top_2_usg = roster.nlargest(2, 'usg_pct')['usg_pct'].sum()
+    penalty = 0.0
+    penalty_str = ""
+    if top_2_usg > USG_THRESHOLD:
+        penalty = (top_2_usg - USG_THRESHOLD) * USG_PENALTY
+        penalty_str = f" - 패널티({penalty:.2f})"
+        
+    final_score = raw_score - penalty
+
+    full_log = build_team_log(roster, final_score, home_adv_str, penalty_str)
+    return final_score, full_log
+
+def home_wins(h_score, v_score):
+    """ 홈 팀 승리 예측 여부 (스칼라 / 배열 모두). 동점은 원정 승 """
+    return np.asarray(h_score) > np.asarray(v_score)
+
+def build_team_log(roster, final_score, home_adv_str, penalty_str):
+    starters_df = select_best_lineup(roster)
+    detail_parts = []
+    for _, row in starters_df.iterrows():
+        detail_parts.append(f"{row['player_name']}({row['unit_value']:.1f})")
+    
+    detail_str = " / ".join(detail_parts)
+    return f"[{final_score:.2f}] = 베스트5[{detail_str}]{home_adv_str}{penalty_str}"
+
+# -----------------------------------------------------------------------------
+# 3. 배치 계산
+# -----------------------------------------------------------------------------
+class BatchScores:
+    """ score_teams() 결과. 점수는 scores 프레임에, 로그는 log(key) 호출 시 계산합니다. """
+
+    def __init__(self, scores, roster, key):
+        self.scores = scores    # index: 팀 키 / columns: score, raw_score, penalty, top_2_usg, is_home
+        self._roster = roster   # 'Out' 제외 선수 + unit_value, contribution
+        self._key = key
+
+    def score(self, team):
+        if team not in self.scores.index: return 0.0  # 선수 행이 없는 팀
+        return float(self.scores.at[team, 'score'])
+
+    def log(self, team):
+        if team not in self.scores.index: return "데이터 없음"
+        row = self.scores.loc[team]
+        team_roster = self._roster[self._roster[self._key] == team]
+        if team_roster.empty: return "데이터 없음"
+
+        home_adv_str = f" + 홈이점({HOME_BONUS})" if row['is_home'] else ""
+        penalty_str = f" - 패널티({row['penalty']:.2f})" if row['top_2_usg'] > USG_THRESHOLD else ""
+        return build_team_log(team_roster, row['score'], home_adv_str, penalty_str)
+
+def _group_sum(values, starts):
+    """ 연속 구간별 합계 (starts: 각 구간 시작 위치, 빈 구간 없음) """
+    if len(starts) == 0: return np.zeros(0)
+    return np.add.reduceat(values, starts)
+
+def score_teams(players, home_keys=(), key='team', teams=None):
+    """ players: 슬레이트 전체 선수 (key 컬럼 + min, pie, usg_pct, pos, availability)
+    home_keys: 홈 팀 키 목록
+    teams: 점수를 낼 팀 키 목록 (행이 0개인 팀도 포함하려면 지정, 없으면 players에 있는 팀)
+    반환값: BatchScores """
+    all_keys = list(pd.unique(players[key])) if teams is None else list(teams)
+    roster = players[players['availability'] != 'Out'].copy()
+    for col in ['pie', 'min', 'usg_pct']:
+        roster[col] = pd.to_numeric(roster[col])
+
+    # 개인 UV / 기여도 (벡터 연산)
+    pie = roster['pie'].to_numpy(dtype=float)
+    roster['unit_value'] = np.clip(1.0 + (pie - UV_PIVOT) * UV_SLOPE, UV_MIN, UV_MAX)
+    roster['contribution'] = roster['unit_value'] * roster['min']
+
+    # 팀 순서를 유지한 채 같은 팀끼리 연속 구간으로 정렬
+    codes, team_index = pd.factorize(roster[key], sort=False)
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, dtype=int)
+    sizes = np.diff(np.r_[starts, len(codes)])
+
+    minutes = roster['min'].to_numpy(dtype=float)[order]
+    contribution = roster['contribution'].to_numpy(dtype=float)[order]
+    total_minutes = _group_sum(minutes, starts)
+    total_contribution = _group_sum(contribution, starts)
+
+    # 240분 미만이면 대체 선수 가치로 채움
+    short = total_minutes < FLOOR_MINUTES
+    total_contribution = np.where(short, total_contribution + REPLACEMENT_VALUE * (FLOOR_MINUTES - total_minutes), total_contribution)
+    total_minutes = np.where(short, FLOOR_MINUTES, total_minutes)
+    raw_score = (total_contribution / total_minutes) * 5
+
+    is_home = pd.Index(team_index).isin(list(home_keys))  # 해시 조회 (object 배열 np.isin은 O(팀 x 홈팀))
+    raw_score = np.where(is_home, raw_score + HOME_BONUS, raw_score)
+
+    # 팀별 USG% 상위 2명 합 (팀 코드 오름차순, USG 내림차순)
+    usg = roster['usg_pct'].to_numpy(dtype=float)[order]
+    usg_order = np.lexsort((-usg, codes))
+    usg_sorted = np.nan_to_num(usg[usg_order])
+    top_1 = usg_sorted[starts]
+    second = usg_sorted[np.minimum(starts + 1, len(codes) - 1)] if len(codes) else top_1
+    top_2_usg = np.where(sizes >= 2, top_1 + second, top_1)
+
+    penalty = np.where(top_2_usg > USG_THRESHOLD, (top_2_usg - USG_THRESHOLD) * USG_PENALTY, 0.0)
+    final_score = raw_score - penalty
+
+    scores = pd.DataFrame({
+        'score': final_score, 'raw_score': raw_score, 'penalty': penalty,
+        'top_2_usg': top_2_usg, 'is_home': is_home,
+    }, index=pd.Index(team_index, name=key))
+
+    # 빈 프레임 / 전원 결장 등으로 선수가 없는 팀은 0점 (기존 "데이터 없음" 처리와 동일)
+    missing = list(dict.fromkeys(k for k in all_keys if k not in scores.index))
+    if missing:
+        empty = pd.DataFrame({
+            'score': 0.0, 'raw_score': 0.0, 'penalty': 0.0, 'top_2_usg': 0.0,
+            'is_home': [k in set(home_keys) for k in missing],
+        }, index=pd.Index(missing, name=key))
+        scores = pd.concat([scores, empty])
+    return BatchScores(scores, roster, key)